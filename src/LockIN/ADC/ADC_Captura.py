@@ -0,0 +1,139 @@
+import time
+import numpy as np
+from .Driver.Driver import Driver
+from ..captura.captura import Captura
+
+class ADC_Captura(Driver):
+    """ADC_Captura
+    Driver que reproduce un archivo de captura grabado con captura.grabar, para reprocesar una medición con otra configuración del lock-in.
+
+    Se comporta como una placa que lee todos los canales de la captura: con una captura de referencia y medición se usa como único ADC de un LockIn (adc_med=None). Los bloques crudos son vistas del archivo mapeado en memoria, sin copias.
+
+    Por defecto entrega las muestras tan rápido como se pidan; con tiempo_real=True espera el tiempo que tardaría la placa en adquirirlas.
+
+    Args:
+        Driver (_type_): _description_
+    """
+
+    def __init__(self, path, tiempo_real=False):
+        """__init__
+
+        Args:
+            path (str): archivo de la captura
+            tiempo_real (bool, optional): si es True, las lecturas respetan la frecuencia de muestreo de la captura. Defaults to False.
+        """
+        self.path = path
+        self.tiempo_real = tiempo_real
+        self.captura = None
+        self.streaming = False
+        self.posicion = 0
+
+    def connect(self):
+        self.captura = Captura(self.path)
+        self.fs = self.captura.fs
+        self.posicion = 0
+        self._t0 = time.perf_counter()
+
+    def identify(self):
+        return f"Captura {self.path}"
+
+    def ir_a(self, muestra):
+        """ir_a
+        Mueve la posicion de lectura a una muestra de la captura.
+
+        Args:
+            muestra (int): muestra desde la que continua la reproduccion
+        """
+        if not 0 <= muestra <= len(self.captura):
+            raise ValueError("Muestra fuera de la captura")
+        self.posicion = muestra
+        self._t0 = time.perf_counter() - muestra/self.fs
+
+    def _esperar(self):
+        # Espera hasta el instante de la ultima muestra entregada
+        demora = self._t0 + self.posicion/self.fs - time.perf_counter()
+        if demora > 0:
+            time.sleep(demora)
+
+    def read(self):
+        """read
+        Lee la proxima muestra de cada canal
+
+        Returns:
+            float o tuple: tension leida, o una tupla con la tension de cada canal si la captura tiene varios
+        """
+        v = self.read_block_crudo(1)[0]*self.captura.slope + self.captura.intercept
+        if len(v) == 1:
+            return float(v[0])
+        return tuple(float(c) for c in v)
+
+    def start_stream(self, fs, sync=None):
+        """start_stream
+        Inicia la reproduccion desde el comienzo de la captura. La frecuencia de muestreo es la de la captura, como la frecuencia real que devuelve una placa, y sync se ignora.
+
+        Args:
+            fs (float): frecuencia de muestreo pedida
+            sync (str, optional): se ignora. Defaults to None.
+
+        Returns:
+            float: frecuencia de muestreo de la captura
+        """
+        if self.captura is None:
+            self.connect()
+        self.ir_a(0)
+        self.streaming = True
+        return self.fs
+
+    def read_block_crudo(self, n):
+        """read_block_crudo
+        Lee los proximos n codigos de cada canal.
+
+        Args:
+            n (int): cantidad de muestras por canal
+
+        Returns:
+            numpy array: vista int16 de (n, canales) sobre el archivo. Al final de la captura puede tener menos filas.
+
+        Raises:
+            EOFError: no quedan muestras en la captura
+        """
+        if self.captura is None:
+            raise RuntimeError("La captura no fue abierta, llamar a connect")
+        if self.posicion >= len(self.captura):
+            raise EOFError("Fin de la captura")
+        codigos = self.captura.codigos[self.posicion:self.posicion + n]
+        self.posicion += len(codigos)
+        if self.tiempo_real:
+            self._esperar()
+        return codigos
+
+    def read_block(self, n):
+        """read_block
+        Lee las proximas n muestras de cada canal.
+
+        Args:
+            n (int): cantidad de muestras por canal
+
+        Returns:
+            numpy array: arreglo de (n, canales) en volts, o vector si la captura tiene un solo canal. Al final de la captura puede tener menos filas.
+
+        Raises:
+            EOFError: no quedan muestras en la captura
+        """
+        if not self.streaming:
+            raise RuntimeError("La adquisición por streaming no fue iniciada")
+        codigos = self.read_block_crudo(n)
+        v = np.multiply(codigos, self.captura.slope)
+        v += self.captura.intercept
+        if v.shape[1] == 1:
+            return v[:, 0]
+        return v
+
+    def calibracion(self):
+        return self.captura.slope.copy(), self.captura.intercept.copy()
+
+    def descripcion(self):
+        return {'id': self.identify(), 'adc': self.captura.cabecera['adc']}
+
+    def stop_stream(self):
+        self.streaming = False
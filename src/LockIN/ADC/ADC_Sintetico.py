@@ -0,0 +1,219 @@
+import time
+import numpy as np
+from scipy import signal
+from .Driver.Driver import Driver
+
+class ADC_Sintetico(Driver):
+    """ADC_Sintetico
+    Driver que genera de forma determinista una señal de referencia y una señal a medir, para desarrollar y hacer pruebas de carga sin placas.
+
+    Se comporta como una placa que lee dos canales: read devuelve la tupla (ref, med) y read_block un arreglo de (n, 2), por lo que se usa como único ADC de un LockIn (adc_med=None).
+
+    La referencia es A_ref*cos(fase) y la señal a medir A*cos(fase + desfase), donde la fase integra la frecuencia fr + deriva*t. Ambas pueden tener armónicos, ruido blanco, ruido 1/f y la cuantización del ADC de 14 bits de la USB-1408FS.
+
+    Args:
+        Driver (_type_): _description_
+    """
+
+    #filtro de ruido rosa (aproximacion de 3 polos y 3 ceros a 1/f)
+    b_rosa = np.array([0.049922035, -0.095993537, 0.050612699, -0.004408786])
+    a_rosa = np.array([1, -2.494956002, 2.017265875, -0.522189400])
+
+    def __init__(self, fr, fs=1000, amplitud=1.0, fase=0.0, amplitud_ref=1.0, deriva=0.0, armonicos=None,
+                 ruido_blanco=0.0, ruido_1f=0.0, rango=10.0, bits=14, semilla=0, tiempo_real=False):
+        """__init__
+
+        Args:
+            fr (float): frecuencia de la referencia en t=0
+            fs (float, optional): frecuencia de muestreo de read. start_stream la reemplaza. Defaults to 1000.
+            amplitud (float, optional): amplitud de la señal a medir en volts. Defaults to 1.0.
+            fase (float, optional): desfase de la señal a medir respecto de la referencia en radianes. Defaults to 0.0.
+            amplitud_ref (float, optional): amplitud de la referencia en volts. Defaults to 1.0.
+            deriva (float, optional): variacion lineal de la frecuencia en Hz/s. Defaults to 0.0.
+            armonicos (dict, optional): {k: amplitud relativa} de los armonicos de orden k, aplicados a ambas señales. Defaults to None.
+            ruido_blanco (float, optional): valor eficaz del ruido blanco en volts. Defaults to 0.0.
+            ruido_1f (float, optional): valor eficaz del ruido 1/f en volts. Defaults to 0.0.
+            rango (float, optional): rango del ADC en volts (±rango). None para no cuantizar. Defaults to 10.0.
+            bits (int, optional): bits del ADC. Defaults to 14.
+            semilla (int, optional): semilla de los generadores de ruido. Defaults to 0.
+            tiempo_real (bool, optional): si es True, read y read_block esperan a que haya transcurrido el tiempo de las muestras entregadas. Defaults to False.
+        """
+        if fr <= 0 or fs <= 0:
+            raise ValueError("Las frecuencias deben ser positivas")
+        self.fr = fr
+        self.fs = fs
+        self.amplitud = amplitud
+        self.fase = fase
+        self.amplitud_ref = amplitud_ref
+        self.deriva = deriva
+        self.armonicos = dict(armonicos) if armonicos is not None else {}
+        self.ruido_blanco = ruido_blanco
+        self.ruido_1f = ruido_1f
+        self.rango = rango
+        self.bits = bits
+        #cuentas del ADC en complemento a dos, 0x1fff y -0x2000 con los 14 bits de la USB-1408FS (ver usb_1408FS.volts)
+        self.cuenta_max = (1 << (bits - 1)) - 1
+        self.cuenta_min = -(1 << (bits - 1))
+        self.semilla = semilla
+        self.tiempo_real = tiempo_real
+        self.streaming = False
+
+        # Escala para que el ruido rosa tenga valor eficaz unitario con ruido blanco unitario
+        h = signal.lfilter(self.b_rosa, self.a_rosa, np.r_[1.0, np.zeros(1 << 16)])
+        self._escala_rosa = 1/np.sqrt(np.sum(h**2))
+        self.reset()
+
+    def reset(self):
+        """reset
+        Vuelve la señal a t=0 y reinicia los generadores de ruido, de forma que se repite la misma secuencia.
+        """
+        semillas = np.random.SeedSequence(self.semilla).spawn(2)
+        self._rng_blanco = np.random.default_rng(semillas[0])
+        self._rng_rosa = np.random.default_rng(semillas[1])
+        self._zi_rosa = np.zeros((len(self.a_rosa) - 1, 2))
+        self._fase_acum = 0.0
+        self.n = 0
+        self._t0 = time.perf_counter()
+
+    def connect(self):
+        pass
+
+    def identify(self):
+        return f"ADC sintetico fr={self.fr} Hz fs={self.fs} Hz"
+
+    def lsb(self):
+        """lsb
+        Devuelve el paso de cuantizacion en volts, o None si no se cuantiza.
+        """
+        if self.rango is None:
+            return None
+        return self.rango / (1 << (self.bits - 1))
+
+    def generar(self, n):
+        """generar
+        Genera las proximas n muestras de ambas señales, sin esperar en modo tiempo real.
+
+        Args:
+            n (int): cantidad de muestras
+
+        Returns:
+            numpy array: arreglo de (n, 2) con la referencia en la primera columna y la señal a medir en la segunda
+        """
+        v = self._senal(n)
+        if self.rango is not None:
+            self._cuantizar(v)
+            v *= self.lsb()
+        return v
+
+    def _senal(self, n):
+        # Fase de la referencia: integral de la frecuencia instantanea desde la muestra self.n, acumulada modulo 2*pi entre bloques
+        k = np.arange(n + 1)
+        f = self.fr + self.deriva*self.n/self.fs
+        fase = self._fase_acum + 2*np.pi/self.fs * (f*k + self.deriva*k*k/(2*self.fs))
+        self._fase_acum = np.fmod(fase[-1], 2*np.pi)
+        fase = fase[:-1]
+        self.n += n
+
+        v = np.empty((n, 2))
+        v[:, 0] = self.amplitud_ref*np.cos(fase)
+        v[:, 1] = self.amplitud*np.cos(fase + self.fase)
+        for k, a in self.armonicos.items():
+            v[:, 0] += a*self.amplitud_ref*np.cos(k*fase)
+            v[:, 1] += a*self.amplitud*np.cos(k*(fase + self.fase))
+
+        if self.ruido_blanco > 0:
+            v += self.ruido_blanco*self._rng_blanco.standard_normal((n, 2))
+        if self.ruido_1f > 0:
+            rosa, self._zi_rosa = signal.lfilter(self.b_rosa, self.a_rosa, self._rng_rosa.standard_normal((n, 2)), axis=0, zi=self._zi_rosa)
+            v += self.ruido_1f*self._escala_rosa*rosa
+        return v
+
+    def _cuantizar(self, v):
+        # Cuantizacion y saturacion como en las cuentas del ADC
+        v /= self.lsb()
+        np.round(v, out=v)
+        np.clip(v, self.cuenta_min, self.cuenta_max, out=v)
+        return v
+
+    def _esperar(self):
+        # Espera hasta el instante de la ultima muestra entregada
+        demora = self._t0 + self.n/self.fs - time.perf_counter()
+        if demora > 0:
+            time.sleep(demora)
+
+    def read(self):
+        """read
+        Genera una muestra de cada señal
+
+        Returns:
+            tuple: referencia y señal a medir en volts
+        """
+        v = self.generar(1)
+        if self.tiempo_real:
+            self._esperar()
+        return float(v[0, 0]), float(v[0, 1])
+
+    def start_stream(self, fs, sync=None):
+        """start_stream
+        Inicia la generacion por bloques. No hay reloj que compartir, por lo que sync se ignora.
+
+        Args:
+            fs (float): frecuencia de muestreo
+            sync (str, optional): se ignora. Defaults to None.
+
+        Returns:
+            float: frecuencia de muestreo (igual a la pedida)
+        """
+        if fs <= 0:
+            raise ValueError("La frecuencia de muestreo debe ser positiva")
+        self.fs = fs
+        self.reset()
+        self.streaming = True
+        return self.fs
+
+    def read_block(self, n):
+        """read_block
+        Genera las proximas n muestras de cada señal. En modo tiempo real espera a que haya transcurrido el tiempo correspondiente a las muestras, como una placa muestreando a fs.
+
+        Args:
+            n (int): cantidad de muestras por canal
+
+        Returns:
+            numpy array: arreglo de (n, 2) con la referencia y la señal a medir en volts
+        """
+        if not self.streaming:
+            raise RuntimeError("La adquisición por streaming no fue iniciada")
+        v = self.generar(n)
+        if self.tiempo_real:
+            self._esperar()
+        return v
+
+    def read_block_crudo(self, n):
+        """read_block_crudo
+        Genera las proximas n muestras de cada señal como codigos del ADC.
+
+        Args:
+            n (int): cantidad de muestras por canal
+
+        Returns:
+            numpy array: arreglo int16 de (n, 2) con los codigos de la referencia y de la señal a medir
+        """
+        if self.rango is None:
+            raise RuntimeError("Sin rango no hay cuantizacion ni codigos crudos")
+        if not self.streaming:
+            raise RuntimeError("La adquisición por streaming no fue iniciada")
+        codigos = self._cuantizar(self._senal(n)).astype(np.int16)
+        if self.tiempo_real:
+            self._esperar()
+        return codigos
+
+    def calibracion(self):
+        if self.rango is None:
+            raise RuntimeError("Sin rango no hay cuantizacion ni codigos crudos")
+        return np.full(2, self.lsb()), np.zeros(2)
+
+    def descripcion(self):
+        return {'id': self.identify(), 'canales': ['ref', 'med'], 'rango': self.rango, 'bits': self.bits, 'semilla': self.semilla}
+
+    def stop_stream(self):
+        self.streaming = False
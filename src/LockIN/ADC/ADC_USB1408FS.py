@@ -1,3 +1,6 @@
+import threading
+import numpy as np
+import libusb1
 from .Driver.Driver import Driver
 from .usb_1408FS.usb_1408FS import *
 
@@ -16,8 +19,30 @@ class ADC_USB1408FS(Driver):
     #canales disponibles (Fijarse bien los canales)
     canales = [0, 1, 2, 3, 4, 5, 6, 7]
 
+    #canales en modo diferencial, el unico que usa esta clase (rangos BP_*): la calibracion de fabrica (CalDF) solo
+    #existe para las entradas diferenciales 0 a 3; los canales 4 a 7 solo se leen en modo single ended
+    canales_diferenciales = [0, 1, 2, 3]
+
+    #muestras por paquete de AInScan
+    muestras_paquete = 31
+
+    #modos de sincronizacion entre placas (ver usb_1408FS.SetSync)
+    sync_modos = {'master': 0, 'slave': 2}
+
+    #tension de referencia del DAC de las salidas analogicas
+    v_ref_dac = 4.096
+
     def __init__(self, serial, gain, chan):
+        """__init__
+
+        Args:
+            serial (str): numero de serie de la placa
+            gain (float): ganancia del ADC
+            chan (int o list): canal a leer, o lista de canales para leer varias señales de una misma placa mediante la cola de canales/ganancias
+        """
         self.serial = serial
+        self.streaming = False
+        self._excitacion = None
         self.set_gain(gain)
         self.set_chanel(chan)
 
@@ -37,10 +62,7 @@ class ADC_USB1408FS(Driver):
 
         for g in self.ganancias:
             if gain  <= g:
-                if((g%1) > 0.1):
-                    self.gain = f"BP_{int(g)}__{int((g%1)*100)}V"
-                else:
-                    self.gain = f"BP_{int(g)}_00V"
+                self.gain = f"BP_{int(g)}_{int(round((g%1)*100)):02d}V"
                 break
         if self.gain == -1:
             raise Exception("Ganancia no soportada")
@@ -50,20 +72,208 @@ class ADC_USB1408FS(Driver):
         Método para setear el canal del ADC correspondiente a sus valores permitidos
 
         Args:
-            chanel (int): canal del ADC correspondiente
+            chanel (int o list): canal diferencial del ADC correspondiente (0 a 3), o lista de canales (hasta 8 entradas de la cola)
 
         Raises:
             Exception: canal no soportado
+            ValueError: canal single ended (4 a 7), que no se puede leer con los rangos diferenciales
         """
 
-        if chanel in self.canales:
-            self.chanel = chanel
-        else:
+        chanels = list(chanel) if isinstance(chanel, (list, tuple)) else [chanel]
+        if len(chanels) == 0 or len(chanels) > 8:
             raise Exception("Canal no soportado")
+        for c in chanels:
+            if c not in self.canales:
+                raise Exception("Canal no soportado")
+            if c not in self.canales_diferenciales:
+                raise ValueError(f"El canal {c} solo existe en modo single ended; en modo diferencial los canales son {self.canales_diferenciales}")
+        self.chanels = chanels
+        self.chanel = chanels[0]
+
+    def gain_code(self):
+        """gain_code
+        Devuelve el codigo de rango de la libreria usb_1408FS correspondiente a la ganancia seteada
+
+        Returns:
+            int: codigo de rango
+        """
+        return getattr(usb_1408FS, self.gain)
         
     def connect(self):
         self.adc = usb_1408FS(self.serial)
 
+    def identify(self):
+        return f"{self.adc.getProduct()} {self.serial}"
+
     def read(self):
-        v = self.adc.AIn(self.chanel, self.gain)
-        return float (format(self.adc.volts(self.gain, v)))
\ No newline at end of file
+        """read
+        Lee una muestra de cada canal configurado
+
+        Returns:
+            float o tuple: tension leida, o una tupla con la tension de cada canal si se configuraron varios
+        """
+        gain = self.gain_code()
+        v = [float(format(self.adc.volts(gain, self.adc.AIn(c, gain)))) for c in self.chanels]
+        if len(v) == 1:
+            return v[0]
+        return tuple(v)
+
+    def start_stream(self, fs, sync=None):
+        """start_stream
+        Inicia un AInScan en modo de ejecucion continua. Las muestras quedan temporizadas por el reloj de la placa.
+
+        Args:
+            fs (float): frecuencia de muestreo pedida
+            sync (str, optional): 'master' o 'slave' para sincronizar el reloj con otra placa por el pin SYNC. Defaults to None.
+
+        Returns:
+            float: frecuencia de muestreo real fijada por el timer de la placa (por canal)
+        """
+        gain = self.gain_code()
+        if sync is not None:
+            if sync not in self.sync_modos:
+                raise ValueError("Modo de sincronizacion no soportado")
+            self.adc.SetSync(self.sync_modos[sync])
+
+        # Conversion de los codigos crudos a volts: (codigo*slope + intercept) * rango / 0x1fff
+        k = self.adc.volts(gain, 1.0)
+        self._slope = np.array([self.adc.CalDF[c][gain].slope for c in self.chanels]) * k
+        self._intercept = np.array([self.adc.CalDF[c][gain].intercept for c in self.chanels]) * k
+        self._resto = np.zeros(0, dtype=np.int16)
+
+        # bit 0 en 0: ejecucion continua, bit 1 en 0: transferencia por bloques
+        options = 0
+        nchan = len(self.chanels)
+        if nchan > 1:
+            # Los canales se intercalan en un solo scan segun la cola de canales/ganancias
+            options |= usb_1408FS.AIN_GAIN_QUEUE
+            self.fs = self.adc.AInScanStart(0, nchan - 1, [gain]*nchan, 0, fs, options, channels=self.chanels)
+        else:
+            # Sin la cola la placa recorre lowchannel..hichannel: se escanea solo el canal configurado
+            self.fs = self.adc.AInScanStart(self.chanel, self.chanel, [gain], 0, fs, options)
+        self.streaming = True
+        return self.fs
+
+    def read_block_crudo(self, n):
+        """read_block_crudo
+        Lee las proximas n muestras de cada canal de la adquisicion continua como codigos de 14 bits, sin convertir a volts.
+
+        Args:
+            n (int): cantidad de muestras por canal
+
+        Returns:
+            numpy array: vector de n codigos int16, o arreglo de (n, canales) si se configuraron varios canales
+        """
+        if not self.streaming:
+            raise RuntimeError("La adquisición por streaming no fue iniciada")
+        nchan = len(self.chanels)
+        n_canal = n
+        n = n*nchan
+
+        # Codigos crudos: primero las muestras que sobraron del ultimo paquete
+        crudos = np.empty(n + self.muestras_paquete, dtype=np.int16)
+        m = min(len(self._resto), n)
+        crudos[:m] = self._resto[:m]
+        self._resto = self._resto[m:]
+
+        while m < n:
+            paquete = np.frombuffer(self.adc.AInScanPacket(), dtype='<i2', count=self.muestras_paquete)
+            crudos[m:m + self.muestras_paquete] = paquete
+            m += self.muestras_paquete
+        if m > n:
+            self._resto = crudos[n:m].copy()
+
+        codigos = np.right_shift(crudos[:n], 2, out=crudos[:n]).reshape(n_canal, nchan)
+        if nchan == 1:
+            return codigos[:, 0]
+        return codigos
+
+    def read_block(self, n):
+        """read_block
+        Lee las proximas n muestras de cada canal de la adquisicion continua.
+
+        Args:
+            n (int): cantidad de muestras por canal
+
+        Returns:
+            numpy array: vector de n muestras en volts, o arreglo de (n, canales) si se configuraron varios canales. Cada columna es una vista de los datos intercalados, sin copias.
+        """
+        v = self.read_block_crudo(n).astype(float)
+        v *= self._slope
+        v += self._intercept
+        return v
+
+    def calibracion(self):
+        """calibracion
+        Devuelve la conversion de codigos a volts de cada canal de la adquisicion en curso, incluyendo la calibracion de fabrica y el rango.
+
+        Returns:
+            tuple: vectores slope e intercept, uno por canal
+        """
+        if not self.streaming:
+            raise RuntimeError("La adquisición por streaming no fue iniciada")
+        return self._slope.copy(), self._intercept.copy()
+
+    def descripcion(self):
+        return {'id': self.identify(), 'serial': self.serial, 'canales': list(self.chanels), 'ganancia': self.gain}
+
+    def stop_stream(self):
+        if self.streaming:
+            self.adc.AInStop()
+            self.streaming = False
+
+    def start_excitacion(self, fr, amplitud, offset=2.048, canal=0, puntos=32):
+        """start_excitacion
+        Genera una senoidal continua en una salida analogica mediante un AOutScan en modo de ejecucion continua.
+
+        Un hilo envia paquetes de 32 muestras con un numero entero de periodos; la placa pide datos a medida que vacia su FIFO, por lo que la frecuencia queda fijada por su reloj.
+
+        Args:
+            fr (float): frecuencia de la senoidal
+            amplitud (float): amplitud en volts
+            offset (float, optional): valor medio en volts (el DAC va de 0 a 4.096 V). Defaults to 2.048.
+            canal (int, optional): salida analogica (0 o 1). Defaults to 0.
+            puntos (int, optional): muestras por periodo, divisor de 32. Defaults to 32.
+
+        Returns:
+            float: frecuencia real de la senoidal
+        """
+        if 32 % puntos != 0:
+            raise ValueError("Las muestras por periodo deben dividir a 32")
+        v = offset + amplitud*np.sin(2*np.pi*np.arange(32)/puntos)
+        if np.any(v < 0) or np.any(v > self.v_ref_dac):
+            raise ValueError(f"La excitacion excede el rango del DAC (0 a {self.v_ref_dac} V)")
+        self.stop_excitacion()
+
+        # Codigos de 12 bits desplazados 4 bits, como en AOut
+        codigos = (np.round(v / self.v_ref_dac * 0xfff).astype(np.uint16) << 4).astype('<u2')
+        paquete = codigos.tobytes()
+
+        fs_salida = fr * puntos
+        self.adc.AOutScan(canal, canal, fs_salida, [], 0)
+
+        detener = threading.Event()
+        def alimentar():
+            while not detener.is_set():
+                self.adc.udev.interruptWrite(libusb1.LIBUSB_ENDPOINT_OUT | 2, paquete, 1000)
+        hilo = threading.Thread(target=alimentar, name="excitacion", daemon=True)
+        self._excitacion = (detener, hilo)
+        hilo.start()
+
+        # Frecuencia real segun el timer de la placa (ver AOutScan)
+        for prescale in range(9):
+            preload = 10.E6/(fs_salida * (1 << prescale))
+            if preload <= 0xffff:
+                break
+        return 10.E6/((1 << prescale) * int(preload)) / puntos
+
+    def stop_excitacion(self):
+        """stop_excitacion
+        Detiene la senoidal generada con start_excitacion.
+        """
+        if self._excitacion is not None:
+            detener, hilo = self._excitacion
+            detener.set()
+            hilo.join()
+            self.adc.AOutStop()
+            self._excitacion = None
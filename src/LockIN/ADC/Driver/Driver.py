@@ -21,6 +21,69 @@ class Driver(ABC):
     def identify(self):
         pass
 
+    def start_stream(self, fs, sync=None):
+        """start_stream
+        Inicia una adquisicion continua temporizada por el reloj del ADC.
+
+        Los drivers que no soportan adquisicion por streaming no necesitan implementarlo.
+
+        Args:
+            fs (float): frecuencia de muestreo pedida
+            sync (str, optional): 'master' o 'slave' para compartir el reloj con otro ADC. Los drivers sin sincronizacion por hardware lo ignoran.
+
+        Returns:
+            float: frecuencia de muestreo real del ADC
+        """
+        raise NotImplementedError("El driver no soporta adquisición por streaming")
+
+    def read_block(self, n):
+        """read_block
+        Lee las proximas n muestras de una adquisicion iniciada con start_stream.
+
+        Args:
+            n (int): cantidad de muestras a leer
+
+        Returns:
+            numpy array: bloque de muestras en volts
+        """
+        raise NotImplementedError("El driver no soporta adquisición por streaming")
+
+    def stop_stream(self):
+        """stop_stream
+        Detiene la adquisicion iniciada con start_stream.
+        """
+        raise NotImplementedError("El driver no soporta adquisición por streaming")
+
+    def read_block_crudo(self, n):
+        """read_block_crudo
+        Lee las proximas n muestras de una adquisicion iniciada con start_stream como codigos crudos del ADC, sin convertir a volts.
+
+        Args:
+            n (int): cantidad de muestras a leer
+
+        Returns:
+            numpy array: bloque de codigos int16. Los volts son codigo*slope + intercept (ver calibracion)
+        """
+        raise NotImplementedError("El driver no soporta lectura de codigos crudos")
+
+    def calibracion(self):
+        """calibracion
+        Devuelve la conversion de codigos crudos a volts de cada canal de la adquisicion en curso.
+
+        Returns:
+            tuple: vectores slope e intercept, uno por canal
+        """
+        raise NotImplementedError("El driver no soporta lectura de codigos crudos")
+
+    def descripcion(self):
+        """descripcion
+        Devuelve los datos del ADC que se guardan junto con una captura.
+
+        Returns:
+            dict: datos del ADC
+        """
+        return {'id': self.identify()}
+
 class InvalidDriverError(Exception):
     """InvalidDriverError
     Excepción para el manejo de errores de Driver no implementado en LockIn
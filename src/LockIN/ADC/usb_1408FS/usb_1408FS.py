@@ -20,7 +20,7 @@ import usb1
 import time
 import sys
 from struct import *
-from mccUSB import *
+from .mccUSB import *
 
 
 class usb_1408FS(mccUSB):
@@ -315,6 +315,42 @@ class usb_1408FS(mccUSB):
 
     """
     
+    nSamples = count
+    self.AInScanStart(lowchannel, hichannel, gains, count, frequency, options)
+    i = 0
+    sdata = [0]*nSamples
+
+    while nSamples > 0:
+      value = unpack('h'*32,self.AInScanPacket(timeout = 1000))
+      if nSamples > 31:
+        for k in range(31):
+          sdata[i+k] = int(value[k]>>2)
+        nSamples -= 31
+      else:
+        for k in range(nSamples):
+          sdata[i+k] = int(value[k]>>2)
+        nSamples = 0
+        break
+      i += 31
+    return sdata
+
+  def AInScanStart(self, lowchannel, hichannel, gains, count, frequency, options, channels=None):
+    """
+    This command loads the gain queue and starts the scan without
+    reading any data, so that the packets can be read afterwards with
+    AInScanPacket.  This is what allows continuous execution mode,
+    where the device keeps sending packets until AInStop is sent.
+
+        channels: optional list of channels for the gain queue.  If
+                  given, the queue is loaded with these channels
+                  instead of lowchannel, lowchannel + 1, ...
+
+    The rest of the parameters are the same as in AInScan.  Returns
+    the real scan frequency set by the device timer,
+    10 MHz/(prescaler*(preload + 1)), with preload rounded to the
+    nearest count.
+    """
+
     request_type = libusb1.LIBUSB_ENDPOINT_OUT | \
                    libusb1.LIBUSB_TYPE_CLASS   | \
                    libusb1.LIBUSB_RECIPIENT_INTERFACE
@@ -329,53 +365,54 @@ class usb_1408FS(mccUSB):
       raise ValueError('AInScan: lowchannel out of range')
       return
 
-    nSamples = count
     count += count%31   # fill up entire scan line
 
+    # The timer period is (preload + 1) counts of 10 MHz/prescaler (see AInScan)
     for prescale in range(9):
-      preload = 10.E6/(frequency * (1 << prescale))
+      preload = int(round(10.E6/(frequency * (1 << prescale)))) - 1
       if preload <= 0xffff:
         break
 
-    if prescale == 9 or preload == 0:
+    if preload > 0xffff or preload <= 0:
       raise ValueError('AInScan: frequency out of range')
       return
 
     # Load the gain queue
     nchan = (hichannel - lowchannel + 1)
-    channels = [0]*8
-    for i in range(nchan):
-      if gains[i] != self.SE_10_00V:
-        channels[i] = lowchannel + i
-      else:
-        # add 8 to channels for Single Ended
-        channels[i] = lowchannel + i + 8
+    if channels != None:
+      nchan = len(channels)
+      channels = list(channels)
+    else:
+      channels = [0]*8
+      for i in range(nchan):
+        if gains[i] != self.SE_10_00V:
+          channels[i] = lowchannel + i
+        else:
+          # add 8 to channels for Single Ended
+          channels[i] = lowchannel + i + 8
     self.ALoadQueue(nchan, channels, gains)
 
     if gains[0] == self.SE_10_00V:
       lowchannel += 8
       hichannel += 8
     buf =  [self.AIN_SCAN, lowchannel, hichannel, count & 0xff, (count>>8) & 0xff, (count>>16) & 0xff, \
-            (count>>24) & 0xff,  prescale, int(preload) & 0xff, (int(preload)>>8) & 0xff, options]
+            (count>>24) & 0xff,  prescale, preload & 0xff, (preload>>8) & 0xff, options]
     ret = self.udev.controlWrite(request_type, request, wValue, wIndex, buf, timeout = 5000)
-    i = 0
-    pipe = 1  # initial endpoint to receive data
-    sdata = [0]*nSamples
+    self.scanPipe = 1  # initial endpoint to receive data
 
-    while nSamples > 0:
-      value = unpack('h'*32,self.udev.interruptRead(libusb1.LIBUSB_ENDPOINT_IN | (pipe+2), 64, timeout = 1000))
-      if nSamples > 31:
-        for k in range(31):
-          sdata[i+k] = int(value[k]>>2)
-        nSamples -= 31
-      else:
-        for k in range(nSamples):
-          sdata[i+k] = int(value[k]>>2)
-        nSamples = 0
-        break
-      i += 31
-      pipe = (pipe%3) + 1   # pip should take on the values 1, 2 or 3
-    return sdata
+    return 10.E6/((1 << prescale) * (preload + 1))
+
+  def AInScanPacket(self, timeout = 1000):
+    """
+    This command reads the next 64 byte packet of a scan started with
+    AInScanStart.  Each packet holds 31 samples as 2's complement
+    signed 16 bit numbers (the 14 bit reading shifted left by 2)
+    followed by a 16 bit packet counter.  The endpoints are cycled in
+    the same order the device uses them.
+    """
+    data = self.udev.interruptRead(libusb1.LIBUSB_ENDPOINT_IN | (self.scanPipe+2), 64, timeout = timeout)
+    self.scanPipe = (self.scanPipe%3) + 1   # pip should take on the values 1, 2 or 3
+    return data
 
   def AInStop(self):
     """
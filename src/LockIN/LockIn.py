@@ -1,25 +1,144 @@
+import asyncio
 import cmath
+import copy
+import math
+import numpy as np
 from .desfasador_shift.desfasador_shift import desfasador_shift
 from .filtro_butter.filtro_butter import IIR_filtter
+from .filtro_butter.caract_filtter import caracterizar
+from .promediador_sincrono.promediador_sincrono import PromediadorSincrono
+from .disenos.disenos import precalcular
+from .nco_pll.nco_pll import NCO_PLL
+from .decimador.decimador import CadenaDecimadora
+from .temporizacion.temporizacion import ajustar_fase
 from .ADC.Driver.Driver import Driver, InvalidDriverError
 import time
 
 
+# Formato de la salida de LockIn.process_block: tiempo, parte real e imaginaria, modulo y fase
+LOCKIN_DTYPE = np.dtype([('t', float), ('x', float), ('y', float), ('r', float), ('theta', float)])
+
+# Tipos de filtro de salida
+TIPOS_FILTRO = ('butter', 'bessel', 'rc', 'sinc')
+
+
 class LockIn():
-    def __init__(self, fr, fs, adc_ref : Driver, adc_med : Driver, sleep = 0.004, orden_filtter=2) -> None:
+    def __init__(self, fr, fs, adc_ref : Driver, adc_med : Driver = None, sleep = 0.004, orden_filtter=2, referencia='shift', decimacion_entrada=None, decimacion_salida=None, tipo_filtro='butter', tau=None, periodos_sinc=1) -> None:
+        """
+        Args:
+            fr (float): Frecuencia de referencia. Con referencia='pll' puede ser None para detectarla en el primer bloque.
+            fs (float): Frecuencia de muestreo.
+            adc_ref (Driver): ADC de la señal de referencia.
+            adc_med (Driver, opcional): ADC de la señal a medir. Si es None, adc_ref debe leer dos canales de la misma placa: el primero es la referencia y el segundo la señal a medir.
+            sleep (float): Espera luego de cada medición con medir(), si no se usa un planificador (ver set_planificador).
+            orden_filtter (int): Orden de los filtros pasa bajos.
+            referencia (str): 'shift' para desfasar la referencia muestreada con desfasador_shift, o 'pll' para usar un NCO enganchado a la referencia (solo con process_block).
+            decimacion_entrada (list, opcional): Etapas de decimación (DecimadorCIC, DecimadorFIR) aplicadas a la referencia y a la señal antes de mezclar. El desfasador y los filtros trabajan a fs dividida por el factor total. Solo con process_block.
+            decimacion_salida (list, opcional): Etapas de decimación aplicadas a x e y luego de los filtros. Solo con process_block.
+            tipo_filtro (str): Filtro de salida: 'butter', 'bessel' (sobrepico mínimo), 'rc' (orden_filtter etapas RC, 6 dB/oct cada una) o 'sinc' (promedio sobre periodos_sinc periodos de la referencia, con ceros en 2fr; orden_filtter es la cantidad de promedios encadenados).
+            tau (float, opcional): Constante de tiempo del filtro en segundos, como en un lock-in comercial: fc = 1/(2*pi*tau). Por defecto fc = fr/10. No se usa con 'sinc'.
+            periodos_sinc (int): Periodos de la referencia que abarca cada promedio del filtro 'sinc'.
+        """
+        if referencia not in ('shift', 'pll'):
+            raise ValueError("La referencia debe ser 'shift' o 'pll'")
+        if tipo_filtro not in TIPOS_FILTRO:
+            raise ValueError(f"El tipo de filtro debe ser uno de {TIPOS_FILTRO}")
+        if tau is not None and (tipo_filtro == 'sinc' or tau <= 0):
+            raise ValueError("tau debe ser positivo y no se usa con el filtro 'sinc'")
+        if fr is None and referencia != 'pll':
+            raise ValueError("La frecuencia de referencia solo se puede detectar con referencia='pll'")
         if not isinstance(adc_ref, Driver):
             raise InvalidDriverError("El ADC de referencia debe ser una subclase de Driver")
-        if not isinstance(adc_med, Driver):
+        if adc_med is not None and not isinstance(adc_med, Driver):
             raise InvalidDriverError("El ADC de medición debe ser una subclase de Driver")
         self.sleep = sleep
+        self.planificador = None
+        self.tabla_filtros = None
         self.adc_ref = adc_ref
         self.adc_med = adc_med
         self.fr = fr
         self.fs = fs
         self.orden_filtter = orden_filtter
-        self.desfasador = desfasador_shift(self.fs, self.fr)
-        self.filtro_1 = IIR_filtter(self.fr/10, self.orden_filtter, self.fs)
-        self.filtro_2 = IIR_filtter(self.fr/10, self.orden_filtter, self.fs)
+        self.tipo_filtro = tipo_filtro
+        self.tau = tau
+        self.periodos_sinc = periodos_sinc
+        self.referencia = referencia
+
+        # Cadenas de decimacion: una copia de las etapas de entrada para cada señal
+        self.dec_ref = self.dec_med = self.dec_salida = None
+        if decimacion_entrada is not None:
+            self.dec_ref = CadenaDecimadora(copy.deepcopy(decimacion_entrada))
+            self.dec_med = CadenaDecimadora(copy.deepcopy(decimacion_entrada))
+        if decimacion_salida is not None:
+            self.dec_salida = CadenaDecimadora(copy.deepcopy(decimacion_salida))
+        self.R_entrada = 1 if self.dec_ref is None else self.dec_ref.R
+        self.R_salida = 1 if self.dec_salida is None else self.dec_salida.R
+
+        self.desfasador = desfasador_shift(self.fs_dsp(), self.fr) if referencia == 'shift' else None
+        self.pll = NCO_PLL(self.fs_dsp(), self.fr) if referencia == 'pll' else None
+        self.filtro = None
+        if self.fr is not None:
+            self._crear_filtros()
+        # tiempo de la proxima muestra a procesar
+        self.t = 0.0
+        # estado de process_block_t: origen de las marcas de tiempo, ultima muestra y proximo punto de la grilla
+        self.reset_temporizacion()
+
+    def _crear_filtros(self) -> None:
+        # Filtro pasa bajos aplicado a x + jy: equivale a dos filtros iguales para la parte real e imaginaria, con un solo estado
+        self.filtro = self._nuevo_filtro(self.fr)
+
+    def _nuevo_filtro(self, fr: float):
+        # Filtro de la configuracion actual para la frecuencia de referencia fr, sin estado previo
+        if self.tipo_filtro == 'sinc':
+            return PromediadorSincrono(fr, self.orden_filtter, self.fs_dsp(), self.periodos_sinc)
+        return IIR_filtter(self._fc(fr), self.orden_filtter, self.fs_dsp(), tipo=self.tipo_filtro)
+
+    def _filtro_para(self, fr: float):
+        # Filtro actual, o uno nuevo para otra frecuencia de referencia sin modificar el del lock-in
+        if fr is None:
+            return self.filtro
+        return self._nuevo_filtro(fr)
+
+    def _fc(self, fr: float) -> float:
+        # Frecuencia de corte de los filtros IIR: la de la constante de tiempo, o fr/10
+        if self.tau is not None:
+            return 1 / (2*math.pi*self.tau)
+        return fr/10
+
+    def fs_dsp(self) -> float:
+        """
+        Frecuencia de muestreo a la que trabajan el desfasador y los filtros (fs dividida por la decimación de entrada).
+
+        Returns:
+            float: Frecuencia de muestreo del mezclador.
+        """
+        return self.fs / self.R_entrada
+
+    def factor_decimacion(self) -> int:
+        """
+        Factor de decimación total entre las muestras de entrada y las de salida.
+
+        Returns:
+            int: Producto de la decimación de entrada y la de salida.
+        """
+        return self.R_entrada * self.R_salida
+
+    def n_salida(self, n: int) -> int:
+        """
+        Cantidad de filas que devolverá el próximo process_block de n muestras. Si n es multiplo de factor_decimacion() son siempre n/factor_decimacion().
+
+        Args:
+            n (int): Muestras de entrada.
+
+        Returns:
+            int: Filas de salida.
+        """
+        if self.dec_ref is not None:
+            n = self.dec_ref.n_salida(n)
+        if self.dec_salida is not None:
+            n = self.dec_salida.n_salida(n)
+        return n
     
     def connect(self) -> None:
         """connect
@@ -28,8 +147,86 @@ class LockIn():
     
         """
         self.adc_ref.connect()
-        self.adc_med.connect()
+        if self.adc_med is not None:
+            self.adc_med.connect()
     
+    def tiempo_asentamiento(self, epsilon: float = 1e-3, fr: float = None) -> float:
+        """
+        Función que predice el tiempo que tarda la salida en asentarse luego de un cambio de la señal o de fr.
+
+        Se calcula a partir de los polos de los filtros, más el llenado del buffer del desfasador y el retardo de las etapas de decimación.
+
+        Args:
+            epsilon (float): Error relativo admitido.
+            fr (float, opcional): Frecuencia de referencia para la que se predice, sin modificar el lock-in. Por defecto la actual.
+
+        Returns:
+            float: Tiempo de asentamiento en segundos.
+        """
+        t = self._t_asentamiento_filtro(epsilon, self._filtro_para(fr))
+        if self.desfasador is not None:
+            desfasador = self.desfasador if fr is None else desfasador_shift(self.fs_dsp(), fr, self.desfasador.nysquit)
+            t += desfasador.chunk_size / self.fs_dsp()
+        for cadena, fs in ((self.dec_ref, self.fs), (self.dec_salida, self.fs_dsp())):
+            if cadena is None:
+                continue
+            for etapa in cadena.etapas:
+                t += (len(getattr(etapa, 'taps', [0])) - 1) / fs
+                fs /= etapa.R
+        return t
+
+    def _t_asentamiento_filtro(self, epsilon: float, filtro) -> float:
+        # Tiempo medido de la tabla de caracterizaciones si la configuracion esta, si no la cota de los polos
+        if self.tabla_filtros is not None and self.tipo_filtro != 'sinc':
+            fila = self.tabla_filtros.buscar(self.tipo_filtro, self.orden_filtter, filtro.fc, self.fs_dsp(), None, epsilon)
+            if fila is not None:
+                return float(fila['t_asentamiento'])
+        return filtro.get_tiempo_asentamiento(epsilon)
+
+    def set_tabla_filtros(self, tabla) -> None:
+        """
+        Función que setea la tabla de caracterizaciones de filtros (ver caract_filtter.TablaFiltros) que se consulta en tiempo_asentamiento y caracteristicas_filtro.
+
+        Args:
+            tabla (TablaFiltros): Tabla de caracterizaciones, o None para no usar ninguna.
+        """
+        self.tabla_filtros = tabla
+
+    def caracteristicas_filtro(self, epsilon: float = 1e-3) -> dict:
+        """
+        Función que devuelve la caracterización del filtro actual: tiempo de asentamiento, sobrepico, rechazo en 2fr, retardo de grupo y ancho de banda equivalente de ruido.
+
+        Se toma de la tabla de caracterizaciones si la configuración está; si no, se calcula y se agrega a la tabla.
+
+        Args:
+            epsilon (float): Error relativo admitido para el tiempo de asentamiento.
+
+        Returns:
+            dict: Campos de CARACT_DTYPE.
+        """
+        if self.tipo_filtro == 'sinc':
+            raise ValueError("La caracterización solo está disponible para los filtros IIR")
+        if self.filtro is None:
+            raise RuntimeError("El filtro todavía no fue creado: falta la frecuencia de referencia")
+        configuracion = (self.tipo_filtro, self.orden_filtter, self.filtro.fc, self.fs_dsp(), self.fr)
+        fila = None if self.tabla_filtros is None else self.tabla_filtros.buscar(*configuracion, epsilon)
+        if fila is None:
+            tipo, orden, fc, fs, fr = configuracion
+            fila = caracterizar((tipo,), (orden,), (fc,), (fs,), frs=(fr,), epsilon=epsilon, procesos=1, tabla=self.tabla_filtros)[0]
+        return dict(zip(fila.dtype.names, fila.tolist()))
+
+    def constante_tiempo(self, fr: float = None) -> float:
+        """
+        Función que devuelve la constante de tiempo de los filtros (la de su polo más lento).
+
+        Args:
+            fr (float, opcional): Frecuencia de referencia para la que se calcula, sin modificar el lock-in. Por defecto la actual.
+
+        Returns:
+            float: Constante de tiempo en segundos.
+        """
+        return self._filtro_para(fr).get_constante_tiempo()
+
     def set_fs(self, fs: float) -> None:
         """
         Función que setea la frecuencia de muestreo.
@@ -38,9 +235,12 @@ class LockIn():
             fs (float): Frecuencia de muestreo.
         """
         self.fs = fs
-        self.desfasador.set_fs(fs)
-        self.filtro_1.set_fs(fs)
-        self.filtro_2.set_fs(fs)
+        if self.desfasador is not None:
+            self.desfasador.set_fs(self.fs_dsp())
+        if self.pll is not None:
+            self.pll.set_fs(self.fs_dsp())
+        if self.filtro is not None:
+            self.filtro.set_fs(self.fs_dsp())
     
     def set_fr(self, fr: float) -> None:
         """
@@ -50,9 +250,44 @@ class LockIn():
             fr (float): Frecuencia de referencia.
         """
         self.fr = fr
-        self.desfasador.set_fr(fr)
-        self.filtro_1.set_fr(fr)
-        self.filtro_2.set_fr(fr)
+        if self.desfasador is not None:
+            self.desfasador.set_fr(fr)
+        if self.pll is not None:
+            self.pll.set_fr(fr)
+        if self.filtro is None:
+            self._crear_filtros()
+        elif self.tipo_filtro == 'sinc':
+            self.filtro.set_fr(fr)
+        else:
+            self.filtro.set_fc(self._fc(fr))
+
+    def set_tau(self, tau: float) -> None:
+        """
+        Función que setea la constante de tiempo de los filtros IIR (fc = 1/(2*pi*tau)).
+
+        Args:
+            tau (float): Constante de tiempo en segundos, o None para volver a fc = fr/10.
+        """
+        if self.tipo_filtro == 'sinc':
+            raise ValueError("El filtro 'sinc' no tiene constante de tiempo, su largo lo fija periodos_sinc")
+        if tau is not None and tau <= 0:
+            raise ValueError("La constante de tiempo debe ser positiva")
+        self.tau = tau
+        if self.filtro is not None:
+            self.filtro.set_fc(self._fc(self.fr))
+
+    def precalcular_filtros(self, frecuencias) -> None:
+        """
+        Función que calcula de antemano, en la cache de diseños del proceso, los filtros de un conjunto de frecuencias de referencia, para que set_fr no llame a scipy durante la medición.
+
+        Args:
+            frecuencias (list): Frecuencias de referencia que se van a usar.
+        """
+        if self.tipo_filtro == 'sinc':
+            # el promediador no tiene coeficientes que diseñar
+            return
+        fs = self.fs_dsp()
+        precalcular((self.tipo_filtro, self.orden_filtter, self._fc(fr) / (fs / 2)) for fr in frecuencias)
 
     def set_orden_filtro(self, orden: int) -> None:
         """
@@ -62,8 +297,8 @@ class LockIn():
             orden (int): Orden del filtro.
         """
         self.orden_filtter = orden
-        self.filtro_1.set_orden(orden)
-        self.filtro_2.set_orden(orden)
+        if self.filtro is not None:
+            self.filtro.set_order(orden)
     
     def medir(self) -> tuple:
         """
@@ -75,14 +310,182 @@ class LockIn():
         Returns:
             tuple: Señal de referencia, señal a medir y señal lock-in.
         """
-        # Señal de referencia
-        ref = self.adc_ref.read()
-        # Señal a medir
-        med = self.adc_med.read()
-        time.sleep(self.sleep)
+        if self.planificador is not None:
+            self.planificador.esperar()
+        if self.adc_med is None:
+            # Ambas señales de la misma placa
+            ref, med = self.adc_ref.read()
+        else:
+            # Señal de referencia
+            ref = self.adc_ref.read()
+            # Señal a medir
+            med = self.adc_med.read()
+        if self.planificador is None:
+            time.sleep(self.sleep)
+
+        return ref, med
+
+    def set_planificador(self, planificador) -> None:
+        """
+        Función que reemplaza el sleep de medir() y medir_t() por la espera de un Planificador, de forma que las lecturas se hacen en instantes absolutos a la frecuencia del planificador.
+
+        Args:
+            planificador (Planificador): Planificador de la adquisición, o None para volver a usar sleep.
+        """
+        self.planificador = planificador
+
+    def actualizar_fs(self, tolerancia: float = 1e-3) -> bool:
+        """
+        Función que pasa a set_fs la frecuencia lograda por el planificador si difiere de fs en más de tolerancia (relativa), para que el desfasador y los filtros usen la frecuencia real. set_fs reinicia el desfasador, por eso no se actualiza ante diferencias menores.
+
+        Args:
+            tolerancia (float): Diferencia relativa a partir de la cual se actualiza fs.
+
+        Returns:
+            bool: True si se actualizó fs.
+        """
+        if self.planificador is None or self.planificador.n < 2:
+            return False
+        fs_real = self.planificador.fs_real()
+        if abs(fs_real/self.fs - 1) <= tolerancia:
+            return False
+        self.set_fs(fs_real)
+        return True
+
+    def medir_t(self) -> tuple:
+        """
+        Función que realiza una medición como medir(), junto con la marca de tiempo monotónica de cada lectura.
+
+        La marca de tiempo es el punto medio de la llamada a read() de cada ADC, medida con time.perf_counter. Si ambas señales se leen de la misma placa tienen la misma marca.
+
+        Returns:
+            tuple: Marca de tiempo y valor de la referencia, marca de tiempo y valor de la señal a medir.
+        """
+        if self.planificador is not None:
+            self.planificador.esperar()
+        if self.adc_med is None:
+            t0 = time.perf_counter()
+            ref, med = self.adc_ref.read()
+            t_ref = t_med = (t0 + time.perf_counter()) / 2
+        else:
+            t0 = time.perf_counter()
+            ref = self.adc_ref.read()
+            t1 = time.perf_counter()
+            med = self.adc_med.read()
+            t_ref, t_med = (t0 + t1) / 2, (t1 + time.perf_counter()) / 2
+        if self.planificador is None:
+            time.sleep(self.sleep)
+
+        return t_ref, ref, t_med, med
+
+    def adquirir_t(self, n_muestras: int) -> tuple:
+        """
+        Función que adquiere n_muestras con medir_t().
+
+        Con un planificador (ver set_planificador), al terminar el bloque se actualiza fs con la frecuencia lograda (ver actualizar_fs).
+
+        Args:
+            n_muestras (int): Cantidad de muestras.
+
+        Returns:
+            tuple: Vectores de marcas de tiempo y valores de la referencia y de la señal a medir (t_ref, ref, t_med, med).
+        """
+        muestras = np.empty((4, n_muestras))
+        for i in range(n_muestras):
+            muestras[:, i] = self.medir_t()
+        self.actualizar_fs()
+        return muestras[0], muestras[1], muestras[2], muestras[3]
+
+    def start_stream(self, fs: float, sincronizar: bool = True) -> float:
+        """
+        Función que inicia la adquisición continua temporizada por el reloj de los ADC, reemplazando a medir() y su sleep.
+
+        La frecuencia de muestreo real que fija el timer de los ADC se usa para el desfasador y los filtros.
+
+        Args:
+            fs (float): Frecuencia de muestreo pedida.
+            sincronizar (bool): Si es True, el ADC de referencia es master del pin SYNC y el de medición slave, de forma que ambos muestrean con el mismo reloj (los pines SYNC deben estar conectados). No se usa si ambas señales se leen de la misma placa.
+
+        Returns:
+            float: Frecuencia de muestreo real.
+        """
+        if self.adc_med is None:
+            # Un solo scan con ambos canales intercalados
+            fs_real = self.adc_ref.start_stream(fs)
+        elif sincronizar:
+            # El slave se inicia primero para que espere los pulsos del master
+            self.adc_med.start_stream(fs, sync='slave')
+            fs_real = self.adc_ref.start_stream(fs, sync='master')
+        else:
+            fs_real = self.adc_ref.start_stream(fs)
+            self.adc_med.start_stream(fs)
+
+        self.set_fs(fs_real)
+        return fs_real
+
+    def stop_stream(self) -> None:
+        """
+        Función que detiene la adquisición continua.
+        """
+        self.adc_ref.stop_stream()
+        if self.adc_med is not None:
+            self.adc_med.stop_stream()
+
+    def medir_bloque(self, n_muestras: int) -> tuple:
+        """
+        Función que lee un bloque de la adquisición continua iniciada con start_stream.
+
+        Args:
+            n_muestras (int): Cantidad de muestras a leer.
+
+        Returns:
+            tuple: Bloques de la señal de referencia y de la señal a medir.
+        """
+        if self.adc_med is None:
+            # Las columnas son vistas del bloque intercalado, sin copias
+            bloque = self.adc_ref.read_block(n_muestras)
+            return bloque[:, 0], bloque[:, 1]
+
+        ref = self.adc_ref.read_block(n_muestras)
+        med = self.adc_med.read_block(n_muestras)
 
         return ref, med
 
+    async def stream(self, block_size: int, fs: float = None):
+        """
+        Generador asincrónico que adquiere en forma continua y devuelve los resultados del lock-in por bloques.
+
+        La lectura bloqueante de los ADC se ejecuta en el executor del event loop, por lo que se pueden esperar varios instrumentos a la vez en un mismo proceso. Al cancelar la tarea o cerrar el generador se espera a que termine la lectura en curso y se detiene el AInScan, ambos fuera del hilo del event loop.
+
+        ```python
+        async for out in lock_in.stream(block_size=500):
+            print(out['t'][-1], out['r'][-1])
+        ```
+
+        Args:
+            block_size (int): Muestras por bloque.
+            fs (float, opcional): Frecuencia de muestreo pedida. Por defecto la actual.
+
+        Yields:
+            numpy array: Arreglo estructurado LOCKIN_DTYPE con los campos t, x, y, r y theta.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.start_stream, self.fs if fs is None else fs)
+        lectura = None
+        try:
+            while True:
+                # La lectura se protege de la cancelacion: el hilo del executor no se puede interrumpir
+                lectura = loop.run_in_executor(None, self.medir_bloque, block_size)
+                ref, med = await asyncio.shield(lectura)
+                lectura = None
+                yield self.process_block(ref, med)
+        finally:
+            # Cancelacion cooperativa: se espera la lectura pendiente, para no usar el USB desde dos hilos, y se
+            # detiene el AInScan en el executor, sin bloquear el event loop
+            if lectura is not None:
+                await asyncio.wait([lectura])
+            await loop.run_in_executor(None, self.stop_stream)
+
     def lock_in(self, ref: float, med: float) -> tuple:
         """
         Función que realiza el lock-in de una señal.
@@ -96,15 +499,163 @@ class LockIn():
         Returns:
             tuple: Señal lock-in.
         """
+        if self.pll is not None:
+            raise RuntimeError("La referencia 'pll' solo se puede usar con process_block")
+        if self.factor_decimacion() > 1:
+            raise RuntimeError("La decimación solo se puede usar con process_block")
+
         # Desfasamiento de la señal de referencia
         ref_desf = self.desfasador.desfasing(ref)
 
         # Obtencion de la parte real e imaginaria de la señal de referencia desfasada
-        real = self.filtro_1.filter(med*ref)
-        imag = self.filtro_2.filter(med*ref_desf)
+        z = self.filtro.filter(complex(med*ref, med*ref_desf))
+
+        self.t += 1/self.fs
 
         # Devuelve modulo y fase de la señal con funcion de cmath
-        return cmath.polar(complex(real, imag))
+        return cmath.polar(z)
+
+    def process_block(self, ref: np.ndarray, med: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Función que realiza el lock-in de un bloque de muestras.
+
+        Es equivalente a llamar a lock_in muestra a muestra (el estado del desfasador y de los filtros se mantiene entre bloques), pero todas las operaciones se realizan de forma vectorizada sobre el bloque.
+
+        Con referencia='pll' la señal se mezcla con el coseno y el seno del NCO enganchado a la referencia, de amplitud unitaria, por lo que la amplitud de la referencia no interviene en r.
+
+        Si hay decimación, el bloque de salida tiene n_salida(len(ref)) filas, a la frecuencia fs/factor_decimacion().
+
+        Args:
+            ref : numpy array
+                Bloque de la señal de referencia.
+            med : numpy array
+                Bloque de la señal a la cual se le realiza el lock-in.
+            out : numpy array, opcional
+                Arreglo estructurado con dtype LOCKIN_DTYPE y largo n_salida(len(ref)) donde se escribe el resultado. Si no se pasa se crea uno nuevo.
+
+        Returns:
+            numpy array: Arreglo estructurado con los campos t, x, y, r y theta.
+        """
+        ref = np.asarray(ref, dtype=float)
+        med = np.asarray(med, dtype=float)
+        if ref.shape != med.shape or ref.ndim != 1:
+            raise ValueError("Los bloques de referencia y medición deben ser vectores del mismo largo")
+
+        n = self.n_salida(len(ref))
+        if out is None:
+            out = np.empty(n, dtype=LOCKIN_DTYPE)
+        elif out.dtype != LOCKIN_DTYPE or len(out) != n:
+            raise ValueError("El arreglo de salida debe tener dtype LOCKIN_DTYPE y el largo del bloque")
+
+        # Decimacion de las señales crudas antes de mezclar
+        if self.dec_ref is not None:
+            ref = self.dec_ref.process_block(ref)
+            med = self.dec_med.process_block(med)
+
+        if self.pll is not None:
+            # Referencia en cuadratura generada por el NCO
+            fase = self.pll.process_block(ref)
+            if self.filtro is None:
+                # fr detectada por el PLL en el primer bloque
+                self.fr = self.pll.f
+                self._crear_filtros()
+            ref = np.cos(fase)
+            ref_desf = np.sin(fase)
+        else:
+            # Desfasamiento de la señal de referencia
+            ref_desf = self.desfasador.desfasing_block(ref)
+
+        # Obtencion de la parte real e imaginaria de la señal de referencia desfasada
+        mezcla = np.empty(len(ref), dtype=complex)
+        np.multiply(med, ref, out=mezcla.real)
+        np.multiply(med, ref_desf, out=mezcla.imag)
+        z = self.filtro.filter_block(mezcla)
+        if self.dec_salida is not None:
+            # Decimacion de x e y juntas como una señal compleja
+            z = self.dec_salida.process_block(z)
+        out['x'] = z.real
+        out['y'] = z.imag
+
+        # Modulo y fase
+        np.hypot(out['x'], out['y'], out=out['r'])
+        np.arctan2(out['y'], out['x'], out=out['theta'])
+
+        # Tiempo de cada muestra
+        fs_salida = self.fs / self.factor_decimacion()
+        np.multiply(np.arange(n), 1/fs_salida, out=out['t'])
+        out['t'] += self.t
+        self.t += n/fs_salida
+
+        return out
+
+    def reset_temporizacion(self) -> None:
+        """
+        Función que descarta el estado de process_block_t, para empezar una adquisición nueva.
+        """
+        self._t_origen = None
+        self._previo = None
+        self._t_grilla = None
+
+    def process_block_t(self, t_ref: np.ndarray, ref: np.ndarray, t_med: np.ndarray, med: np.ndarray, modo: str = 'remuestreo') -> np.ndarray:
+        """
+        Función que realiza el lock-in de un bloque de muestras con marcas de tiempo (ver adquirir_t), corrigiendo el jitter de la adquisición por software y la diferencia de tiempo entre la lectura de la referencia y la de la medición.
+
+        - modo 'remuestreo': ambas señales se interpolan linealmente en una grilla uniforme común de paso 1/fs y se procesan con process_block. La interpolación continúa entre bloques, por lo que la salida tiene una fila por punto de la grilla cubierto por las marcas (su cantidad varía de un bloque a otro).
+        - modo 'fase': se ajusta la fase de la referencia en el bloque a partir de sus marcas de tiempo (ver temporizacion.ajustar_fase) y se mezcla la señal con el coseno y el seno de esa fase, escalados por la amplitud ajustada, evaluados en las marcas de tiempo de la medición (la salida tiene la misma escala que en 'remuestreo' y process_block; r y theta difieren solo en el error de cuadratura del desfasador, que retrasa un número entero de muestras y que en este modo no existe). La salida tiene una fila por muestra y t son las marcas de la medición. No admite decimación.
+
+        Args:
+            t_ref, ref : numpy array
+                Marcas de tiempo (monotónicas, en segundos) y valores de la referencia.
+            t_med, med : numpy array
+                Marcas de tiempo y valores de la señal a medir.
+            modo : str
+                'remuestreo' o 'fase'.
+
+        Returns:
+            numpy array: Arreglo estructurado LOCKIN_DTYPE, vacío si el bloque está vacío.
+        """
+        t_ref, ref, t_med, med = (np.asarray(v, dtype=float) for v in (t_ref, ref, t_med, med))
+        if not (t_ref.shape == ref.shape == t_med.shape == med.shape) or ref.ndim != 1:
+            raise ValueError("Los bloques y sus marcas de tiempo deben ser vectores del mismo largo")
+        if modo not in ('remuestreo', 'fase'):
+            raise ValueError("El modo debe ser 'remuestreo' o 'fase'")
+        if len(ref) == 0:
+            # Bloque vacio: no hay marcas de tiempo, el estado queda como estaba
+            return np.empty(0, dtype=LOCKIN_DTYPE)
+        if self._t_origen is None:
+            self._t_origen = min(t_ref[0], t_med[0])
+
+        if modo == 'fase':
+            if self.factor_decimacion() > 1:
+                raise RuntimeError("El modo 'fase' no admite decimación")
+            if self.fr is None:
+                raise RuntimeError("El modo 'fase' necesita la frecuencia de referencia")
+            # Referencia ajustada (amplitud y fase) en las marcas de tiempo de la medicion: se mezcla con la misma escala
+            # que process_block, que multiplica por la referencia muestreada
+            amplitud, fase0 = ajustar_fase(t_ref - self._t_origen, ref, self.fr)
+            fase = 2*np.pi*self.fr*(t_med - self._t_origen) + fase0
+            out = np.empty(len(med), dtype=LOCKIN_DTYPE)
+            z = self.filtro.filter_block(amplitud*med*np.exp(1j*fase))
+            out['x'] = z.real
+            out['y'] = z.imag
+            np.hypot(out['x'], out['y'], out=out['r'])
+            np.arctan2(out['y'], out['x'], out=out['theta'])
+            out['t'] = t_med - self._t_origen
+            self.t = out['t'][-1] + 1/self.fs
+            return out
+
+        # Se agrega la ultima muestra del bloque anterior para interpolar en la union
+        if self._previo is not None:
+            t_ref, ref, t_med, med = (np.r_[p, v] for p, v in zip(self._previo, (t_ref, ref, t_med, med)))
+        self._previo = (t_ref[-1], ref[-1], t_med[-1], med[-1])
+        if self._t_grilla is None:
+            self._t_grilla = max(t_ref[0], t_med[0])
+
+        # Puntos de la grilla cubiertos por ambas señales
+        n = int(np.floor((min(t_ref[-1], t_med[-1]) - self._t_grilla) * self.fs)) + 1
+        grilla = self._t_grilla + np.arange(max(n, 0)) / self.fs
+        self._t_grilla += max(n, 0) / self.fs
+        return self.process_block(np.interp(grilla, t_ref, ref), np.interp(grilla, t_med, med))
     
 
 # from ADC.ADC_USB1408FS import ADC_USB1408FS
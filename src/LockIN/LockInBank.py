@@ -0,0 +1,168 @@
+import numpy as np
+from scipy import signal
+from .disenos.disenos import disenar
+from .desfasador_shift.desfasador_shift import desfasador_shift
+from .demodulador.demodulador import bank_dtype
+from .ADC.Driver.Driver import Driver, InvalidDriverError
+
+
+class LockInBank():
+    """
+    Banco de lock-ins que comparten una misma referencia.
+
+    Lee de un solo ADC la referencia y N señales a medir intercaladas en un mismo AInScan (el primer canal del ADC es la referencia y el resto las mediciones). La referencia desfasada 90 grados se calcula una sola vez por bloque y todos los canales se filtran juntos con un filtro en secciones de segundo orden (como IIR_filtter, estable con órdenes altos y frecuencias de corte bajas) y un estado (secciones x 2 x canales), por lo que el costo crece con los lotes de NumPy y no con bucles de Python.
+
+    Cada canal da el mismo resultado que un LockIn con la misma referencia.
+
+    Ejemplo de utilizacion
+    ```python
+    adc = ADC_USB1408FS("014447D8", 10, [0, 1, 2, 3])   # canal 0: referencia
+    banco = LockInBank(fr=4, fs=1000, adc=adc)
+    banco.connect()
+    banco.start_stream(1000)
+    ref, med = banco.medir_bloque(500)
+    out = banco.process_block(ref, med)   # out['r'][:, i] es el canal i
+    banco.stop_stream()
+    ```
+    """
+
+    def __init__(self, fr, fs, adc: Driver, orden_filtter=2) -> None:
+        """
+        Args:
+            fr (float): Frecuencia de referencia.
+            fs (float): Frecuencia de muestreo.
+            adc (Driver): ADC con la referencia en el primer canal y las señales a medir en los siguientes.
+            orden_filtter (int): Orden de los filtros pasa bajos.
+        """
+        if not isinstance(adc, Driver):
+            raise InvalidDriverError("El ADC debe ser una subclase de Driver")
+        if not isinstance(orden_filtter, int):
+            raise TypeError("El orden del filtro debe ser un entero")
+        self.adc = adc
+        self.fr = fr
+        self.fs = fs
+        self.orden_filtter = orden_filtter
+        self.desfasador = desfasador_shift(self.fs, self.fr)
+        self.zi = None
+        self._disenar_filtro()
+        self.t = 0.0
+
+    def _disenar_filtro(self) -> None:
+        # Filtro pasa bajos con frecuencia de corte fr/10, igual que en LockIn. Copia escribible de la cache de disenos
+        self.sos = disenar('butter', self.orden_filtter, (self.fr/10) / (self.fs/2), 'sos').copy()
+        self.zi = None
+
+    def connect(self) -> None:
+        """connect
+
+            Funcion que conecta el ADC listo para medir.
+        """
+        self.adc.connect()
+
+    def set_fs(self, fs: float) -> None:
+        """
+        Función que setea la frecuencia de muestreo.
+
+        Args:
+            fs (float): Frecuencia de muestreo.
+        """
+        self.fs = fs
+        self.desfasador.set_fs(fs)
+        self._disenar_filtro()
+
+    def set_fr(self, fr: float) -> None:
+        """
+        Función que setea la frecuencia de referencia.
+
+        Args:
+            fr (float): Frecuencia de referencia.
+        """
+        self.fr = fr
+        self.desfasador.set_fr(fr)
+        self._disenar_filtro()
+
+    def set_orden_filtro(self, orden: int) -> None:
+        """
+        Función que setea el orden de los filtros.
+
+        Args:
+            orden (int): Orden del filtro.
+        """
+        if not isinstance(orden, int):
+            raise TypeError("El orden del filtro debe ser un entero")
+        self.orden_filtter = orden
+        self._disenar_filtro()
+
+    def start_stream(self, fs: float) -> float:
+        """
+        Función que inicia la adquisición continua de todos los canales en un solo AInScan.
+
+        Args:
+            fs (float): Frecuencia de muestreo pedida.
+
+        Returns:
+            float: Frecuencia de muestreo real.
+        """
+        fs_real = self.adc.start_stream(fs)
+        self.set_fs(fs_real)
+        return fs_real
+
+    def stop_stream(self) -> None:
+        """
+        Función que detiene la adquisición continua.
+        """
+        self.adc.stop_stream()
+
+    def medir_bloque(self, n_muestras: int) -> tuple:
+        """
+        Función que lee un bloque de la adquisición continua.
+
+        Args:
+            n_muestras (int): Cantidad de muestras por canal.
+
+        Returns:
+            tuple: Bloque de la referencia y bloque de (n_muestras, canales) de las señales a medir, ambos vistas del bloque intercalado.
+        """
+        bloque = self.adc.read_block(n_muestras)
+        return bloque[:, 0], bloque[:, 1:]
+
+    def process_block(self, ref: np.ndarray, med: np.ndarray) -> np.ndarray:
+        """
+        Función que realiza el lock-in de un bloque de todos los canales.
+
+        Args:
+            ref : numpy array
+                Bloque de la señal de referencia.
+            med : numpy array
+                Bloque de (muestras, canales) de las señales a medir.
+
+        Returns:
+            numpy array: Arreglo estructurado con el tiempo y x, y, r, theta para cada canal.
+        """
+        ref = np.asarray(ref, dtype=float)
+        med = np.asarray(med, dtype=float)
+        if med.ndim == 1:
+            med = med[:, None]
+        if ref.ndim != 1 or med.ndim != 2 or med.shape[0] != len(ref):
+            raise ValueError("La medición debe ser un bloque de (muestras, canales) con el largo de la referencia")
+        n, n_canales = med.shape
+
+        if self.zi is None or self.zi.shape[2] != n_canales:
+            self.zi = np.zeros((len(self.sos), 2, n_canales), dtype=complex)
+
+        # Referencia en cuadratura, calculada una sola vez para todos los canales
+        ref_c = ref + 1j*self.desfasador.desfasing_block(ref)
+
+        # Mezcla y filtrado de todos los canales con un solo sosfilt
+        z = med * ref_c[:, None]
+        z, self.zi = signal.sosfilt(self.sos, z, axis=0, zi=self.zi)
+
+        out = np.empty(n, dtype=bank_dtype(n_canales))
+        out['x'] = z.real
+        out['y'] = z.imag
+        np.abs(z, out=out['r'])
+        np.arctan2(z.imag, z.real, out=out['theta'])
+        out['t'] = self.t + np.arange(n) / self.fs
+        self.t += n / self.fs
+
+        return out
@@ -0,0 +1,161 @@
+import json
+import math
+import os
+import numpy as np
+from ..LockIn import LockIn
+
+
+# Formato de los puntos del barrido
+BARRIDO_DTYPE = np.dtype([('fr', float), ('x', float), ('y', float), ('r', float), ('theta', float),
+                          ('r_std', float), ('t_asentamiento', float), ('t_promedio', float)])
+
+
+class Barrido():
+    """
+    Barrido en frecuencia (diagrama de Bode / analizador de redes) con un LockIn.
+
+    Para cada frecuencia de la lista se cambia fr (y opcionalmente la frecuencia de la excitación), se descarta la salida durante el tiempo de asentamiento que predicen los filtros del lock-in para su orden, fc y fs, y se promedia x e y durante n_constantes constantes de tiempo. Así la duración del barrido sale de los filtros y no de esperas fijas conservadoras.
+
+    Si se indica un archivo de checkpoint, después de cada punto se guardan los resultados, y al crear de nuevo el barrido con el mismo archivo se continua desde el último punto medido.
+
+    Ejemplo de utilizacion
+    ```python
+    barrido = Barrido(lock_in, np.logspace(0, 2, 30), excitacion=lambda f: adc.start_excitacion(f, 1.0), checkpoint="bode.json")
+    print(barrido.duracion_estimada())
+    puntos = barrido.run(fs=5000)
+    adc.stop_excitacion()
+    plt.loglog(puntos['fr'], puntos['r'])
+    ```
+    """
+
+    def __init__(self, lock_in: LockIn, frecuencias, n_constantes: float = 5, epsilon: float = 1e-3, block_size: int = None, excitacion=None, checkpoint: str = None) -> None:
+        """
+        Args:
+            lock_in (LockIn): Lock-in con el que se mide.
+            frecuencias (list): Frecuencias de referencia a medir, en orden.
+            n_constantes (float): Constantes de tiempo de los filtros sobre las que se promedia cada punto.
+            epsilon (float): Error relativo admitido para el tiempo de asentamiento.
+            block_size (int, opcional): Muestras por bloque en la adquisición continua. Por defecto fs/10.
+            excitacion (callable, opcional): Función que recibe la frecuencia y cambia la excitación, por ejemplo ADC_USB1408FS.start_excitacion.
+            checkpoint (str, opcional): Archivo JSON donde se guardan los puntos medidos.
+        """
+        self.lock_in = lock_in
+        self.frecuencias = [float(f) for f in frecuencias]
+        if len(self.frecuencias) == 0:
+            raise ValueError("El barrido debe tener al menos una frecuencia")
+        if n_constantes <= 0:
+            raise ValueError("La cantidad de constantes de tiempo debe ser mayor a cero")
+        self.n_constantes = n_constantes
+        self.epsilon = epsilon
+        self.block_size = block_size
+        self.excitacion = excitacion
+        self.checkpoint = checkpoint
+        self.puntos = []
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self._cargar_checkpoint()
+
+    def _cargar_checkpoint(self) -> None:
+        with open(self.checkpoint) as f:
+            datos = json.load(f)
+        if datos['frecuencias'] != self.frecuencias:
+            raise ValueError("El checkpoint corresponde a otra lista de frecuencias")
+        self.puntos = [tuple(p[campo] for campo in BARRIDO_DTYPE.names) for p in datos['puntos']]
+
+    def _guardar_checkpoint(self) -> None:
+        if self.checkpoint is None:
+            return
+        datos = {
+            'frecuencias': self.frecuencias,
+            'puntos': [dict(zip(BARRIDO_DTYPE.names, p)) for p in self.puntos],
+        }
+        # Se escribe en un archivo temporal y se reemplaza para no dejar un checkpoint a medio escribir
+        tmp = self.checkpoint + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(datos, f)
+        os.replace(tmp, self.checkpoint)
+
+    def _tiempos(self, fr: float) -> tuple:
+        # Tiempo de asentamiento y de promedio para fr, calculados con filtros nuevos sin modificar el lock-in
+        t_asentamiento = self.lock_in.tiempo_asentamiento(self.epsilon, fr)
+        t_promedio = self.n_constantes * self.lock_in.constante_tiempo(fr)
+        return t_asentamiento, t_promedio
+
+    def duracion_estimada(self) -> float:
+        """
+        Duración estimada de los puntos que faltan medir, a partir de los filtros.
+
+        Returns:
+            float: Duración en segundos.
+        """
+        return sum(sum(self._tiempos(f)) for f in self.frecuencias[len(self.puntos):])
+
+    def resultados(self) -> np.ndarray:
+        """
+        Puntos medidos hasta el momento.
+
+        Returns:
+            numpy array: Arreglo estructurado BARRIDO_DTYPE con un punto por frecuencia.
+        """
+        return np.array(self.puntos, dtype=BARRIDO_DTYPE)
+
+    def _procesar(self, n: int) -> np.ndarray:
+        # Adquiere y procesa n muestras, en bloques, devolviendo la salida del lock-in
+        salidas = []
+        while n > 0:
+            m = min(n, self.block_size)
+            if self.streaming:
+                ref, med = self.lock_in.medir_bloque(m)
+                salidas.append(self.lock_in.process_block(ref, med))
+            else:
+                # Adquisicion muestra a muestra con medir() para drivers sin streaming
+                out = np.empty(m, dtype=BARRIDO_DTYPE[['x', 'y']])
+                for i in range(m):
+                    r, theta = self.lock_in.lock_in(*self.lock_in.medir())
+                    out[i] = (r*math.cos(theta), r*math.sin(theta))
+                salidas.append(out)
+            n -= m
+        return np.concatenate(salidas)
+
+    def run(self, fs: float = None) -> np.ndarray:
+        """
+        Mide los puntos que faltan del barrido.
+
+        Args:
+            fs (float, opcional): Frecuencia de muestreo pedida para la adquisición continua. Por defecto la del lock-in.
+
+        Returns:
+            numpy array: Arreglo estructurado BARRIDO_DTYPE con un punto por frecuencia.
+        """
+        try:
+            fs = self.lock_in.start_stream(self.lock_in.fs if fs is None else fs)
+            self.streaming = True
+        except NotImplementedError:
+            fs = self.lock_in.fs
+            self.streaming = False
+        if self.block_size is None:
+            self.block_size = max(1, int(fs / 10))
+
+        # Diseños de los filtros de todos los puntos, antes de empezar a medir
+        self.lock_in.precalcular_filtros(self.frecuencias[len(self.puntos):])
+
+        try:
+            for fr in self.frecuencias[len(self.puntos):]:
+                self.lock_in.set_fr(fr)
+                if self.excitacion is not None:
+                    self.excitacion(fr)
+                t_asentamiento = self.lock_in.tiempo_asentamiento(self.epsilon)
+                t_promedio = self.n_constantes * self.lock_in.constante_tiempo()
+
+                # Se descarta el transitorio y se promedia la salida ya asentada
+                self._procesar(math.ceil(t_asentamiento * fs))
+                out = self._procesar(max(1, math.ceil(t_promedio * fs)))
+                z = np.mean(out['x'] + 1j*out['y'])
+                r_std = float(np.std(np.hypot(out['x'], out['y'])))
+
+                self.puntos.append((fr, z.real, z.imag, abs(z), float(np.angle(z)), r_std, t_asentamiento, t_promedio))
+                self._guardar_checkpoint()
+        finally:
+            if self.streaming:
+                self.lock_in.stop_stream()
+
+        return self.resultados()
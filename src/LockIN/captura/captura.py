@@ -0,0 +1,199 @@
+import json
+import os
+import time
+import numpy as np
+
+
+# Formato del archivo de captura: cabecera de TAMANO_CABECERA bytes (MAGIC seguido de un JSON) y luego los codigos
+# int16 de todos los canales intercalados, una fila por muestra. La cabecera ocupa una pagina para que los datos
+# queden alineados al mapearlos en memoria.
+MAGIC = b'LKINCAP1'
+TAMANO_CABECERA = 4096
+
+
+class EscritorCaptura():
+    """
+    Escritor de capturas de codigos crudos del ADC.
+
+    Los bloques se agregan al final del archivo, sin reescribir datos, por lo que una captura interrumpida conserva todas las muestras escritas. La cantidad de muestras sale del largo del archivo; al cerrar se actualiza t_fin en la cabecera.
+
+    Ejemplo de utilizacion
+    ```python
+    with EscritorCaptura("medicion.cap", fs, slope, intercept, senales=['ref', 'med']) as cap:
+        cap.write(codigos)
+    ```
+    """
+
+    def __init__(self, path: str, fs: float, slope, intercept, senales: list = None, adc: list = None) -> None:
+        """
+        Args:
+            path (str): Archivo de la captura. Si existe se reemplaza.
+            fs (float): Frecuencia de muestreo real.
+            slope (list): Pendiente de la conversión a volts de cada canal (volts = codigo*slope + intercept).
+            intercept (list): Ordenada de la conversión a volts de cada canal.
+            senales (list, opcional): Nombre de la señal de cada canal, por ejemplo ['ref', 'med'].
+            adc (list, opcional): Descripción de los ADC (ver Driver.descripcion).
+        """
+        slope = [float(s) for s in np.atleast_1d(slope)]
+        intercept = [float(i) for i in np.atleast_1d(intercept)]
+        if len(slope) != len(intercept):
+            raise ValueError("slope e intercept deben tener un valor por canal")
+        if senales is not None and len(senales) != len(slope):
+            raise ValueError("Debe haber un nombre de señal por canal")
+
+        self.path = path
+        self.canales = len(slope)
+        self.n_muestras = 0
+        self.cabecera = {
+            'version': 1,
+            'dtype': '<i2',
+            'fs': float(fs),
+            'canales': self.canales,
+            'senales': senales,
+            'slope': slope,
+            'intercept': intercept,
+            'adc': adc,
+            't_inicio': time.time(),
+            't_fin': None,
+        }
+        self._archivo = open(path, 'wb')
+        self._escribir_cabecera()
+
+    def _escribir_cabecera(self) -> None:
+        datos = MAGIC + json.dumps(self.cabecera).encode()
+        if len(datos) > TAMANO_CABECERA:
+            raise ValueError("La cabecera de la captura es demasiado grande")
+        self._archivo.seek(0)
+        self._archivo.write(datos.ljust(TAMANO_CABECERA, b' '))
+        self._archivo.seek(0, os.SEEK_END)
+
+    def write(self, codigos: np.ndarray) -> None:
+        """
+        Agrega un bloque de codigos al final de la captura.
+
+        Args:
+            codigos (numpy array): Bloque int16 de (n, canales), o vector si hay un solo canal.
+        """
+        codigos = np.asarray(codigos)
+        if codigos.dtype != np.int16:
+            raise TypeError("Los codigos deben ser int16")
+        codigos = codigos.reshape(len(codigos), -1)
+        if codigos.shape[1] != self.canales:
+            raise ValueError("El bloque no tiene la cantidad de canales de la captura")
+        self._archivo.write(np.ascontiguousarray(codigos, dtype='<i2').data)
+        self.n_muestras += len(codigos)
+
+    def flush(self) -> None:
+        self._archivo.flush()
+
+    def close(self) -> None:
+        if self._archivo.closed:
+            return
+        self.cabecera['t_fin'] = time.time()
+        self._escribir_cabecera()
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class Captura():
+    """
+    Captura de codigos crudos del ADC abierta como un mapa de memoria.
+
+    `codigos` es un arreglo int16 de (n_muestras, canales) mapeado sobre el archivo: cortarlo no copia datos, por lo que abrir una captura de horas es inmediato.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Archivo de la captura.
+        """
+        with open(path, 'rb') as f:
+            datos = f.read(TAMANO_CABECERA)
+        if len(datos) < TAMANO_CABECERA or not datos.startswith(MAGIC):
+            raise ValueError(f"{path} no es un archivo de captura")
+        self.path = path
+        self.cabecera = json.loads(datos[len(MAGIC):].decode())
+        self.fs = self.cabecera['fs']
+        self.canales = self.cabecera['canales']
+        self.senales = self.cabecera['senales']
+        self.slope = np.array(self.cabecera['slope'])
+        self.intercept = np.array(self.cabecera['intercept'])
+
+        # Solo filas completas, por si la captura se interrumpio en medio de una escritura
+        tamano_fila = 2*self.canales
+        self.n_muestras = (os.path.getsize(path) - TAMANO_CABECERA) // tamano_fila
+        if self.n_muestras > 0:
+            self.codigos = np.memmap(path, dtype=self.cabecera['dtype'], mode='r', offset=TAMANO_CABECERA, shape=(self.n_muestras, self.canales))
+        else:
+            self.codigos = np.empty((0, self.canales), dtype=np.int16)
+
+    def __len__(self) -> int:
+        return self.n_muestras
+
+    def duracion(self) -> float:
+        """
+        Returns:
+            float: Duración de la captura en segundos.
+        """
+        return self.n_muestras / self.fs
+
+    def volts(self, inicio: int = 0, fin: int = None, out: np.ndarray = None) -> np.ndarray:
+        """
+        Convierte a volts un tramo de la captura.
+
+        Args:
+            inicio (int): Primera muestra.
+            fin (int, opcional): Muestra siguiente a la última. Por defecto hasta el final.
+            out (numpy array, opcional): Arreglo float de (fin - inicio, canales) donde se escribe el resultado.
+
+        Returns:
+            numpy array: Tensiones de (fin - inicio, canales).
+        """
+        codigos = self.codigos[inicio:fin]
+        if out is None:
+            out = np.empty(codigos.shape)
+        np.multiply(codigos, self.slope, out=out)
+        out += self.intercept
+        return out
+
+
+def grabar(lock_in, path: str, n_muestras: int, fs: float, block_size: int = None) -> Captura:
+    """
+    Graba los codigos crudos de los ADC de un LockIn en un archivo de captura.
+
+    La adquisición se inicia con LockIn.start_stream, por lo que las placas quedan sincronizadas igual que al medir. Las columnas de la captura son los canales del ADC de referencia seguidos por los del ADC de medición.
+
+    Args:
+        lock_in (LockIn): Lock-in cuyos ADC se graban.
+        path (str): Archivo de la captura.
+        n_muestras (int): Cantidad de muestras por canal a grabar.
+        fs (float): Frecuencia de muestreo pedida.
+        block_size (int, opcional): Muestras por lectura. Por defecto fs/10.
+
+    Returns:
+        Captura: La captura grabada.
+    """
+    adcs = [lock_in.adc_ref] if lock_in.adc_med is None else [lock_in.adc_ref, lock_in.adc_med]
+    fs_real = lock_in.start_stream(fs)
+    if block_size is None:
+        block_size = max(1, int(fs_real / 10))
+    try:
+        calibraciones = [adc.calibracion() for adc in adcs]
+        slope = np.concatenate([np.atleast_1d(c[0]) for c in calibraciones])
+        intercept = np.concatenate([np.atleast_1d(c[1]) for c in calibraciones])
+        senales = ['ref', 'med'] if len(slope) == 2 else None
+        with EscritorCaptura(path, fs_real, slope, intercept, senales=senales, adc=[adc.descripcion() for adc in adcs]) as escritor:
+            restantes = n_muestras
+            while restantes > 0:
+                n = min(block_size, restantes)
+                bloques = [adc.read_block_crudo(n) for adc in adcs]
+                escritor.write(bloques[0] if len(bloques) == 1 else np.column_stack(bloques))
+                restantes -= n
+    finally:
+        lock_in.stop_stream()
+    return Captura(path)
@@ -0,0 +1,163 @@
+import numpy as np
+from scipy import signal
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class DecimadorFIR():
+    """
+    Decimador por un factor entero R con un filtro FIR en forma polifásica.
+
+    Solo se calculan las muestras de salida que se conservan (una de cada R), por lo que el costo es de len(taps)/R productos por muestra de entrada. El historial del filtro y la posición dentro del ciclo de decimación se mantienen entre bloques, de forma que procesar una señal en bloques de cualquier tamaño da el mismo resultado que procesarla entera.
+
+    Acepta señales reales o complejas.
+
+    Ejemplo de utilizacion
+    ```python
+    dec = DecimadorFIR(4)
+    y = np.concatenate([dec.process_block(x[i:i+1000]) for i in range(0, len(x), 1000)])
+    ```
+    """
+
+    def __init__(self, R: int, taps: np.ndarray = None, numtaps: int = None) -> None:
+        """
+        Args:
+            R (int): Factor de decimación.
+            taps (numpy array, opcional): Coeficientes del filtro. Por defecto un filtro antialias diseñado con firwin con corte en 0.8 veces la nueva frecuencia de Nyquist.
+            numtaps (int, opcional): Cantidad de coeficientes del filtro por defecto. Por defecto 8*R+1.
+        """
+        if not isinstance(R, int) or R < 1:
+            raise ValueError("El factor de decimación debe ser un entero positivo")
+        self.R = R
+        if taps is None:
+            numtaps = 8*R + 1 if numtaps is None else numtaps
+            taps = signal.firwin(numtaps, 0.8 / R) if R > 1 else np.ones(1)
+        self.taps = np.asarray(taps)
+        if self.taps.ndim != 1 or len(self.taps) == 0:
+            raise ValueError("Los coeficientes del filtro deben ser un vector no vacío")
+        # coeficientes invertidos para aplicar el filtro como producto escalar sobre cada ventana
+        self._h = self.taps[::-1].copy()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Reinicia el historial del filtro y el ciclo de decimación.
+        """
+        self.historia = np.zeros(len(self.taps) - 1)
+        self.cuenta = 0
+
+    def n_salida(self, n: int) -> int:
+        """
+        Cantidad de muestras que devolverá el próximo process_block de n muestras.
+
+        Args:
+            n (int): Muestras de entrada.
+
+        Returns:
+            int: Muestras de salida.
+        """
+        return (self.cuenta + n - 1) // self.R - (self.cuenta - 1) // self.R
+
+    def process_block(self, x: np.ndarray) -> np.ndarray:
+        """
+        Filtra y decima un bloque.
+
+        Args:
+            x (numpy array): Bloque de entrada.
+
+        Returns:
+            numpy array: Bloque decimado.
+        """
+        x = np.asarray(x)
+        n = len(x)
+        if n == 0:
+            return x[:0]
+
+        ext = np.concatenate((self.historia.astype(x.dtype, copy=False), x))
+
+        # Cada ventana termina en una muestra de entrada; solo se calculan las que se conservan
+        inicio = (-self.cuenta) % self.R
+        ventanas = sliding_window_view(ext, len(self._h))[inicio::self.R]
+        y = ventanas @ self._h
+
+        if len(self._h) > 1:
+            self.historia = ext[-(len(self._h) - 1):].copy()
+        self.cuenta = (self.cuenta + n) % self.R
+
+        return y
+
+
+class DecimadorCIC(DecimadorFIR):
+    """
+    Decimador CIC (cascaded integrator-comb) de N etapas y factor R.
+
+    La respuesta de un CIC es la de N promediadores móviles de largo R en cascada. Se implementa en su forma no recursiva (el FIR equivalente, normalizado a ganancia unitaria en continua) sobre el motor polifásico de DecimadorFIR, porque los integradores en punto flotante acumulan error en mediciones largas. No necesita multiplicaciones por coeficientes de diseño y sus ceros caen exactamente en los multiplos de fs/R, por lo que es adecuado como primera etapa cuando fs es mucho mayor que fr.
+    """
+
+    def __init__(self, R: int, N: int = 3) -> None:
+        """
+        Args:
+            R (int): Factor de decimación.
+            N (int): Cantidad de etapas.
+        """
+        if not isinstance(N, int) or N < 1:
+            raise ValueError("La cantidad de etapas debe ser un entero positivo")
+        if not isinstance(R, int) or R < 1:
+            raise ValueError("El factor de decimación debe ser un entero positivo")
+        self.N = N
+        taps = np.ones(1)
+        for _ in range(N):
+            taps = np.convolve(taps, np.ones(R))
+        super().__init__(R, taps / R**N)
+
+
+class CadenaDecimadora():
+    """
+    Cadena de etapas de decimación aplicadas en serie (por ejemplo un CIC seguido de un FIR).
+
+    El factor total R es el producto de los factores de cada etapa.
+    """
+
+    def __init__(self, etapas) -> None:
+        """
+        Args:
+            etapas (list): Etapas de decimación (DecimadorFIR, DecimadorCIC o cualquier objeto con R, process_block, n_salida y reset).
+        """
+        if not isinstance(etapas, (list, tuple)):
+            etapas = [etapas]
+        self.etapas = list(etapas)
+        self.R = int(np.prod([etapa.R for etapa in self.etapas]))
+
+    def reset(self) -> None:
+        """
+        Reinicia todas las etapas.
+        """
+        for etapa in self.etapas:
+            etapa.reset()
+
+    def n_salida(self, n: int) -> int:
+        """
+        Cantidad de muestras que devolverá el próximo process_block de n muestras.
+
+        Args:
+            n (int): Muestras de entrada.
+
+        Returns:
+            int: Muestras de salida.
+        """
+        for etapa in self.etapas:
+            n = etapa.n_salida(n)
+        return n
+
+    def process_block(self, x: np.ndarray) -> np.ndarray:
+        """
+        Aplica todas las etapas a un bloque.
+
+        Args:
+            x (numpy array): Bloque de entrada.
+
+        Returns:
+            numpy array: Bloque decimado por R.
+        """
+        for etapa in self.etapas:
+            x = etapa.process_block(x)
+        return x
@@ -0,0 +1,128 @@
+import numpy as np
+from scipy import signal
+from ..disenos.disenos import disenar
+
+
+def bank_dtype(n_frecuencias: int) -> np.dtype:
+    """
+    Formato de la salida de DemodulatorBank.process_block: un tiempo por muestra y x, y, r, theta por frecuencia.
+
+    Args:
+        n_frecuencias (int): Cantidad de frecuencias demoduladas.
+
+    Returns:
+        numpy dtype: dtype estructurado con los campos t, x, y, r y theta.
+    """
+    forma = (n_frecuencias,)
+    return np.dtype([('t', float), ('x', float, forma), ('y', float, forma), ('r', float, forma), ('theta', float, forma)])
+
+
+class DemodulatorBank():
+    """
+    Banco de demoduladores que demodula una señal a varias frecuencias en una sola pasada vectorizada por bloque.
+
+    Las referencias son fasores unitarios exp(-j*fase) de cada frecuencia, calculados como una sola matriz (muestras x frecuencias). La señal se multiplica por la matriz y el resultado complejo se filtra con un único filtro Butterworth en secciones de segundo orden (como IIR_filtter, estable con órdenes altos y frecuencias de corte bajas) cuyo estado es un arreglo (secciones x 2 x frecuencias), por lo que agregar frecuencias solo agrega columnas a las mismas operaciones de NumPy.
+
+    Para una señal A*cos(2*pi*f*t + phi), la salida r de la frecuencia f es A y theta es phi, medida respecto de cos(fase de la referencia).
+
+    Las frecuencias se pueden dar en Hz o como armonicos de una fundamental fr. En el segundo caso, la fase de la fundamental se puede pasar en cada bloque (por ejemplo la de un PLL que sigue la referencia medida) y las fases de los armonicos son multiplos de ella.
+
+    Ejemplo de utilizacion
+    ```python
+    banco = DemodulatorBank(fs=10000, fr=100, armonicos=[1, 2, 3])
+    out = banco.process_block(med)
+    r_2f = out['r'][:, 1]
+    ```
+    """
+
+    def __init__(self, fs: float, frecuencias=None, fr: float = None, armonicos=None, orden_filtter: int = 2, fc: float = None) -> None:
+        """
+        Args:
+            fs (float): Frecuencia de muestreo.
+            frecuencias (list, opcional): Frecuencias a demodular en Hz.
+            fr (float, opcional): Frecuencia fundamental, si se usan armonicos.
+            armonicos (list, opcional): Armonicos de fr a demodular (1 es la fundamental).
+            orden_filtter (int): Orden del filtro pasa bajos.
+            fc (float, opcional): Frecuencia de corte del filtro. Por defecto un decimo de la menor frecuencia demodulada.
+        """
+        if fs <= 0:
+            raise ValueError("La frecuencia de muestreo debe ser mayor a cero")
+        if (frecuencias is None) == (armonicos is None):
+            raise ValueError("Se deben indicar las frecuencias o los armonicos, pero no ambos")
+        if armonicos is not None:
+            if fr is None or fr <= 0:
+                raise ValueError("La frecuencia de referencia debe ser mayor a cero")
+            self.armonicos = np.asarray(armonicos, dtype=float)
+            frecuencias = fr * self.armonicos
+        else:
+            self.armonicos = None
+        self.fr = fr
+        self.frecuencias = np.asarray(frecuencias, dtype=float)
+        if self.frecuencias.ndim != 1 or len(self.frecuencias) == 0 or np.any(self.frecuencias <= 0):
+            raise ValueError("Las frecuencias a demodular deben ser mayores a cero")
+        if np.any(self.frecuencias >= fs / 2):
+            raise ValueError("Las frecuencias a demodular deben ser menores a fs/2")
+        if not isinstance(orden_filtter, int):
+            raise TypeError("El orden del filtro debe ser un entero")
+
+        self.fs = fs
+        self.orden_filtter = orden_filtter
+        self.fc = np.min(self.frecuencias) / 10 if fc is None else fc
+        self.dtype = bank_dtype(len(self.frecuencias))
+        # copia escribible de las secciones de la cache de disenos (ver disenos.CacheDisenos)
+        self.sos = disenar('butter', self.orden_filtter, self.fc / (self.fs / 2), 'sos').copy()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Reinicia la fase de las referencias, el estado de los filtros y el tiempo.
+        """
+        self.fase = np.zeros(len(self.frecuencias))
+        self.zi = np.zeros((len(self.sos), 2, len(self.frecuencias)), dtype=complex)
+        self.t = 0.0
+
+    def process_block(self, med: np.ndarray, fase: np.ndarray = None) -> np.ndarray:
+        """
+        Demodula un bloque de la señal a todas las frecuencias del banco.
+
+        Args:
+            med (numpy array): Bloque de la señal a medir.
+            fase (numpy array, opcional): Fase en radianes de la fundamental en cada muestra. Solo si el banco se definio por armonicos; si no se pasa, las fases se acumulan internamente a partir de las frecuencias.
+
+        Returns:
+            numpy array: Arreglo estructurado con el tiempo y x, y, r, theta para cada frecuencia (una columna por frecuencia).
+        """
+        med = np.asarray(med, dtype=float)
+        if med.ndim != 1:
+            raise ValueError("El bloque de medición debe ser un vector")
+        n = len(med)
+
+        # Matriz de fases (muestras x frecuencias)
+        if fase is not None:
+            if self.armonicos is None:
+                raise ValueError("La fase externa solo se puede usar con armonicos")
+            fase = np.asarray(fase, dtype=float)
+            if fase.shape != med.shape:
+                raise ValueError("La fase debe tener el mismo largo que el bloque")
+            fases = np.multiply.outer(fase, self.armonicos)
+        else:
+            w = 2 * np.pi * self.frecuencias / self.fs
+            fases = np.multiply.outer(np.arange(n), w)
+            fases += self.fase
+            self.fase = (self.fase + w * n) % (2 * np.pi)
+
+        # Mezcla con los fasores de referencia y filtrado de todas las frecuencias con un solo sosfilt
+        z = np.exp(-1j * fases)
+        z *= med[:, None]
+        z, self.zi = signal.sosfilt(self.sos, z, axis=0, zi=self.zi)
+        z *= 2
+
+        out = np.empty(n, dtype=self.dtype)
+        out['x'] = z.real
+        out['y'] = z.imag
+        np.abs(z, out=out['r'])
+        np.arctan2(z.imag, z.real, out=out['theta'])
+        out['t'] = self.t + np.arange(n) / self.fs
+        self.t += n / self.fs
+
+        return out
@@ -63,9 +63,11 @@ class desfasador_shift():
         """
         if nysquit < 2:
             raise ValueError("La cantidad de muestras de desfasaje debe ser al menos 2")
+        if fr <= 0:
+            raise ValueError("La frecuencia de referencia debe ser mayor a cero")
         self.nysquit = nysquit
+        self.fr = fr
         self.set_fs(fs)
-        self.set_fr(fr)
 
     def set_fr(self, fr):
         """
@@ -77,7 +79,11 @@ class desfasador_shift():
         """
         if fr <= 0:
             raise ValueError("La frecuencia de referencia debe ser mayor a cero")
+        if self.fs < self.nysquit * fr:
+            raise ValueError(f"La frecuencia de muestreo debe ser al menos {self.nysquit} veces mayor a la frecuencia de referencia")
         self.fr = fr
+        self._reset_buffer()
+
     def set_fs(self, fs):
         """
         Función que setea la frecuencia de muestreo.
@@ -91,6 +97,12 @@ class desfasador_shift():
         if fs < self.nysquit * self.fr:
             raise ValueError(f"La frecuencia de muestreo debe ser al menos {self.nysquit} veces mayor a la frecuencia de referencia")
         self.fs = fs
+        self._reset_buffer()
+
+    def _reset_buffer(self):
+        """
+        Recalcula el desfasaje y reinicia el buffer para los valores actuales de fs y fr.
+        """
         self.shift = int(self.fs/self.fr/4)
         self.chunk_size = int(self.fs/self.fr/2)
         self.x_buffer = np.zeros(self.chunk_size)
@@ -116,3 +128,31 @@ class desfasador_shift():
 
         # Devolver la muestra desfasada en 90 grados
         return self.x_buffer[-self.shift]
+
+    def desfasing_block(self, x: np.ndarray) -> np.ndarray:
+        """
+        Función que realiza el desfasamiento de un bloque de muestras.
+
+        Equivale a llamar a desfasing muestra a muestra: el buffer se mantiene entre bloques, por lo que se pueden intercalar llamadas a desfasing y desfasing_block.
+
+        Args:
+            x: numpy array
+                Bloque de muestras de la señal a procesar.
+
+        Returns:
+            numpy array
+                Bloque de muestras desfasadas en 90 grados.
+        """
+        x = np.asarray(x, dtype=float)
+
+        # Historia del buffer seguida del bloque nuevo
+        ext = np.concatenate((self.x_buffer, x))
+
+        # La muestra desfasada es la que se encuentra shift-1 posiciones antes de la ultima
+        inicio = self.chunk_size - self.shift + 1
+        out = ext[inicio:inicio + len(x)]
+
+        # Actualizar buffer con las ultimas muestras
+        self.x_buffer = ext[-self.chunk_size:].copy()
+
+        return out
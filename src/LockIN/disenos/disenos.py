@@ -0,0 +1,175 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from scipy import signal
+
+
+def disenar_rc(orden: int, wn: float, output: str = 'ba'):
+    """
+    Diseña una cascada de orden etapas RC de primer orden iguales (pendiente de 6 dB/oct por etapa), como el filtro de salida de un lock-in comercial.
+
+    Cada etapa es y[n] = y[n-1] + (1 - p)*(x[n] - y[n-1]), con p = exp(-1/(tau*fs)), la respuesta al impulso muestreada de un RC. La frecuencia de corte es la de cada etapa, fc = 1/(2*pi*tau), por lo que 1/(tau*fs) = pi*wn; la de -3 dB de la cascada es menor.
+
+    Args:
+        orden (int): Cantidad de etapas; la pendiente es 6*orden dB/oct (los lock-in comerciales ofrecen 1 a 4 etapas).
+        wn (float): Frecuencia de corte de cada etapa normalizada a fs/2.
+        output (str): 'ba', 'zpk' o 'sos', como en scipy.signal.
+
+    Returns:
+        Coeficientes del filtro en la forma pedida.
+    """
+    if orden < 1:
+        raise ValueError("El orden del filtro debe ser positivo")
+    if wn <= 0:
+        raise ValueError("La frecuencia de corte debe ser positiva")
+    polo = np.exp(-np.pi*wn)
+    z, p, k = np.zeros(orden), np.full(orden, polo), (1 - polo)**orden
+    if output == 'zpk':
+        return z, p, k
+    if output == 'sos':
+        return signal.zpk2sos(z, p, k)
+    if output == 'ba':
+        return signal.zpk2tf(z, p, k)
+    raise ValueError(f"Forma de los coeficientes no soportada: {output}")
+
+
+# Funciones de diseño de cada tipo de filtro pasa bajos: (orden, wn, output) -> coeficientes
+DISENADORES = {
+    'butter': lambda orden, wn, output: signal.butter(orden, wn, 'low', output=output),
+    'bessel': lambda orden, wn, output: signal.bessel(orden, wn, 'low', output=output, norm='mag'),
+    'rc': disenar_rc,
+}
+
+
+class CacheDisenos():
+    """
+    Cache LRU acotada de diseños de filtros, con clave (tipo, orden, wn, output).
+
+    Un diseño ya calculado se devuelve sin volver a llamar a scipy.signal, por lo que cambiar fs, fc u orden a una configuración conocida cuesta microsegundos. Los arreglos devueltos se comparten entre todos los filtros que usan el mismo diseño y son de solo lectura. scipy.signal.sosfilt no acepta secciones de solo lectura con entradas reales, por lo que quien las usa para filtrar guarda una copia. Cuando se supera la capacidad se descarta el diseño usado hace más tiempo.
+    """
+
+    def __init__(self, capacidad: int = 1024) -> None:
+        """
+        Args:
+            capacidad (int): Cantidad máxima de diseños guardados.
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad de la cache debe ser positiva")
+        self.capacidad = capacidad
+        self.disenos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.lock = threading.Lock()
+
+    def disenar(self, tipo: str, orden: int, wn: float, output: str = 'ba'):
+        """
+        Devuelve el diseño pedido, calculándolo solo si no está en la cache.
+
+        Args:
+            tipo (str): Tipo de filtro, una clave de DISENADORES ('butter', 'bessel' o 'rc').
+            orden (int): Orden del filtro.
+            wn (float): Frecuencia de corte normalizada a fs/2.
+            output (str): 'ba', 'zpk' o 'sos', como en scipy.signal.
+
+        Returns:
+            Coeficientes del filtro en la forma pedida, de solo lectura.
+        """
+        clave = (tipo, int(orden), float(wn), output)
+        with self.lock:
+            diseno = self.disenos.get(clave)
+            if diseno is not None:
+                self.disenos.move_to_end(clave)
+                self.aciertos += 1
+                return diseno
+            self.fallos += 1
+
+        if tipo not in DISENADORES:
+            raise ValueError(f"Tipo de filtro no soportado: {tipo}")
+        diseno = DISENADORES[tipo](int(orden), float(wn), output)
+        diseno = _solo_lectura(diseno)
+
+        with self.lock:
+            self.disenos[clave] = diseno
+            self.disenos.move_to_end(clave)
+            while len(self.disenos) > self.capacidad:
+                self.disenos.popitem(last=False)
+        return diseno
+
+    def precalcular(self, configuraciones, outputs=('sos', 'zpk')) -> None:
+        """
+        Calcula de antemano los diseños de un barrido, para que cambiar de configuración durante la medición no llame a scipy.signal.
+
+        Args:
+            configuraciones (iterable): Tuplas (tipo, orden, wn).
+            outputs (tuple): Formas de los coeficientes a calcular para cada configuración.
+        """
+        for tipo, orden, wn in configuraciones:
+            for output in outputs:
+                self.disenar(tipo, orden, wn, output)
+
+    def estadisticas(self) -> dict:
+        """
+        Returns:
+            dict: Aciertos, fallos, tasa de aciertos, diseños guardados y capacidad.
+        """
+        with self.lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+                'disenos': len(self.disenos),
+                'capacidad': self.capacidad,
+            }
+
+    def limpiar(self) -> None:
+        """
+        Descarta todos los diseños y reinicia las estadísticas.
+        """
+        with self.lock:
+            self.disenos.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+
+def _solo_lectura(diseno):
+    # Los arreglos de la cache se comparten entre filtros: se marcan de solo lectura para que nadie los modifique
+    if isinstance(diseno, tuple):
+        return tuple(_solo_lectura(d) for d in diseno)
+    if isinstance(diseno, np.ndarray):
+        diseno.setflags(write=False)
+    return diseno
+
+
+# Cache compartida por todos los filtros del proceso
+CACHE = CacheDisenos()
+
+
+def disenar(tipo: str, orden: int, wn: float, output: str = 'ba'):
+    """
+    Diseña un filtro pasa bajos usando la cache del proceso.
+
+    Args:
+        tipo (str): 'butter', 'bessel' (normalizado para que fc sea la frecuencia de -3 dB) o 'rc' (cascada de etapas RC, ver disenar_rc).
+        orden (int): Orden del filtro.
+        wn (float): Frecuencia de corte normalizada a fs/2.
+        output (str): 'ba', 'zpk' o 'sos', como en scipy.signal.
+
+    Returns:
+        Coeficientes del filtro en la forma pedida, de solo lectura.
+    """
+    return CACHE.disenar(tipo, orden, wn, output)
+
+
+def precalcular(configuraciones, outputs=('sos', 'zpk')) -> None:
+    """
+    Calcula de antemano en la cache del proceso los diseños de las configuraciones (tipo, orden, wn).
+    """
+    CACHE.precalcular(configuraciones, outputs)
+
+
+def estadisticas() -> dict:
+    """
+    Devuelve las estadísticas de la cache del proceso.
+    """
+    return CACHE.estadisticas()
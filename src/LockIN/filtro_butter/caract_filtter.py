@@ -1,122 +1,280 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.cm as cm
-from filtro_butter import IIR_filtter
-import time
+from .filtro_butter import IIRFilterBank
+from ..disenos.disenos import DISENADORES
 
-plt.style.use(['science', 'notebook', 'grid'])
 
-# probar el filtro
+# Formato de la caracterizacion, una fila por configuracion (tipo, orden, fc, fs, fr, epsilon)
+CARACT_DTYPE = np.dtype([('tipo', 'U8'), ('orden', int), ('fc', float), ('fs', float), ('fr', float), ('epsilon', float),
+                         ('t_asentamiento', float), ('sobrepico', float), ('rechazo_2f', float), ('retardo_grupo', float), ('enbw', float)])
+
+
+def respuesta_escalon(tipo, ordenes, fcs, fs, n):
+    """
+    Respuesta al escalon de varios filtros de un mismo tipo y fs, filtrados juntos con IIRFilterBank.
+
+    Args:
+        tipo (str): 'butter', 'bessel' o 'rc'.
+        ordenes (int o array): Orden de cada filtro.
+        fcs (float o array): Frecuencia de corte de cada filtro.
+        fs (float): Frecuencia de muestreo.
+        n (int): Cantidad de muestras.
+
+    Returns:
+        numpy array: Arreglo de (n, N) con la respuesta de cada filtro.
+    """
+    return IIRFilterBank(fcs, ordenes, fs, tipo=tipo).filter_block(np.ones(n))
+
+
+def _transferencia(sos, w):
+    # H(e^jw) de cada filtro del banco: sos de (N, S, 6) y w de (N,) en radianes por muestra
+    z1 = np.exp(-1j*np.asarray(w, dtype=float))[:, None]
+    z2 = z1*z1
+    num = sos[..., 0] + sos[..., 1]*z1 + sos[..., 2]*z2
+    den = sos[..., 3] + sos[..., 4]*z1 + sos[..., 5]*z2
+    return np.prod(num/den, axis=1)
+
+
+def _retardo_grupo_dc(sos):
+    # Retardo de grupo en w = 0, en muestras: cada polinomio sum(c_m z^-m) aporta sum(m*c_m)/sum(c_m)
+    m = np.array([0, 1, 2])
+    b, a = sos[..., :3], sos[..., 3:]
+    return np.sum(b @ m / b.sum(-1) - a @ m / a.sum(-1), axis=1)
+
+
+def _evaluar(args) -> np.ndarray:
+    tipo, fs, configuraciones, epsilon = args
+    ordenes = [c[0] for c in configuraciones]
+    fcs = [c[1] for c in configuraciones]
+    frs = np.array([c[2] for c in configuraciones])
+    banco = IIRFilterBank(fcs, ordenes, fs, tipo=tipo)
+
+    # La cota de los polos alcanza para que todas las respuestas se asienten; se simula el doble para el ancho de banda de ruido
+    cota = np.max(banco.get_tiempo_asentamiento(epsilon))
+    n = 2*int(np.ceil(cota*fs)) + 16
+    y = banco.filter_block(np.ones(n))
+    ganancia = _transferencia(banco.sos, np.zeros(len(banco))).real
+
+    # Primer instante desde el que la respuesta queda dentro de la banda: uno despues de la ultima muestra fuera
+    fuera = np.abs(y - ganancia) >= epsilon*np.abs(ganancia)
+    ultima = n - 1 - np.argmax(fuera[::-1], axis=0)
+    muestras = np.where(fuera.any(axis=0), ultima + 1, 0)
+
+    filas = np.zeros(len(configuraciones), dtype=CARACT_DTYPE)
+    filas['tipo'], filas['orden'], filas['fc'], filas['fs'], filas['fr'], filas['epsilon'] = tipo, ordenes, fcs, fs, frs, epsilon
+    filas['t_asentamiento'] = muestras / fs
+    filas['sobrepico'] = np.maximum(np.max(y, axis=0)/ganancia - 1, 0)
+    h2f = _transferencia(banco.sos, 2*np.pi*2*frs/fs)
+    filas['rechazo_2f'] = -20*np.log10(np.abs(h2f/ganancia))
+    filas['retardo_grupo'] = _retardo_grupo_dc(banco.sos) / fs
+    # ENBW = fs/2 * sum(h^2) / sum(h)^2, con la respuesta al impulso como diferencia de la respuesta al escalon
+    h = np.diff(y, axis=0, prepend=0)
+    filas['enbw'] = fs/2 * np.sum(h*h, axis=0) / y[-1]**2
+    return filas
+
+
+def _clave(tipo, orden, fc, fs, fr, epsilon) -> tuple:
+    # Los valores reales se redondean a 12 cifras para que fr/10*10 y fr coincidan. Sin fr la clave sirve para todo lo que no depende de fr
+    return (str(tipo), int(orden)) + tuple(None if v is None else float(f'{v:.12g}') for v in (fc, fs, fr, epsilon))
+
+
+class TablaFiltros():
+    """
+    Tabla de caracterizaciones de filtros guardada en disco (.npy con CARACT_DTYPE), para consultar en tiempo de ejecución sin volver a simular.
+
+    Ejemplo de utilizacion
+    ```python
+    tabla = TablaFiltros("filtros.npy")
+    caracterizar(('butter', 'rc'), range(1, 5), np.linspace(0.1, 2, 20), [1000], tabla=tabla)
+    lock_in.set_tabla_filtros(tabla)
+    ```
+    """
+
+    def __init__(self, path: str = None) -> None:
+        """
+        Args:
+            path (str, opcional): Archivo de la tabla. Si existe se carga. Sin path la tabla solo vive en memoria.
+        """
+        self.path = path
+        if path is not None and os.path.exists(path):
+            self.filas = np.load(path)
+            if self.filas.dtype != CARACT_DTYPE:
+                raise ValueError(f"{path} no es una tabla de caracterizacion de filtros")
+        else:
+            self.filas = np.zeros(0, dtype=CARACT_DTYPE)
+        self._indexar()
+
+    def _indexar(self) -> None:
+        self.indice = {}
+        for i, (tipo, orden, fc, fs, fr, epsilon) in enumerate(self.filas[['tipo', 'orden', 'fc', 'fs', 'fr', 'epsilon']].tolist()):
+            self.indice[_clave(tipo, orden, fc, fs, fr, epsilon)] = i
+            self.indice[_clave(tipo, orden, fc, fs, None, epsilon)] = i
+
+    def __len__(self) -> int:
+        return len(self.filas)
+
+    def buscar(self, tipo: str, orden: int, fc: float, fs: float, fr: float = None, epsilon: float = 1e-3):
+        """
+        Busca una configuración en la tabla.
+
+        Args:
+            fr (float, opcional): Frecuencia de referencia. Si es None se acepta cualquiera, cuando solo interesan los valores que no dependen de fr (todos salvo rechazo_2f).
+
+        Returns:
+            numpy void: Fila CARACT_DTYPE, o None si la configuración no está.
+        """
+        i = self.indice.get(_clave(tipo, orden, fc, fs, fr, epsilon))
+        return None if i is None else self.filas[i]
+
+    def agregar(self, filas: np.ndarray) -> None:
+        """
+        Agrega filas a la tabla, reemplazando las configuraciones repetidas.
+
+        Args:
+            filas (numpy array): Arreglo CARACT_DTYPE.
+        """
+        claves = [_clave(*f) for f in self.filas[['tipo', 'orden', 'fc', 'fs', 'fr', 'epsilon']].tolist()]
+        nuevas = {_clave(*f) for f in filas[['tipo', 'orden', 'fc', 'fs', 'fr', 'epsilon']].tolist()}
+        viejas = [i for i, c in enumerate(claves) if c not in nuevas]
+        self.filas = np.concatenate((self.filas[viejas], filas.astype(CARACT_DTYPE)))
+        self._indexar()
+
+    def guardar(self, path: str = None) -> None:
+        """
+        Guarda la tabla en disco, escribiendo un archivo temporal y reemplazándolo para no dejar una tabla a medio escribir.
+
+        Args:
+            path (str, opcional): Archivo de destino. Por defecto el de la tabla.
+        """
+        path = self.path if path is None else path
+        if path is None:
+            raise ValueError("La tabla no tiene archivo")
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, self.filas)
+        os.replace(tmp, path)
+
+
+def caracterizar(tipos=('butter',), ordenes=(1, 2, 3, 4), fcs=(1.0,), fss=(1000,), frs=None, epsilon=1e-3, procesos=None, tabla=None, columnas=32) -> np.ndarray:
+    """
+    Caracteriza todas las combinaciones de tipo, orden, frecuencia de corte, frecuencia de muestreo y frecuencia de referencia.
+
+    Las configuraciones con el mismo tipo y fs se filtran juntas con IIRFilterBank, en grupos de hasta columnas filtros, y los grupos se reparten en un pool de procesos. Por configuración se informa:
+
+    - t_asentamiento: primer instante desde el que la respuesta al escalón queda a menos de epsilon (relativo) de su valor final, medido sobre la respuesta simulada.
+    - sobrepico: máximo de la respuesta al escalón relativo al valor final, menos 1.
+    - rechazo_2f: atenuación en 2fr en dB.
+    - retardo_grupo: retardo de grupo en continua, en segundos.
+    - enbw: ancho de banda equivalente de ruido en Hz.
+
+    Args:
+        tipos (list): Tipos de filtro: 'butter', 'bessel' o 'rc'.
+        ordenes (list): Órdenes de los filtros.
+        fcs (list): Frecuencias de corte.
+        fss (list): Frecuencias de muestreo.
+        frs (list, opcional): Frecuencias de referencia para rechazo_2f. Por defecto fr = 10*fc, como en LockIn.
+        epsilon (float): Error relativo admitido para el tiempo de asentamiento.
+        procesos (int, opcional): Procesos del pool. Por defecto la cantidad de CPUs; con 1 se calcula en este proceso.
+        tabla (TablaFiltros, opcional): Tabla de la que se toman las configuraciones ya calculadas y donde se agregan las nuevas. Si tiene archivo, se guarda.
+        columnas (int): Filtros por grupo, para acotar la memoria de las respuestas simuladas.
+
+    Returns:
+        numpy array: Arreglo CARACT_DTYPE con una fila por configuración, en el orden de itertools.product(tipos, ordenes, fcs, fss, frs).
+    """
+    for tipo in tipos:
+        if tipo not in DISENADORES:
+            raise ValueError(f"Tipo de filtro no soportado: {tipo}")
+    configuraciones = []
+    for tipo, orden, fc, fs in itertools.product(tipos, ordenes, fcs, fss):
+        for fr in ([10*fc] if frs is None else frs):
+            configuraciones.append((tipo, int(orden), float(fc), float(fs), float(fr)))
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+
+    # Configuraciones que faltan en la tabla, agrupadas por tipo y fs
+    grupos = {}
+    for tipo, orden, fc, fs, fr in configuraciones:
+        if tabla is None or tabla.buscar(tipo, orden, fc, fs, fr, epsilon) is None:
+            grupos.setdefault((tipo, fs), {})[(orden, fc, fr)] = None
+    tareas = []
+    for (tipo, fs), faltantes in grupos.items():
+        faltantes = list(faltantes)
+        for i in range(0, len(faltantes), columnas):
+            tareas.append((tipo, fs, faltantes[i:i + columnas], epsilon))
+
+    if procesos == 1 or len(tareas) <= 1:
+        resultados = [_evaluar(t) for t in tareas]
+    else:
+        with ProcessPoolExecutor(min(procesos, len(tareas))) as pool:
+            resultados = list(pool.map(_evaluar, tareas))
+
+    nuevas = TablaFiltros()
+    if resultados:
+        nuevas.agregar(np.concatenate(resultados))
+    if tabla is not None and len(nuevas):
+        tabla.agregar(nuevas.filas)
+        if tabla.path is not None:
+            tabla.guardar()
+
+    # Se vuelve al orden de las configuraciones
+    out = np.empty(len(configuraciones), dtype=CARACT_DTYPE)
+    for i, c in enumerate(configuraciones):
+        fila = nuevas.buscar(*c, epsilon)
+        out[i] = fila if fila is not None else tabla.buscar(*c, epsilon)
+    return out
+
+
+def graficar(caract: np.ndarray, path: str) -> None:
+    """
+    Guarda un grafico del tiempo de asentamiento en funcion de fc, con una curva por tipo, orden y fs.
+
+    Args:
+        caract (numpy array): Arreglo CARACT_DTYPE.
+        path (str): Archivo de la imagen.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    for tipo, orden, fs in sorted(set(caract[['tipo', 'orden', 'fs']].tolist())):
+        filas = caract[(caract['tipo'] == tipo) & (caract['orden'] == orden) & (caract['fs'] == fs)]
+        filas = filas[np.argsort(filas['fc'])]
+        ax.plot(filas['fc'], filas['t_asentamiento'], 'o-', label=f'{tipo} orden {orden}, fs={fs:g} Hz')
+    ax.set_xlabel('f. corte [Hz]')
+    ax.set_ylabel('t. asentamiento [s]')
+    ax.grid()
+    ax.legend()
+    fig.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+# Caracterizacion por linea de comandos (desde src/: python -m LockIN.filtro_butter.caract_filtter)
 def main():
-    b = False #True si queres ver los diagramas de Bode
-
-    # Crear señal de prueba
-    Fs = 150
-    t = np.arange(0, 40, 1 / (Fs))
-    step = np.ones(len(t))
-
-    f_max = 15
-
-    # Filtros de distintos ordenes y distintas frecuencias de corte
-    filtro_1 = [IIR_filtter(orden=1, fc=i, fs=Fs) for i in range(1, f_max,)]
-    filtro_2 = [IIR_filtter(orden=2, fc=i, fs=Fs) for i in range(1, f_max)]
-    filtro_3 = [IIR_filtter(orden=3, fc=i, fs=Fs) for i in range(1, f_max)]
-    filtro_4 = [IIR_filtter(orden=4, fc=i, fs=Fs) for i in range(1, f_max)]
-
-    # inicializar vectores de salida
-    filtered_signal_1 = np.zeros((len(filtro_1), len(t)))
-    filtered_signal_2 = np.zeros((len(filtro_2), len(t)))
-    filtered_signal_3 = np.zeros((len(filtro_3), len(t)))
-    filtered_signal_4 = np.zeros((len(filtro_4), len(t)))
-
-    # filtrado de seniales
-    for n in range(len(step)):
-        for i in range(len(filtro_1)):
-            filtered_signal_1[i][n] = filtro_1[i].filter(step[n])
-            filtered_signal_2[i][n] = filtro_2[i].filter(step[n])
-            filtered_signal_3[i][n] = filtro_3[i].filter(step[n])
-            filtered_signal_4[i][n] = filtro_4[i].filter(step[n])
-    
-    # Busqueda de tiempo caracteristico (tiempo en el que el riple es menor que el e)
-    e = 0.0001    #defino el epsilon del valor 'estable'
-    t1, t2, t3, t4 = np.zeros(len(filtro_1)), np.zeros(len(filtro_2)), np.zeros(len(filtro_3)), np.zeros(len(filtro_4))
-
-    # calcular la derivada de las seniales
-    num_filas = filtered_signal_1.shape[0]  # Obtener el número de filas en la matriz
-    derivada_1 = np.zeros_like(filtered_signal_1) # Crear una matriz vacía del mismo tamaño que filtered_signal_1
-    derivada_2 = np.zeros_like(filtered_signal_2)
-    derivada_3 = np.zeros_like(filtered_signal_3)
-    derivada_4 = np.zeros_like(filtered_signal_4)
-
-    for i in range(num_filas):
-        derivada_1[i,:] = np.gradient(filtered_signal_1[i,:], t)
-        derivada_2[i,:] = np.gradient(filtered_signal_2[i,:], t)
-        derivada_3[i,:] = np.gradient(filtered_signal_3[i,:], t)
-        derivada_4[i,:] = np.gradient(filtered_signal_4[i,:], t)
-    
-    # Buscar el tiempo caracteristico
-    for i in range(len(filtro_1)):
-        for n in range(len(t)):
-            if(abs(filtered_signal_1[i][n] - 1) < e):
-                if (abs(derivada_1[i][n]) < e):
-                    t1[i] = t[n]
-                    break
-        for n in range(len(t)):
-            if(abs(filtered_signal_2[i][n] - 1) < e):
-                if (abs(derivada_2[i][n]) < e):
-                    t2[i] = t[n]
-                    break
-        for n in range(len(t)):
-            if(abs(filtered_signal_3[i][n] - 1) < e):
-                if (abs(derivada_3[i][n]) < e):
-                    t3[i] = t[n]
-                    break
-        for n in range(len(t)):
-            if(abs(filtered_signal_4[i][n] - 1) < e):
-                if (abs(derivada_4[i][n]) < e):
-                    t4[i] = t[n]
-                    break
-    
-    #imprimir el valor de los tiempos caracteristicos:
-    print("t1: ", t1)
-    print("t2: ", t2)
-    print("t3: ", t3)
-    print("t4: ", t4)
-
-    #hacer un grafico en 3D del orden, frecuencia y tiempo caracteristico con matplot
-    # Crear una malla 2D para X e Y
-    X, Y = np.meshgrid(range(1, f_max), [1, 2, 3, 4])
-    # Usar Z para definir la altura de cada punto en la trama
-    Z = np.array([t1, t2, t3, t4])
-
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-    #hace el plot 3D en formato de una superficie continua
-    ax.plot_surface(Y, X, Z, cmap='coolwarm')
-    ax.set_xlabel('Orden')
-    ax.set_ylabel('Frecuencia de corte')
-    ax.set_zlabel('Tiempo caracteristico')
-
-    #creamos curvas de nivel para los deferentes ordenes
-    plt.figure()
-    # print(Z[0][])
-    cm = plt.cm.get_cmap('viridis')
-    plt.plot(np.arange(1, f_max, 1), Z[0], 'o', color=cm(1/4), label='Orden 1')
-    plt.plot(np.arange(1, f_max, 1), Z[0], color=cm(1/4))
-    plt.plot(np.arange(1, f_max, 1), Z[1], 'D', color=cm(2/4), label='Orden 2')
-    plt.plot(np.arange(1, f_max, 1), Z[1], color=cm(2/4))
-    plt.plot(np.arange(1, f_max, 1), Z[2], '^', color=cm(3/4), label='Orden 3')
-    plt.plot(np.arange(1, f_max, 1), Z[2], color=cm(3/4))
-    plt.plot(np.arange(1, f_max, 1), Z[3], 's', color=cm(4/4), label='Orden 4')
-    plt.plot(np.arange(1, f_max, 1), Z[3], color=cm(4/4))
-
-    plt.legend(fontsize = 14)
-    plt.xlabel('f. corte [Hz]')
-    plt.ylabel('t. carac. [s]')
-    plt.savefig('Lock in/caractec filtro.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    parser = argparse.ArgumentParser(description="Caracterizacion de los filtros pasa bajos del Lock-In")
+    parser.add_argument('--tipos', nargs='+', default=['butter'], help="tipos de filtro: butter, bessel, rc")
+    parser.add_argument('--ordenes', nargs='+', type=int, default=[1, 2, 3, 4])
+    parser.add_argument('--fc', nargs='+', type=float, default=list(range(1, 15)), help="frecuencias de corte en Hz")
+    parser.add_argument('--fs', nargs='+', type=float, default=[150], help="frecuencias de muestreo en Hz")
+    parser.add_argument('--epsilon', type=float, default=1e-4, help="error relativo del tiempo de asentamiento")
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--tabla', default=None, help="archivo .npy de la tabla de caracterizaciones")
+    parser.add_argument('--grafico', default=None, help="archivo donde guardar el grafico")
+    args = parser.parse_args()
+
+    tabla = None if args.tabla is None else TablaFiltros(args.tabla)
+    caract = caracterizar(args.tipos, args.ordenes, args.fc, args.fs, epsilon=args.epsilon, procesos=args.procesos, tabla=tabla)
+
+    print(f"{'tipo':8s} {'orden':>5s} {'fc':>8s} {'fs':>8s} {'t_asent':>9s} {'sobrepico':>9s} {'rech_2f':>8s} {'retardo':>9s} {'enbw':>8s}")
+    for f in caract:
+        print(f"{f['tipo']:8s} {f['orden']:5d} {f['fc']:8.3g} {f['fs']:8.4g} {f['t_asentamiento']:9.4g} {f['sobrepico']:9.3g} "
+              f"{f['rechazo_2f']:8.3g} {f['retardo_grupo']:9.3g} {f['enbw']:8.3g}")
+    if args.grafico is not None:
+        graficar(caract, args.grafico)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,17 +1,104 @@
+import cmath
 import numpy as np
 from scipy import signal
 import matplotlib.pyplot as plt
+from ..disenos.disenos import disenar, DISENADORES
+
+def tiempo_asentamiento(z, p, k, fs, epsilon=1e-3):
+    """tiempo_asentamiento
+        Calcula el tiempo que tarda la respuesta al escalon de un filtro en quedar a menos de epsilon (relativo) de su valor final.
+
+        Se usa la expansion en fracciones simples de H(z) a partir de sus ceros y polos: el error de la respuesta al escalon es una suma de terminos c_k*p_k^n, y se busca el primer n en que la suma de los modulos |c_k|*|p_k|^n es menor que epsilon, por lo que el resultado es una cota superior sin necesidad de simular el filtro. Se parte de la forma zpk porque las raices del polinomio a son poco precisas para ordenes altos y frecuencias de corte bajas.
+
+        Con polos repetidos (cascada de etapas RC) no hay expansion en fracciones simples y se simula la respuesta al escalon.
+    Args:
+        z (array): ceros del filtro
+        p (array): polos del filtro
+        k (float): ganancia del filtro
+        fs (float): frecuencia de muestreo
+        epsilon (float): error relativo admitido
+
+    Returns:
+        float: tiempo de asentamiento en segundos
+    """
+    z = np.asarray(z, dtype=complex)
+    p = np.asarray(p, dtype=complex)
+    if len(p) == 0:
+        return 0.0
+    if np.max(np.abs(p)) >= 1:
+        return np.inf
+    ganancia = abs(k * np.prod(1 - z) / np.prod(1 - p))
+    if len(np.unique(np.round(p, 12))) < len(p):
+        return _tiempo_asentamiento_simulado(signal.zpk2sos(z, p, k), ganancia, fs, epsilon)
+    c = np.zeros(len(p))
+    for i, pk in enumerate(p):
+        if pk == 0:
+            continue
+        # residuo de H(z) en el polo pk, en la forma r/(1 - pk z^-1)
+        otros = np.delete(p, i)
+        rk = k * np.prod(1 - z/pk) / np.prod(1 - otros/pk) * pk**(len(p) - len(z))
+        c[i] = abs(rk * pk / (1 - pk)) / ganancia
+    rho = np.abs(p)
+    activos = (c > 0) & (rho > 0)
+    if not np.any(activos):
+        return 0.0
+    c, rho = c[activos], rho[activos]
+
+    # Cota con cada termino menor que epsilon/len(p), y busqueda binaria del primer n con sum(c*rho^n) < epsilon
+    alto = int(np.ceil(max(0.0, np.max(np.log(epsilon / (len(c) * c)) / np.log(rho)))))
+    bajo = 0
+    while bajo < alto:
+        medio = (bajo + alto) // 2
+        if np.sum(c * rho**medio) < epsilon:
+            alto = medio
+        else:
+            bajo = medio + 1
+    return alto / fs
+
+
+def _tiempo_asentamiento_simulado(sos, ganancia, fs, epsilon):
+    # Simula la respuesta al escalon, duplicando el largo hasta que la ultima muestra fuera de la banda quede en la primera mitad
+    largo = 1024
+    while True:
+        y = signal.sosfilt(sos, np.ones(largo))
+        fuera = np.flatnonzero(np.abs(y - ganancia) >= epsilon*ganancia)
+        if len(fuera) == 0:
+            return 0.0
+        if fuera[-1] < largo // 2:
+            return (fuera[-1] + 1) / fs
+        largo *= 2
+
+
+def constante_tiempo(p, fs):
+    """constante_tiempo
+        Calcula la constante de tiempo del polo mas lento del filtro.
+    Args:
+        p (array): polos del filtro
+        fs (float): frecuencia de muestreo
+
+    Returns:
+        float: constante de tiempo en segundos
+    """
+    if len(p) == 0:
+        return 0.0
+    rho = np.max(np.abs(p))
+    if rho >= 1:
+        return np.inf
+    return -1 / (fs * np.log(rho))
+
 
 class IIR_filtter():
     """IRR_filtter:
-        Clase que implementa un filtro IIR de Butterworth.
+        Clase que implementa un filtro IIR pasa bajos: Butterworth, Bessel (sobrepico minimo) o una cascada de etapas RC (6 dB/oct por etapa, como un lock-in comercial).
 
-        Permite la realizacion de un filtro de butterworth de orden n y frecuencia de corte fc por medio de la ecuacion de un filtro IIR:
+        Permite la realizacion de un filtro de orden n y frecuencia de corte fc por medio de la ecuacion de un filtro IIR:
 
         y[n] = b[0] * x[n] + b[1] * x[n-1] + ... + b[n] * x[n-n] - a[1] * y[n-1] - ... - a[n] * y[n-n]
 
         Donde b y a son los coeficientes del filtro y x[n] es la señal de entrada y y[n] la señal de salida. Esto permite filtrar la señal a medida que se obtiene de alguna fuente externa, como puede ser la medición de un instrumento, lo que permite realizar el filtrado en tiempo real.
 
+        La ecuacion se implementa como una cascada de secciones de segundo orden (sos) en forma directa II transpuesta, que a diferencia de los coeficientes b y a sigue siendo estable para ordenes altos y frecuencias de corte muy bajas. filter procesa una muestra y filter_block un bloque; ambos comparten el estado, por lo que se pueden intercalar.
+
         ```python
         # probar el filtro
         import numpy as np
@@ -45,13 +132,14 @@ class IIR_filtter():
         plt.show()
         ```
     """
-    def __init__(self, fc, orden, fs):
+    def __init__(self, fc, orden, fs, tipo='butter'):
         """__init__
 
         Args:
-            fc (float): frecuencia de corte del filtro
-            orden (int): orden del filtro
+            fc (float): frecuencia de corte del filtro. Para 'rc' es la de cada etapa, 1/(2*pi*tau)
+            orden (int): orden del filtro (cantidad de etapas para 'rc')
             fs (float): frecuencia de muestreo
+            tipo (str): 'butter', 'bessel' o 'rc'
         """
         # Chequeo de argumentos
         if not isinstance(orden, int):
@@ -60,17 +148,40 @@ class IIR_filtter():
             raise TypeError("La frecuencia de corte del filtro debe ser un numero")
         if not isinstance(fs, float) and not isinstance(fs, int):
             raise TypeError("La frecuencia de muestreo del filtro debe ser un numero")
+        if tipo not in DISENADORES:
+            raise ValueError(f"Tipo de filtro no soportado: {tipo}")
 
         # Parametros del filtro
+        self.tipo = tipo
         self.fc = fc
         self.orden = orden
         self.fs = fs
         self.wn = fc / (fs / 2)
-        self.b, self.a = signal.butter(orden, self.wn, 'low')
-        self.chunk_size = orden + 1
-        # ventana de señales
-        self.x_buffer = np.zeros(self.chunk_size)
-        self.y_buffer = np.zeros(self.chunk_size)
+        self._disenar()
+        self.reset()
+
+    def _disenar(self):
+        # Coeficientes en secciones de segundo orden, de la cache de diseños (b y a se calculan solo al consultarlos). Se copian porque sosfilt no acepta coeficientes de solo lectura con entradas reales
+        self.sos = disenar(self.tipo, self.orden, self.wn, 'sos').copy()
+        # coeficientes de cada seccion como floats de Python para el camino muestra a muestra
+        self._secciones = [(b0, b1, b2, a1, a2) for b0, b1, b2, _, a1, a2 in self.sos.tolist()]
+
+    @property
+    def b(self):
+        # coeficientes b equivalentes a las secciones, solo para consulta
+        return signal.sos2tf(self.sos)[0]
+
+    @property
+    def a(self):
+        # coeficientes a equivalentes a las secciones, solo para consulta
+        return signal.sos2tf(self.sos)[1]
+
+    def reset(self):
+        """reset
+            Reinicia el estado del filtro (salida nula sin entradas previas)
+        """
+        # estado [z1, z2] de cada seccion, compartido por filter y filter_block
+        self.z = [[0.0, 0.0] for _ in self._secciones]
     
     def set_order(self, orden):
         """set_order
@@ -83,11 +194,8 @@ class IIR_filtter():
             raise TypeError("El orden del filtro debe ser un entero")
 
         self.orden = orden
-        self.b, self.a = signal.butter(orden, self.wn, 'low')
-        self.chunk_size = orden + 1
-        # ventana de señales
-        self.x_buffer = np.zeros(self.chunk_size)
-        self.y_buffer = np.zeros(self.chunk_size)
+        self._disenar()
+        self.reset()
 
     def set_fs(self, fs):
         """set_fs
@@ -101,7 +209,7 @@ class IIR_filtter():
 
         self.fs = fs
         self.wn = self.fc / (fs / 2)
-        self.b, self.a = signal.butter(self.orden, self.wn, 'low')
+        self._disenar()
 
     def set_fc(self, fc):
         """set_fc
@@ -115,7 +223,7 @@ class IIR_filtter():
 
         self.fc = fc
         self.wn = fc / (self.fs / 2)
-        self.b, self.a = signal.butter(self.orden, self.wn, 'low')
+        self._disenar()
     def get_order(self):
         """get_order
             Devuelve el orden del filtro
@@ -152,50 +260,95 @@ class IIR_filtter():
         """
         return self.a
     
+    def get_tiempo_asentamiento(self, epsilon=1e-3):
+        """get_tiempo_asentamiento
+            Devuelve el tiempo que tarda la respuesta al escalon en quedar a menos de epsilon de su valor final
+        Args:
+            epsilon (float): error relativo admitido
+
+        Returns:
+            float: tiempo de asentamiento en segundos
+        """
+        z, p, k = disenar(self.tipo, self.orden, self.wn, 'zpk')
+        return tiempo_asentamiento(z, p, k, self.fs, epsilon)
+    def get_constante_tiempo(self):
+        """get_constante_tiempo
+            Devuelve la constante de tiempo del polo mas lento del filtro
+        Returns:
+            float: constante de tiempo en segundos
+        """
+        z, p, k = disenar(self.tipo, self.orden, self.wn, 'zpk')
+        return constante_tiempo(p, self.fs)
+    
     def filter(self, x):
         """filter
-            Aplica y[n]= b[0]x[n]+b[1]x[n-1]+ ... +b[N]x[n-N]-a[1]y[n-1]-a[2]y[n-2]- ... -a[M]y[n-M] (1)
+            Aplica la ecuacion (1) a una muestra, seccion por seccion:
+
+            y = b0*x + z1;  z1 = b1*x - a1*y + z2;  z2 = b2*x - a2*y
+
+            Opera solo con numeros de Python, sin crear arreglos de NumPy. Acepta muestras complejas, que equivalen a filtrar la parte real y la imaginaria con dos filtros iguales; luego de una muestra compleja el estado queda complejo.
         Args:
-            x (float): muestra a filtrar
+            x (float o complex): muestra a filtrar
 
         Returns:
-            float: muestra filtrada
+            float o complex: muestra filtrada
         """
-        # Chequeo de argumentos
-        if not isinstance(x, float) and not isinstance(x, int):
-            raise TypeError("La muestra a filtrar debe ser un numero")
-        
-        # Actualizo la ventana de señales
-        self.x_buffer[:-1] = self.x_buffer[1:]
-        self.x_buffer[-1] = x
-        self.y_buffer[:-1] = self.y_buffer[1:]
-
-        # Actualizo la salida utilizando los valores nuevos de entrada y antigua de salida
-        y_out = 0
-        for i in range(self.chunk_size):
-            y_out += self.b[i] * self.x_buffer[self.chunk_size - i - 1]
-        for i in range(1, self.chunk_size):
-            y_out -= self.a[i] * self.y_buffer[self.chunk_size - i - 1]
-
-        if np.isinf(y_out):
+        if type(x) is not complex:
+            x = complex(x) if isinstance(x, np.complexfloating) else float(x)
+        for (b0, b1, b2, a1, a2), z in zip(self._secciones, self.z):
+            y = b0*x + z[0]
+            z[0] = b1*x - a1*y + z[1]
+            z[1] = b2*x - a2*y
+            x = y
+
+        if not cmath.isfinite(x):
+            self._error_no_finito(x)
+        return x
+
+    def filter_block(self, x):
+        """filter_block
+            Aplica la ecuacion (1) a un bloque de muestras de una sola vez con signal.sosfilt.
+
+            El estado del filtro es el mismo que usa filter, por lo que el resultado es identico (salvo redondeo) a filtrar muestra a muestra y se pueden intercalar llamadas a filter y filter_block. La salida se verifica una sola vez por bloque.
+        Args:
+            x (numpy array): bloque de muestras a filtrar, real o complejo
+
+        Returns:
+            numpy array: bloque de muestras filtradas
+        """
+        x = np.asarray(x)
+        if not np.iscomplexobj(x):
+            x = x.astype(float, copy=False)
+        if x.ndim != 1:
+            raise TypeError("El bloque a filtrar debe ser un vector")
+        if len(x) == 0:
+            return np.zeros(0)
+
+        y_out, zf = signal.sosfilt(self.sos, x, zi=np.array(self.z))
+
+        # Una sola verificacion por bloque: la suma es finita si y solo si todas las muestras lo son (salvo desborde)
+        if not cmath.isfinite(y_out.sum()) and not np.all(np.isfinite(y_out)):
+            self._error_no_finito(y_out[~np.isfinite(y_out)][0])
+        self.z = zf.tolist()
+
+        return y_out
+
+    def _error_no_finito(self, y):
+        if cmath.isinf(y):
             raise ValueError("La salida del filtro es infinita")
-        if np.isnan(y_out):
-            raise ValueError("La salida del filtro es NaN")
-        # Actualizo señal actual para la siguiente iteracion
-        self.y_buffer[-1] = y_out
+        raise ValueError("La salida del filtro es NaN")
 
-        return self.y_buffer[-1]
     def bode(self):
         """bode
             Grafica la respuesta en frecuencia del filtro, tanto en modulo como en fase
         """
 
-        w, h = signal.freqz(self.b, self.a)
+        w, h = signal.sosfreqz(self.sos)
         fig, (ax1, ax2) = plt.subplots(2, 1, sharex=True)
         plt.subplots_adjust(hspace=0.5)
 
         ax1.semilogx((self.fs * 0.5 / np.pi) * w, 20 * np.log10(abs(h)))
-        ax1.set_title('Diagrama de Bode de un filtro pasa bajos Butterworth')
+        ax1.set_title(f'Diagrama de Bode del filtro pasa bajos ({self.tipo}, orden {self.orden})')
         ax1.set_ylabel('Magnitud (dB)')
         ax1.grid()
 
@@ -203,3 +356,359 @@ class IIR_filtter():
         ax2.set_xlabel('Frecuencia (Hz)')
         ax2.set_ylabel('Fase (grados)')
         ax2.grid()
+
+
+class IIRFilterBank():
+    """IIRFilterBank:
+        Banco de N filtros pasa bajos de un mismo tipo (ver IIR_filtter), del mismo o de distinto orden y frecuencia de corte, que avanzan juntos.
+
+        Los coeficientes de los N filtros se apilan en secciones de segundo orden: los filtros de orden menor se completan con secciones identidad, de forma que todos tienen la misma cantidad de secciones S y el estado es un unico arreglo contiguo z de (N, S, 2), el de cada filtro igual al zi de signal.sosfilt. Aplanado, ese estado es el de la forma de espacio de estados de la cascada: filter avanza una muestra de los N filtros con un producto matriz-vector por filtro, y filter_block filtra un bloque por tramos con productos de matrices sobre todos los filtros a la vez (o con signal.sosfilt si son pocos filtros). Ambos comparten el estado, como en IIR_filtter.
+
+        Conviene para muchos filtros (barridos de orden y frecuencia de corte, caracterizacion); para uno o dos filtros muestra a muestra IIR_filtter es mas rapido, porque no paga el costo de crear arreglos de NumPy en cada muestra.
+
+        ```python
+        # respuesta al escalon de 4 filtros de orden 1 a 4 con fc = 5 Hz
+        banco = IIRFilterBank(5, [1, 2, 3, 4], 1000)
+        y = banco.filter_block(np.ones(2000))     # arreglo de (2000, 4)
+        ```
+    """
+    # muestras por tramo de filter_block: tramos mas largos hacen menos iteraciones en Python pero mas cuentas por muestra
+    LARGO_TRAMO = 32
+    # tramos cuyo estado inicial se calcula con un producto de matrices, sin recorrerlos en Python
+    TRAMOS_POR_TROZO = 8
+    # tramos que entran en cada producto de la salida, para que los arreglos intermedios quepan en la cache
+    TRAMOS_POR_PRODUCTO = 64
+    # hasta esta cantidad de filas filter_block usa signal.sosfilt en lugar de los tramos
+    FILAS_SOSFILT = 4
+
+    def __init__(self, fc, orden, fs, tipo='butter'):
+        """__init__
+
+        Args:
+            fc (float o array): frecuencia de corte de cada filtro
+            orden (int o array): orden de cada filtro
+            fs (float): frecuencia de muestreo, comun a todos los filtros
+            tipo (str): 'butter', 'bessel' o 'rc', comun a todos los filtros
+
+            fc y orden se combinan con las reglas de broadcasting de NumPy y definen la cantidad de filtros N.
+        """
+        if not isinstance(fs, float) and not isinstance(fs, int):
+            raise TypeError("La frecuencia de muestreo del filtro debe ser un numero")
+        fc, orden = np.broadcast_arrays(np.asarray(fc, dtype=float), np.asarray(orden))
+        if fc.ndim > 1:
+            raise TypeError("fc y orden deben ser escalares o vectores")
+        if not np.issubdtype(orden.dtype, np.integer):
+            raise TypeError("El orden de los filtros debe ser entero")
+        if np.any(orden < 1):
+            raise ValueError("El orden de los filtros debe ser positivo")
+        if tipo not in DISENADORES:
+            raise ValueError(f"Tipo de filtro no soportado: {tipo}")
+
+        self.tipo = tipo
+        self.fc = np.atleast_1d(fc).copy()
+        self.orden = np.atleast_1d(orden).astype(int)
+        self.fs = fs
+        self._disenar()
+        self.reset()
+
+    def __len__(self):
+        return len(self.fc)
+
+    def _disenar(self):
+        # Secciones de cada filtro, completadas con secciones identidad hasta S
+        self.wn = self.fc / (self.fs / 2)
+        n_sec = int(np.max((self.orden + 1) // 2))
+        self.sos = np.zeros((len(self), n_sec, 6))
+        self.sos[:, :, 0] = 1
+        self.sos[:, :, 3] = 1
+        for i, (orden, wn) in enumerate(zip(self.orden, self.wn)):
+            sos = disenar(self.tipo, orden, wn, 'sos')
+            self.sos[i, :len(sos)] = sos
+
+        # grupos de filtros con los mismos coeficientes, para filtrar con sosfilt cuando son pocos. Las secciones
+        # identidad del final no se filtran: su estado queda siempre en cero
+        unicos, inversa = np.unique(self.sos.reshape(len(self), -1), axis=0, return_inverse=True)
+        inversa = inversa.ravel()
+        self._grupos = []
+        for g in range(len(unicos)):
+            columnas = np.flatnonzero(inversa == g)
+            secciones = (int(self.orden[columnas[0]]) + 1) // 2
+            self._grupos.append((unicos[g].reshape(n_sec, 6)[:secciones], columnas))
+
+        # Forma de espacio de estados de la cascada, con el estado z aplanado a m = 2S variables por filtro:
+        # z' = A z + B x, y = C z + D x, guardada como una matriz [[A, B], [C, D]] de (m + 1, m + 1) por filtro. Se
+        # obtiene avanzando las secciones una muestra desde cada estado unitario y desde la entrada unitaria
+        m = 2*n_sec
+        base = np.eye(m + 1)
+        z = np.broadcast_to(base[:, :m].reshape(m + 1, n_sec, 2), (len(self), m + 1, n_sec, 2)).copy()
+        y = np.broadcast_to(base[:, m], (len(self), m + 1))
+        for s in range(n_sec):
+            b0, b1, b2, _, a1, a2 = self.sos[:, s, :, None].transpose(1, 0, 2)
+            x = y
+            y = b0*x + z[:, :, s, 0]
+            z[:, :, s, 0] = b1*x - a1*y + z[:, :, s, 1]
+            z[:, :, s, 1] = b2*x - a2*y
+        self._M = np.concatenate([z.reshape(len(self), m + 1, m).transpose(0, 2, 1), y[:, None]], axis=1)
+        self._tramos = None
+
+    def _matrices_tramo(self):
+        # Matrices de filter_block, que se arman la primera vez que se usan. Dentro de un tramo de L muestras la salida es
+        # la respuesta forzada (Toeplitz T de la respuesta al impulso) mas la respuesta al estado inicial (O, filas C A^k),
+        # y el estado final es A^L por el inicial mas el aporte de las muestras (G, columnas A^(L-1-j) B). Los estados al
+        # comienzo de los K tramos de un trozo salen del estado al comienzo del trozo (P, bloques (A^L)^k) y de los
+        # aportes de los tramos anteriores (Q, bloques (A^L)^(k-1-j))
+        if self._tramos is None:
+            L, K = self.LARGO_TRAMO, self.TRAMOS_POR_TROZO
+            N, m = len(self), self._M.shape[1] - 1
+            A, B, C, D = self._M[:, :m, :m], self._M[:, :m, m], self._M[:, m, :m], self._M[:, m, m]
+            # Con polos cerca de 1 las potencias de A crecen como k y los productos pierden precision. Se cambia el
+            # estado (z1, z2) de cada seccion por (z1, (z1 + z2)/sigma), sigma = sqrt|1 + a1 + a2|, en el que las
+            # potencias de A quedan acotadas. El cambio se aplica sumando filas y restando columnas antes de escalar,
+            # para que el termino chico 1 + a1 + a2 salga de restas exactas
+            i = np.arange(0, m, 2)
+            escala = np.ones((N, m))
+            escala[:, i + 1] = np.sqrt(np.abs((1 + self.sos[:, :, 4]) + self.sos[:, :, 5]))
+            escala[escala == 0] = 1
+            A, B, C = A.copy(), B.copy(), C.copy()
+            A[:, :, i] -= A[:, :, i + 1]
+            A[:, i + 1] += A[:, i]
+            B[:, i + 1] += B[:, i]
+            C[:, i] -= C[:, i + 1]
+            A *= escala[:, None, :] / escala[:, :, None]
+            B /= escala
+            C *= escala
+            V = np.zeros((N, m, m))
+            V[:, i, i] = 1
+            V[:, i + 1, i] = -1
+            V[:, i + 1, i + 1] = escala[:, i + 1]
+            V_inv = np.zeros((N, m, m))
+            V_inv[:, i, i] = 1
+            V_inv[:, i + 1, i] = V_inv[:, i + 1, i + 1] = 1 / escala[:, i + 1]
+
+            potencias = np.empty((L + 1, N, m, m))
+            potencias[0] = np.eye(m)
+            for k in range(L):
+                potencias[k + 1] = A @ potencias[k]
+            O = np.einsum('ni,knij->nkj', C, potencias[:L])
+            G = np.einsum('knij,nj->nik', potencias[L - 1::-1], B)
+            h = np.empty((N, L))
+            h[:, 0] = D
+            h[:, 1:] = (O[:, :L - 1] @ B[:, :, None])[:, :, 0]
+            k, j = np.indices((L, L))
+            T = np.where(k >= j, h[:, np.maximum(k - j, 0)], 0)
+
+            potencias_L = np.empty((K + 1, N, m, m))
+            potencias_L[0] = np.eye(m)
+            for k in range(K):
+                potencias_L[k + 1] = potencias[L] @ potencias_L[k]
+            Q = np.zeros((N, K + 1, m, K, m))
+            for k in range(1, K + 1):
+                for j in range(k):
+                    Q[:, k, :, j] = potencias_L[k - 1 - j]
+
+            # traspuestas, para multiplicar filas de muestras y de estados por la derecha
+            self._tramos = (np.concatenate([T.transpose(0, 2, 1), O.transpose(0, 2, 1)], axis=1),
+                            G.transpose(0, 2, 1).copy(),
+                            potencias_L.transpose(1, 3, 0, 2).reshape(N, m, (K + 1)*m),
+                            Q.reshape(N, (K + 1)*m, K*m).transpose(0, 2, 1).copy(),
+                            potencias.transpose(0, 1, 3, 2).copy(),
+                            V.transpose(0, 2, 1).copy(),
+                            V_inv.transpose(0, 2, 1).copy())
+        return self._tramos
+
+    def reset(self):
+        """reset
+            Reinicia el estado de todos los filtros (salida nula sin entradas previas)
+        """
+        self.z = np.zeros((len(self), self.sos.shape[1], 2))
+
+    def set_order(self, orden):
+        """set_order
+            Cambia el orden de los filtros y reinicia el estado
+        Args:
+            orden (int o array): orden de cada filtro
+        """
+        orden = np.broadcast_to(np.asarray(orden), self.orden.shape)
+        if not np.issubdtype(orden.dtype, np.integer):
+            raise TypeError("El orden de los filtros debe ser entero")
+        if np.any(orden < 1):
+            raise ValueError("El orden de los filtros debe ser positivo")
+        self.orden = orden.astype(int)
+        self._disenar()
+        self.reset()
+
+    def set_fs(self, fs):
+        """set_fs
+            Cambia la frecuencia de muestreo de los filtros
+        Args:
+            fs (float): frecuencia de muestreo
+        """
+        if not isinstance(fs, float) and not isinstance(fs, int):
+            raise TypeError("La frecuencia de muestreo del filtro debe ser un numero")
+        self.fs = fs
+        self._disenar()
+
+    def set_fc(self, fc):
+        """set_fc
+            Cambia la frecuencia de corte de los filtros
+        Args:
+            fc (float o array): frecuencia de corte de cada filtro
+        """
+        self.fc = np.broadcast_to(np.asarray(fc, dtype=float), self.fc.shape).copy()
+        self._disenar()
+
+    def get_tiempo_asentamiento(self, epsilon=1e-3):
+        """get_tiempo_asentamiento
+            Devuelve el tiempo de asentamiento de la respuesta al escalon de cada filtro
+        Args:
+            epsilon (float): error relativo admitido
+
+        Returns:
+            numpy array: tiempo de asentamiento de cada filtro en segundos
+        """
+        tiempos = np.empty(len(self))
+        for i, (orden, wn) in enumerate(zip(self.orden, self.wn)):
+            z, p, k = disenar(self.tipo, orden, wn, 'zpk')
+            tiempos[i] = tiempo_asentamiento(z, p, k, self.fs, epsilon)
+        return tiempos
+
+    def get_constante_tiempo(self):
+        """get_constante_tiempo
+            Devuelve la constante de tiempo del polo mas lento de cada filtro
+        Returns:
+            numpy array: constante de tiempo de cada filtro en segundos
+        """
+        tau = np.empty(len(self))
+        for i, (orden, wn) in enumerate(zip(self.orden, self.wn)):
+            z, p, k = disenar(self.tipo, orden, wn, 'zpk')
+            tau[i] = constante_tiempo(p, self.fs)
+        return tau
+
+    def _entrada(self, x, forma):
+        x = np.asarray(x)
+        if np.iscomplexobj(x) and not np.iscomplexobj(self.z):
+            self.z = self.z.astype(complex)
+        tipo = self.z.dtype
+        try:
+            return np.broadcast_to(x.astype(tipo, copy=False), forma)
+        except ValueError:
+            raise TypeError(f"La entrada no se puede llevar a la forma {forma}") from None
+
+    def filter(self, x):
+        """filter
+            Avanza una muestra de los N filtros con un producto matriz-vector por filtro, en la forma de espacio de estados.
+        Args:
+            x (float o array): muestra comun a todos los filtros, o un vector de N muestras (una por filtro). Puede ser compleja.
+
+        Returns:
+            numpy array: vector con la salida de cada filtro
+        """
+        x = self._entrada(x, (len(self),))
+        z = self.z.reshape(len(self), -1)
+        v = np.einsum('nij,nj->ni', self._M, np.concatenate([z, x[:, None]], axis=1))
+        z[...] = v[:, :-1]
+        y = v[:, -1]
+
+        if not np.isfinite(y.sum()) and not np.all(np.isfinite(y)):
+            self._error_no_finito(y[~np.isfinite(y)][0])
+        return y
+
+    def filter_block(self, x):
+        """filter_block
+            Filtra un bloque de muestras con los N filtros.
+
+            El bloque se parte en tramos de LARGO_TRAMO muestras que se filtran con productos de matrices sobre todos los filtros a la vez: la salida de un tramo es su respuesta forzada mas la respuesta al estado con que empieza, y los estados al comienzo de los tramos tambien salen de productos de matrices, de a TRAMOS_POR_TROZO tramos. Con pocos filtros (o pocos grupos de filtros iguales con el mismo estado y una entrada comun, que se filtran una sola vez) se usa signal.sosfilt, que es mas rapido.
+        Args:
+            x (numpy array): bloque de n muestras comun a todos los filtros, o arreglo de (n, N) con una columna por filtro. Puede ser complejo.
+
+        Returns:
+            numpy array: arreglo de (n, N) con la salida de cada filtro
+        """
+        n = len(x)
+        comun = np.ndim(x) == 1
+        x = self._entrada(x, (n,) if comun else (n, len(self)))
+        if n == 0:
+            return np.empty((0, len(self)), dtype=x.dtype)
+        filas = self._filas_sosfilt(comun)
+        if filas is not None:
+            y_out = self._filter_block_grupos(x, comun, filas)
+        else:
+            y_out = self._filter_block_tramos(x, comun)
+
+        if not np.isfinite(y_out.sum()) and not np.all(np.isfinite(y_out)):
+            self._error_no_finito(y_out[~np.isfinite(y_out)][0])
+        return y_out
+
+    def _filas_sosfilt(self, comun):
+        # Filtros de cada grupo que hay que pasar por sosfilt, o None si en total son mas de FILAS_SOSFILT. Con una
+        # entrada comun, los filtros de un grupo con el mismo estado dan la misma salida y se filtra uno solo
+        if len(self._grupos) > self.FILAS_SOSFILT:
+            return None
+        filas = []
+        for sos, columnas in self._grupos:
+            z = self.z[columnas, :len(sos)]
+            filas.append(columnas[:1] if comun and np.all(z == z[:1]) else columnas)
+        return filas if sum(map(len, filas)) <= self.FILAS_SOSFILT else None
+
+    def _filter_block_grupos(self, x, comun, filas):
+        y_out = np.empty((len(self), len(x)), dtype=x.dtype)
+        for (sos, columnas), filas_grupo in zip(self._grupos, filas):
+            s = len(sos)
+            x_grupo = np.broadcast_to(x, (len(filas_grupo), len(x))) if comun else x[:, filas_grupo].T
+            y_out[columnas], zf = signal.sosfilt(sos, x_grupo, axis=-1, zi=self.z[filas_grupo, :s].transpose(1, 0, 2))
+            self.z[columnas, :s] = zf.transpose(1, 0, 2)
+        return y_out.T
+
+    def _filter_block_tramos(self, x, comun):
+        TO, Gt, Pt, Qt, potencias_t, Vt, V_inv_t = self._matrices_tramo()
+        N, m = len(self), self._M.shape[1] - 1
+        L, K = self.LARGO_TRAMO, self.TRAMOS_POR_TROZO
+        n = len(x)
+        # Entrada de (1 o N, c, tramos, L), completada con ceros hasta un numero entero de trozos de K tramos. Las
+        # entradas complejas se filtran como dos entradas reales (c = 2), porque las matrices son reales
+        partes = (x.real, x.imag) if np.iscomplexobj(x) else (x,)
+        c = len(partes)
+        trozos = -(-n // (K*L))
+        tramos = trozos*K
+        xs = np.zeros((1 if comun else N, c, tramos*L))
+        for i, parte in enumerate(partes):
+            xs[:, i, :n] = parte if comun else parte.T
+        xs = xs.reshape(-1, c, tramos, L)
+        estado = self.z.view(float).reshape(N, m, c).transpose(0, 2, 1)
+
+        # estado al comienzo de cada tramo: solo se recorren en Python los trozos
+        aportes = (xs @ Gt[:, None]).reshape(N, c, trozos, K*m) @ Qt[:, None]
+        iniciales = np.empty((N, c, trozos, m))
+        s = estado @ V_inv_t
+        for t in range(trozos):
+            iniciales[:, :, t] = s
+            s = s @ Pt[:, :, K*m:] + aportes[:, :, t, K*m:]
+        estados = (iniciales @ Pt[:, None, :, :K*m] + aportes[..., :K*m]).reshape(N, c, tramos, m)
+
+        # salida: las muestras y el estado inicial de cada tramo son una fila de un solo producto con [T O]
+        y = np.empty((N, tramos, L), dtype=x.dtype)
+        filas = np.empty((N, c, min(tramos, self.TRAMOS_POR_PRODUCTO), L + m))
+        salida = np.empty(filas.shape[:3] + (L,))
+        for desde in range(0, tramos, filas.shape[2]):
+            tr = slice(desde, desde + filas.shape[2])
+            cantidad = len(range(tramos)[tr])
+            filas[:, :, :cantidad, :L] = xs[:, :, tr]
+            filas[:, :, :cantidad, L:] = estados[:, :, tr]
+            if c == 1:
+                np.matmul(filas[:, :, :cantidad], TO[:, None], out=y[:, None, tr])
+            else:
+                np.matmul(filas[:, :, :cantidad], TO[:, None], out=salida[:, :, :cantidad])
+                y[:, tr].real, y[:, tr].imag = salida[:, 0, :cantidad], salida[:, 1, :cantidad]
+
+        # estado en la muestra n: el del comienzo de su tramo, avanzado con las muestras que faltan
+        b, r = divmod(n, L)
+        if r == 0:
+            estado[...] = (estados[:, :, b] if b < tramos else s) @ Vt
+        else:
+            estado[...] = (estados[:, :, b] @ potencias_t[r] + xs[:, :, b, :r] @ Gt[:, L - r:]) @ Vt
+        return y.reshape(N, tramos*L)[:, :n].T
+
+    def _error_no_finito(self, y):
+        if np.isinf(y):
+            raise ValueError("La salida del filtro es infinita")
+        raise ValueError("La salida del filtro es NaN")
@@ -0,0 +1,145 @@
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ..captura.captura import Captura
+from ..desfasador_shift.desfasador_shift import desfasador_shift
+from ..filtro_butter.filtro_butter import IIRFilterBank
+from ..filtro_butter.caract_filtter import _transferencia
+
+
+# Formato de los resultados de la grilla, una fila por configuracion
+GRILLA_DTYPE = np.dtype([('tipo', 'U8'), ('orden', int), ('fc', float), ('t_asentamiento', float), ('ruido', float),
+                         ('rechazo_2f', float), ('ripple_2f', float), ('r', float), ('theta', float)])
+
+# Tipos de filtro pasa bajos que se pueden explorar
+TIPOS = ('butter', 'bessel', 'rc')
+
+
+# Muestras de la mezcla que se filtran por vez: acota la memoria del bloque de (n, N) salidas
+MUESTRAS_POR_BLOQUE = 1 << 15
+
+
+def _evaluar(args) -> np.ndarray:
+    path, fs, fr, configuraciones, epsilon = args
+    # Productos del mezclador compartidos por todas las configuraciones: med*ref + j*med*ref_desfasada
+    mezcla = np.load(path, mmap_mode='r')
+    largo = len(mezcla)
+
+    filas = np.zeros(len(configuraciones), dtype=GRILLA_DTYPE)
+    filas['tipo'] = [tipo for tipo, _, _ in configuraciones]
+    filas['orden'] = [orden for _, orden, _ in configuraciones]
+    filas['fc'] = [fc for _, _, fc in configuraciones]
+    for tipo in np.unique(filas['tipo']):
+        # Un banco por tipo: todas sus configuraciones se filtran juntas, una columna por configuracion
+        indices = np.flatnonzero(filas['tipo'] == tipo)
+        banco = IIRFilterBank(filas['fc'][indices], filas['orden'][indices], fs, tipo=str(tipo))
+        t_asentamiento = banco.get_tiempo_asentamiento(epsilon)
+        filas['t_asentamiento'][indices] = t_asentamiento
+        h = _transferencia(banco.sos, np.full(len(banco), 2*np.pi*2*fr/fs))
+        filas['rechazo_2f'][indices] = -20*np.log10(np.abs(h))
+
+        # Sumas del regimen permanente de cada columna, acumuladas bloque a bloque
+        inicio = np.ceil(t_asentamiento * fs).astype(int)
+        suma = np.zeros(len(banco), dtype=complex)
+        suma_r = np.zeros(len(banco))
+        suma_r2 = np.zeros(len(banco))
+        suma_x_2f = np.zeros(len(banco), dtype=complex)
+        suma_2f = np.zeros(len(banco), dtype=complex)
+        for desde in range(0, largo, MUESTRAS_POR_BLOQUE):
+            bloque = np.asarray(mezcla[desde:desde + MUESTRAS_POR_BLOQUE])
+            n = np.arange(desde, desde + len(bloque))
+            ref_2f = np.exp(-2j*np.pi*2*fr/fs*n)
+            salida = banco.filter_block(bloque)
+            if desde < inicio.max():
+                # bloque con muestras de algun transitorio: se anulan para que no entren en las sumas
+                permanente = n[:, None] >= inicio
+                salida[~permanente] = 0
+                suma_2f += permanente.T @ ref_2f
+            else:
+                suma_2f += ref_2f.sum()
+            r = np.abs(salida)
+            suma += salida.sum(axis=0)
+            suma_r += r.sum(axis=0)
+            suma_r2 += np.einsum('ij,ij->j', r, r)
+            suma_x_2f += salida.real.T @ ref_2f
+
+        cantidad = largo - inicio
+        validas = cantidad > 1
+        cantidad = np.maximum(cantidad, 1)
+        media = suma / cantidad
+        ruido = np.sqrt(np.maximum(suma_r2/cantidad - (suma_r/cantidad)**2, 0))
+        # Amplitud de la componente de 2fr que queda en x, relativa a r: mean((x - media.x)*ref_2f)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ripple = 2*np.abs(suma_x_2f/cantidad - media.real*suma_2f/cantidad) / np.abs(media)
+        filas['r'][indices] = np.where(validas, np.abs(media), np.nan)
+        filas['theta'][indices] = np.where(validas, np.angle(media), np.nan)
+        filas['ruido'][indices] = np.where(validas, ruido, np.nan)
+        filas['ripple_2f'][indices] = np.where(validas, ripple, np.nan)
+    return filas
+
+
+def explorar_grilla(path: str, fr: float, ordenes=(1, 2, 3, 4), fcs=None, tipos=('butter',), procesos: int = None,
+                    epsilon: float = 1e-3, inicio: int = 0, fin: int = None) -> np.ndarray:
+    """
+    Evalúa una captura con todas las combinaciones de tipo de filtro, orden y frecuencia de corte de los filtros del lock-in.
+
+    El desfasador y el mezclador se calculan una sola vez y sus productos se comparten entre procesos mediante un archivo mapeado en memoria; cada proceso del pool filtra x e y juntas como una señal compleja para su parte de las configuraciones, con un IIRFilterBank por tipo de filtro (una columna por configuración) que recorre la mezcla por bloques de MUESTRAS_POR_BLOQUE muestras, acumulando las sumas del régimen permanente de cada columna. Por configuración se informa:
+
+    - t_asentamiento: tiempo de asentamiento predicho por los polos del filtro (ver filtro_butter.tiempo_asentamiento).
+    - ruido: desvío estándar de r luego del asentamiento.
+    - rechazo_2f: atenuación del filtro en 2fr en dB.
+    - ripple_2f: amplitud de la componente de 2fr que queda en x, relativa a r.
+    - r y theta: valor medio luego del asentamiento.
+
+    Ejemplo de utilizacion
+    ```python
+    grilla = explorar_grilla("medicion.cap", fr=13, ordenes=range(1, 9), fcs=np.linspace(0.2, 3, 15), tipos=('butter', 'bessel'))
+    mejores = grilla[np.argsort(grilla['ruido'])][:5]
+    ```
+
+    Args:
+        path (str): Archivo de la captura, con la referencia en la primera columna y la señal a medir en la segunda.
+        fr (float): Frecuencia de referencia.
+        ordenes (list): Órdenes de los filtros.
+        fcs (list, opcional): Frecuencias de corte. Por defecto fr/10 como en LockIn.
+        tipos (list): Tipos de filtro, de TIPOS.
+        procesos (int, opcional): Procesos del pool. Por defecto la cantidad de CPUs.
+        epsilon (float): Error relativo admitido para el tiempo de asentamiento.
+        inicio (int): Primera muestra de la captura a usar.
+        fin (int, opcional): Muestra siguiente a la última a usar.
+
+    Returns:
+        numpy array: Arreglo GRILLA_DTYPE con una fila por configuración, en el orden de itertools.product(tipos, ordenes, fcs).
+    """
+    if fcs is None:
+        fcs = [fr/10]
+    for tipo in tipos:
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de filtro no soportado: {tipo}")
+    configuraciones = [(t, int(o), float(f)) for t, o, f in itertools.product(tipos, ordenes, fcs)]
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+
+    captura = Captura(path)
+    volts = captura.volts(inicio, fin)
+    ref, med = volts[:, 0], volts[:, 1]
+    ref_desf = desfasador_shift(captura.fs, fr).desfasing_block(ref)
+
+    descriptor, temporal = tempfile.mkstemp(suffix='.npy')
+    os.close(descriptor)
+    try:
+        np.save(temporal, med*ref + 1j*(med*ref_desf))
+        del volts, ref, med, ref_desf
+        partes = [configuraciones[i::procesos] for i in range(procesos) if configuraciones[i::procesos]]
+        with ProcessPoolExecutor(len(partes)) as pool:
+            resultados = list(pool.map(_evaluar, [(temporal, captura.fs, fr, parte, epsilon) for parte in partes]))
+    finally:
+        os.remove(temporal)
+
+    # Se vuelve al orden de las configuraciones
+    out = np.empty(len(configuraciones), dtype=GRILLA_DTYPE)
+    for i, filas in enumerate(resultados):
+        out[i::len(partes)] = filas
+    return out
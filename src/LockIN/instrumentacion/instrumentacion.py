@@ -0,0 +1,245 @@
+import json
+import math
+import threading
+import time
+
+
+class Histograma():
+    """
+    Histograma de latencias con intervalos logaritmicos (20 por decada, de 100 ns a 100 s).
+
+    Registrar una latencia cuesta O(1) y no reserva memoria, y los percentiles se estiman a partir de los intervalos con un error relativo menor al 12 %. El maximo se guarda exacto.
+    """
+
+    minimo = 1e-7
+    por_decada = 20
+    decadas = 9
+
+    def __init__(self) -> None:
+        self.cuentas = [0] * (self.por_decada * self.decadas + 1)
+        self.n = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.lock = threading.Lock()
+
+    def registrar(self, segundos: float) -> None:
+        """
+        Registra una latencia.
+
+        Args:
+            segundos (float): Latencia en segundos.
+        """
+        if segundos <= self.minimo:
+            i = 0
+        else:
+            i = min(int(math.log10(segundos / self.minimo) * self.por_decada) + 1, len(self.cuentas) - 1)
+        with self.lock:
+            self.cuentas[i] += 1
+            self.n += 1
+            self.total += segundos
+            if segundos > self.maximo:
+                self.maximo = segundos
+
+    def percentil(self, q: float) -> float:
+        """
+        Estima un percentil como el limite superior del intervalo que lo contiene.
+
+        Args:
+            q (float): Percentil entre 0 y 100.
+
+        Returns:
+            float: Latencia en segundos.
+        """
+        if self.n == 0:
+            return 0.0
+        objetivo = q / 100 * self.n
+        acumulado = 0
+        for i, c in enumerate(self.cuentas):
+            acumulado += c
+            if acumulado >= objetivo:
+                return min(self.minimo * 10**(i / self.por_decada), self.maximo)
+        return self.maximo
+
+    def resumen(self) -> dict:
+        """
+        Returns:
+            dict: Cantidad, media, p50, p99 y maximo en segundos.
+        """
+        return {
+            'n': self.n,
+            'media': self.total / self.n if self.n else 0.0,
+            'p50': self.percentil(50),
+            'p99': self.percentil(99),
+            'max': self.maximo,
+        }
+
+
+class Instrumentacion():
+    """
+    Instrumentación opcional de latencias y tasa de muestreo de un LockIn.
+
+    instrumentar() reemplaza, solo en las instancias indicadas, los métodos de cada etapa por versiones que miden su duración con perf_counter: LockIn.medir, LockIn.lock_in, LockIn.medir_bloque, LockIn.process_block, read y read_block de los drivers, desfasing del desfasador y filter del filtro, también si el LockIn lo crea después de instrumentarlo. Los sinks se agregan con instrumentar_sink. Sin instrumentar no hay ningún costo agregado, y desinstrumentar() devuelve los objetos a su estado original.
+
+    El tiempo de cmath.polar queda incluido en LockIn.lock_in: es la diferencia entre esa etapa y la suma del desfasador y el filtro.
+
+    Ejemplo de utilizacion
+    ```python
+    instr = Instrumentacion()
+    instr.instrumentar(lock_in)
+    instr.iniciar_archivo("metricas.jsonl", periodo=5)
+    ...
+    print(instr.snapshot())
+    instr.detener_archivo()
+    instr.desinstrumentar()
+    ```
+    """
+
+    def __init__(self) -> None:
+        self.histogramas = {}
+        self.muestras = 0
+        self.t_inicio = None
+        self.t_ultimo = None
+        self.lock_in = None
+        self.pipelines = []
+        self._envueltos = []
+        self._archivo = None
+
+    def _envolver(self, obj, nombre: str, etapa: str, contar=None) -> None:
+        if obj is None or not hasattr(obj, nombre) or nombre in vars(obj):
+            return
+        original = getattr(obj, nombre)
+        hist = self.histogramas.setdefault(etapa, Histograma())
+
+        def envuelta(*args, **kwargs):
+            t0 = time.perf_counter()
+            res = original(*args, **kwargs)
+            t1 = time.perf_counter()
+            hist.registrar(t1 - t0)
+            if contar is not None:
+                self._contar(contar(args, kwargs), t1)
+            return res
+
+        setattr(obj, nombre, envuelta)
+        self._envueltos.append((obj, nombre))
+
+    def _contar(self, n: int, t: float) -> None:
+        if self.t_inicio is None:
+            self.t_inicio = t
+        self.t_ultimo = t
+        self.muestras += n
+
+    def instrumentar(self, lock_in, pipeline=None) -> None:
+        """
+        Instrumenta un LockIn, sus drivers, su desfasador y su filtro.
+
+        Args:
+            lock_in (LockIn): Lock-in a instrumentar.
+            pipeline (Pipeline, opcional): Pipeline del que se informan los overruns y bloques descartados; también se instrumenta su sink.
+        """
+        self.lock_in = lock_in
+        if pipeline is not None:
+            self.pipelines.append(pipeline)
+            self.instrumentar_sink(pipeline.sink)
+        self._envolver(lock_in, 'medir', 'LockIn.medir')
+        self._envolver(lock_in, 'medir_bloque', 'LockIn.medir_bloque')
+        self._envolver(lock_in, 'lock_in', 'LockIn.lock_in', lambda args, kwargs: 1)
+        self._envolver(lock_in, 'process_block', 'LockIn.process_block', lambda args, kwargs: len(args[0] if args else kwargs['ref']))
+        for nombre, adc in (('adc_ref', lock_in.adc_ref), ('adc_med', lock_in.adc_med)):
+            self._envolver(adc, 'read', f'{nombre}.read')
+            self._envolver(adc, 'read_block', f'{nombre}.read_block')
+        self._envolver(lock_in.desfasador, 'desfasing', 'desfasador.desfasing')
+        self._envolver(lock_in.desfasador, 'desfasing_block', 'desfasador.desfasing_block')
+        self._instrumentar_filtro(lock_in.filtro)
+        self._envolver_creacion_filtro(lock_in)
+
+    def _instrumentar_filtro(self, filtro) -> None:
+        self._envolver(filtro, 'filter', 'filtro.filter')
+        self._envolver(filtro, 'filter_block', 'filtro.filter_block')
+
+    def _envolver_creacion_filtro(self, lock_in) -> None:
+        # El filtro se crea mas tarde si no hay fr al construir el LockIn (por ejemplo con el PLL): se instrumenta al crearlo
+        if '_crear_filtros' in vars(lock_in):
+            return
+        original = lock_in._crear_filtros
+
+        def crear_filtros():
+            original()
+            self._instrumentar_filtro(lock_in.filtro)
+
+        lock_in._crear_filtros = crear_filtros
+        self._envueltos.append((lock_in, '_crear_filtros'))
+
+    def instrumentar_sink(self, sink, nombre: str = 'sink') -> None:
+        """
+        Instrumenta el método write de un sink.
+
+        Args:
+            sink: Objeto con un método write.
+            nombre (str): Nombre de la etapa en el snapshot.
+        """
+        self._envolver(sink, 'write', f'{nombre}.write')
+
+    def desinstrumentar(self) -> None:
+        """
+        Devuelve todos los objetos instrumentados a sus métodos originales.
+        """
+        for obj, nombre in self._envueltos:
+            delattr(obj, nombre)
+        self._envueltos = []
+
+    def snapshot(self) -> dict:
+        """
+        Devuelve el estado actual de la instrumentación.
+
+        Returns:
+            dict: Latencias por etapa (n, media, p50, p99 y max en segundos), muestras procesadas, tasa lograda frente a la fs configurada y overruns.
+        """
+        tasa = 0.0
+        if self.t_inicio is not None and self.t_ultimo > self.t_inicio:
+            tasa = self.muestras / (self.t_ultimo - self.t_inicio)
+        overruns = {}
+        for pipeline in self.pipelines:
+            for clave, valor in pipeline.stats().items():
+                if clave.startswith(('overruns', 'descartados')):
+                    overruns[clave] = overruns.get(clave, 0) + valor
+        return {
+            'tiempo': time.time(),
+            'etapas': {etapa: hist.resumen() for etapa, hist in self.histogramas.items() if hist.n > 0},
+            'muestras': self.muestras,
+            'tasa': tasa,
+            'fs': None if self.lock_in is None else self.lock_in.fs,
+            'overruns': overruns,
+        }
+
+    def iniciar_archivo(self, path: str, periodo: float = 1.0) -> None:
+        """
+        Inicia un hilo que agrega un snapshot por linea (JSON) al archivo cada periodo segundos.
+
+        Args:
+            path (str): Archivo de metricas.
+            periodo (float): Periodo de escritura en segundos.
+        """
+        if self._archivo is not None:
+            raise RuntimeError("El archivo de metricas ya fue iniciado")
+        detener = threading.Event()
+
+        def escribir():
+            with open(path, 'a') as f:
+                while not detener.wait(periodo):
+                    f.write(json.dumps(self.snapshot()) + '\n')
+                    f.flush()
+                f.write(json.dumps(self.snapshot()) + '\n')
+
+        hilo = threading.Thread(target=escribir, name="lockin-metricas", daemon=True)
+        self._archivo = (detener, hilo)
+        hilo.start()
+
+    def detener_archivo(self) -> None:
+        """
+        Escribe un ultimo snapshot y detiene el hilo del archivo de metricas.
+        """
+        if self._archivo is not None:
+            detener, hilo = self._archivo
+            detener.set()
+            hilo.join()
+            self._archivo = None
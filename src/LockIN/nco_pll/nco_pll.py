@@ -0,0 +1,155 @@
+import numpy as np
+
+
+def detectar_fr(x: np.ndarray, fs: float) -> float:
+    """
+    Detecta la frecuencia dominante de una señal mediante su FFT.
+
+    Se usa una ventana de Hann y se interpola el pico con una parabola sobre el logaritmo del modulo, por lo que la resolución es mucho mejor que fs/len(x).
+
+    Args:
+        x (numpy array): Señal a analizar (al menos unos pocos periodos).
+        fs (float): Frecuencia de muestreo.
+
+    Returns:
+        float: Frecuencia dominante en Hz.
+    """
+    x = np.asarray(x, dtype=float)
+    if len(x) < 4:
+        raise ValueError("Se necesitan más muestras para detectar la frecuencia")
+    espectro = np.abs(np.fft.rfft((x - np.mean(x)) * np.hanning(len(x))))
+    k = int(np.argmax(espectro[1:])) + 1
+    if k >= len(espectro) - 1:
+        return k * fs / len(x)
+
+    # Interpolacion parabolica del pico
+    a, b, c = np.log(espectro[k - 1:k + 2] + 1e-300)
+    delta = 0.5 * (a - c) / (a - 2*b + c)
+    return (k + delta) * fs / len(x)
+
+
+class NCO_PLL():
+    """
+    Oscilador controlado numericamente (NCO) enganchado a la referencia medida mediante un PLL digital.
+
+    Genera un coseno y un seno limpios con la frecuencia y la fase de la referencia, en lugar de desfasar la referencia muestreada como desfasador_shift. La cuadratura es exacta para cualquier relación fs/fr, no hay que llenar ningún buffer y el ruido de la referencia no llega al mezclador.
+
+    El PLL funciona por bloques: la fase del NCO se acumula en forma vectorizada dentro del bloque y, al final de cada bloque, el error de fase entre la referencia y el NCO (ajustado por cuadrados minimos sobre el bloque) corrige la fase y la frecuencia con un lazo de segundo orden de ancho de banda ancho_banda. Si no se indica fr, se detecta con la FFT del primer bloque, que debe contener al menos dos periodos de la referencia.
+
+    La referencia medida se modela como A*cos(fase), de forma que cos(fase) coincide con la referencia y sin(fase) es la referencia atrasada 90 grados, como la salida de desfasador_shift.
+
+    Ejemplo de utilizacion
+    ```python
+    pll = NCO_PLL(fs=1000)           # fr se detecta en el primer bloque
+    fase = pll.process_block(ref)
+    ref_i, ref_q = np.cos(fase), np.sin(fase)
+    ```
+    """
+
+    def __init__(self, fs: float, fr: float = None, ancho_banda: float = None, amortiguamiento: float = 1/np.sqrt(2)) -> None:
+        """
+        Args:
+            fs (float): Frecuencia de muestreo.
+            fr (float, opcional): Frecuencia inicial de la referencia. Si es None se detecta con la FFT del primer bloque.
+            ancho_banda (float, opcional): Ancho de banda del lazo en Hz. Por defecto fr/50.
+            amortiguamiento (float): Factor de amortiguamiento del lazo.
+        """
+        if fs <= 0:
+            raise ValueError("La frecuencia de muestreo debe ser mayor a cero")
+        if fr is not None and (fr <= 0 or fr >= fs / 2):
+            raise ValueError("La frecuencia de referencia debe estar entre cero y fs/2")
+        self.fs = fs
+        self.fr = fr
+        self.ancho_banda = ancho_banda
+        self.amortiguamiento = amortiguamiento
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Reinicia el PLL: el proximo bloque vuelve a enganchar la fase (y a detectar la frecuencia si no se indico fr).
+        """
+        self.f = self.fr
+        self.fase = 0.0
+        self.error = 0.0
+        self.enganchado = False
+
+    def set_fs(self, fs: float) -> None:
+        """
+        Función que setea la frecuencia de muestreo.
+
+        Args:
+            fs (float): Frecuencia de muestreo.
+        """
+        if fs <= 0:
+            raise ValueError("La frecuencia de muestreo debe ser mayor a cero")
+        self.fs = fs
+        self.reset()
+
+    def set_fr(self, fr: float) -> None:
+        """
+        Función que setea la frecuencia inicial de la referencia.
+
+        Args:
+            fr (float): Frecuencia de referencia, o None para detectarla.
+        """
+        if fr is not None and (fr <= 0 or fr >= self.fs / 2):
+            raise ValueError("La frecuencia de referencia debe estar entre cero y fs/2")
+        self.fr = fr
+        self.reset()
+
+    def _error_fase(self, ref: np.ndarray, fases: np.ndarray) -> float:
+        # Ajuste por cuadrados minimos de ref = a*cos(fase) + b*sin(fase): a diferencia de promediar
+        # ref*exp(-j*fase), no tiene fuga de la componente en 2f aunque el bloque dure menos de un periodo
+        c = np.cos(fases)
+        s = np.sin(fases)
+        cc, ss, cs = np.dot(c, c), np.dot(s, s), np.dot(c, s)
+        rc, rs = np.dot(ref, c), np.dot(ref, s)
+        det = cc*ss - cs*cs
+        if det <= 1e-9 * (cc*ss + 1e-300):
+            return float(np.angle(np.mean(ref * np.exp(-1j * fases))))
+        a = (rc*ss - rs*cs) / det
+        b = (rs*cc - rc*cs) / det
+        return float(np.arctan2(-b, a))
+
+    def process_block(self, ref: np.ndarray) -> np.ndarray:
+        """
+        Procesa un bloque de la referencia medida.
+
+        Args:
+            ref (numpy array): Bloque de la referencia.
+
+        Returns:
+            numpy array: Fase del NCO en radianes para cada muestra del bloque.
+        """
+        ref = np.asarray(ref, dtype=float)
+        n = len(ref)
+        if n == 0:
+            return np.zeros(0)
+
+        if self.f is None:
+            f = detectar_fr(ref, self.fs)
+            if n * f / self.fs < 2:
+                raise ValueError("El primer bloque debe contener al menos dos periodos de la referencia para detectar fr")
+            self.f = f
+
+        # Acumulacion vectorizada de la fase del NCO
+        w = 2 * np.pi * self.f / self.fs
+        fases = self.fase + w * np.arange(n)
+        self.error = self._error_fase(ref, fases)
+
+        if not self.enganchado:
+            # Primer bloque: se engancha la fase directamente
+            fases += self.error
+            self.fase = (fases[-1] + w) % (2*np.pi)
+            self.enganchado = True
+            return fases
+
+        # Lazo de segundo orden a la frecuencia de bloques
+        ancho_banda = self.f / 50 if self.ancho_banda is None else self.ancho_banda
+        wn_t = min(2 * np.pi * ancho_banda * n / self.fs, 0.5)
+        alfa = 2 * self.amortiguamiento * wn_t
+        beta = wn_t**2
+        self.fase = (fases[-1] + w + alfa * self.error) % (2*np.pi)
+        self.f += beta * self.error * self.fs / (2 * np.pi * n)
+
+        return fases
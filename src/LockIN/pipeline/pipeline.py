@@ -0,0 +1,232 @@
+import threading
+import numpy as np
+from ..LockIn import LockIn, LOCKIN_DTYPE
+
+
+class RingBuffer():
+    """
+    Buffer circular de bloques preasignado y seguro entre hilos.
+
+    Los bloques se copian dentro de ranuras de un arreglo reservado al crear el buffer, por lo que no se reserva memoria durante la adquisición. Cuando el buffer está lleno el comportamiento depende de la politica:
+
+    - 'block': el productor espera a que el consumidor libere una ranura.
+    - 'drop_oldest': se descarta el bloque más viejo sin leer y el productor nunca espera.
+
+    En ambos casos se cuenta un overrun cada vez que el productor encuentra el buffer lleno, y en 'drop_oldest' se cuentan los bloques descartados.
+    """
+
+    politicas = ['block', 'drop_oldest']
+
+    def __init__(self, capacidad: int, forma: tuple, dtype=float, politica: str = 'block') -> None:
+        """
+        Args:
+            capacidad (int): Cantidad de bloques que entran en el buffer.
+            forma (tuple): Forma de cada bloque.
+            dtype: Tipo de dato de los bloques.
+            politica (str): 'block' o 'drop_oldest'.
+        """
+        if capacidad < 1:
+            raise ValueError("La capacidad del buffer debe ser al menos 1")
+        if politica not in self.politicas:
+            raise ValueError(f"La politica debe ser una de {self.politicas}")
+        self.capacidad = capacidad
+        self.politica = politica
+        self.datos = np.zeros((capacidad,) + tuple(forma), dtype=dtype)
+        self.lectura = 0
+        self.ocupados = 0
+        self.cerrado = False
+        self.overruns = 0
+        self.descartados = 0
+        self.condicion = threading.Condition()
+
+    def put(self, bloque) -> None:
+        """
+        Copia un bloque en la próxima ranura libre.
+
+        Args:
+            bloque: Bloque con la forma del buffer.
+        """
+        with self.condicion:
+            if self.ocupados == self.capacidad:
+                self.overruns += 1
+                if self.politica == 'block':
+                    while self.ocupados == self.capacidad and not self.cerrado:
+                        self.condicion.wait()
+                else:
+                    # Se descarta el bloque mas viejo
+                    self.lectura = (self.lectura + 1) % self.capacidad
+                    self.ocupados -= 1
+                    self.descartados += 1
+            if self.cerrado:
+                raise RuntimeError("El buffer está cerrado")
+            escritura = (self.lectura + self.ocupados) % self.capacidad
+            self.datos[escritura] = bloque
+            self.ocupados += 1
+            self.condicion.notify_all()
+
+    def get(self, out: np.ndarray = None, timeout: float = None) -> np.ndarray:
+        """
+        Copia el bloque más viejo en out y libera su ranura.
+
+        Args:
+            out (numpy array, opcional): Arreglo preasignado donde copiar el bloque.
+            timeout (float, opcional): Tiempo máximo de espera en segundos.
+
+        Returns:
+            numpy array: El bloque leído, o None si el buffer se cerró y está vacío o se cumplió el timeout.
+        """
+        with self.condicion:
+            if not self.condicion.wait_for(lambda: self.ocupados > 0 or self.cerrado, timeout):
+                return None
+            if self.ocupados == 0:
+                return None
+            if out is None:
+                out = np.empty_like(self.datos[0])
+            out[...] = self.datos[self.lectura]
+            self.lectura = (self.lectura + 1) % self.capacidad
+            self.ocupados -= 1
+            self.condicion.notify_all()
+            return out
+
+    def close(self) -> None:
+        """
+        Cierra el buffer: los consumidores leen los bloques que quedan y luego reciben None.
+        """
+        with self.condicion:
+            self.cerrado = True
+            self.condicion.notify_all()
+
+
+class Pipeline():
+    """
+    Pipeline productor/consumidor alrededor de un LockIn.
+
+    Separa la adquisición, el procesamiento y la escritura de resultados en tres hilos conectados por buffers circulares preasignados:
+
+    adquisición -> RingBuffer de muestras -> lock-in por bloques -> RingBuffer de resultados -> sink
+
+    El sink es cualquier objeto con un método write(out) que recibe los arreglos LOCKIN_DTYPE (y opcionalmente close()). El arreglo que recibe write se reutiliza en la siguiente llamada, por lo que el sink debe copiarlo si necesita conservarlo. Con la politica 'drop_oldest' la adquisición nunca espera a la escritura ni al procesamiento: si alguna etapa se atrasa se descartan bloques y se cuentan en stats().
+
+    Ejemplo de utilizacion
+    ```python
+    pipeline = Pipeline(lock_in, sink, block_size=500, politica='drop_oldest')
+    pipeline.start(fs=1000)
+    time.sleep(60)
+    pipeline.stop()
+    print(pipeline.stats())
+    ```
+    """
+
+    def __init__(self, lock_in: LockIn, sink, block_size: int, capacidad: int = 16, politica: str = 'block') -> None:
+        """
+        Args:
+            lock_in (LockIn): Lock-in que adquiere y procesa los bloques.
+            sink: Destino de los resultados, con un método write(out).
+            block_size (int): Muestras por bloque.
+            capacidad (int): Cantidad de bloques de cada buffer circular.
+            politica (str): 'block' o 'drop_oldest'.
+        """
+        if block_size < 1:
+            raise ValueError("El tamaño de bloque debe ser al menos 1")
+        if block_size % lock_in.factor_decimacion() != 0:
+            raise ValueError("El tamaño de bloque debe ser multiplo del factor de decimación del lock-in")
+        self.lock_in = lock_in
+        self.sink = sink
+        self.block_size = block_size
+        # Con decimacion cada bloque de muestras da block_size/factor filas de resultados
+        self.block_salida = block_size // lock_in.factor_decimacion()
+        self.muestras = RingBuffer(capacidad, (2, block_size), float, politica)
+        self.resultados = RingBuffer(capacidad, (self.block_salida,), LOCKIN_DTYPE, politica)
+        self.detener = threading.Event()
+        self.hilos = []
+        self.errores = []
+        self.adquiridos = 0
+        self.procesados = 0
+        self.escritos = 0
+
+    def start(self, fs: float = None) -> None:
+        """
+        Inicia los hilos de adquisición, procesamiento y escritura.
+
+        Args:
+            fs (float, opcional): Si se pasa, se inicia la adquisición continua del LockIn con esa frecuencia de muestreo.
+        """
+        if self.hilos:
+            raise RuntimeError("El pipeline ya fue iniciado")
+        if fs is not None:
+            self.lock_in.start_stream(fs)
+        self.hilos = [threading.Thread(target=self._correr, args=(etapa,), name=f"lockin-{etapa.__name__.strip('_')}", daemon=True)
+                      for etapa in (self._adquisicion, self._procesamiento, self._escritura)]
+        for hilo in self.hilos:
+            hilo.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Detiene la adquisición, procesa y escribe los bloques pendientes y espera a que terminen los hilos.
+
+        Si alguna etapa falló, se vuelve a levantar la primera excepción.
+        """
+        self.detener.set()
+        for hilo in self.hilos:
+            hilo.join(timeout)
+        try:
+            self.lock_in.stop_stream()
+        except NotImplementedError:
+            pass
+        if hasattr(self.sink, 'close'):
+            self.sink.close()
+        if self.errores:
+            raise self.errores[0]
+
+    def stats(self) -> dict:
+        """
+        Devuelve los contadores del pipeline.
+
+        Returns:
+            dict: Bloques adquiridos, procesados y escritos, y overruns y bloques descartados en cada buffer.
+        """
+        return {
+            'adquiridos': self.adquiridos,
+            'procesados': self.procesados,
+            'escritos': self.escritos,
+            'overruns_muestras': self.muestras.overruns,
+            'descartados_muestras': self.muestras.descartados,
+            'overruns_resultados': self.resultados.overruns,
+            'descartados_resultados': self.resultados.descartados,
+        }
+
+    def _correr(self, etapa) -> None:
+        # Si una etapa falla se guarda el error y se detiene todo el pipeline
+        try:
+            etapa()
+        except Exception as e:
+            self.errores.append(e)
+            self.detener.set()
+            self.muestras.close()
+            self.resultados.close()
+
+    def _adquisicion(self) -> None:
+        try:
+            while not self.detener.is_set():
+                ref, med = self.lock_in.medir_bloque(self.block_size)
+                self.muestras.put((ref, med))
+                self.adquiridos += 1
+        finally:
+            self.muestras.close()
+
+    def _procesamiento(self) -> None:
+        bloque = np.empty((2, self.block_size))
+        out = np.empty(self.block_salida, dtype=LOCKIN_DTYPE)
+        try:
+            while self.muestras.get(bloque) is not None:
+                self.lock_in.process_block(bloque[0], bloque[1], out=out)
+                self.resultados.put(out)
+                self.procesados += 1
+        finally:
+            self.resultados.close()
+
+    def _escritura(self) -> None:
+        out = np.empty(self.block_salida, dtype=LOCKIN_DTYPE)
+        while self.resultados.get(out) is not None:
+            self.sink.write(out)
+            self.escritos += 1
@@ -0,0 +1,176 @@
+import numpy as np
+
+
+class PromediadorSincrono():
+    """PromediadorSincrono:
+        Filtro pasa bajos que promedia la señal sobre una cantidad entera de periodos de la referencia (filtro sinc).
+
+        Promediar M = periodos*fs/fr muestras pone ceros de transferencia en todos los multiplos de fr/periodos, en particular en 2fr, donde queda el ripple del mezclador, y el filtro se asienta por completo luego de M muestras. Con fs/fr no entero M se redondea y los ceros quedan cerca de 2fr en lugar de exactamente en 2fr.
+
+        Cada etapa mantiene la suma de las ultimas M muestras, por lo que cuesta O(1) por muestra sin importar M; con orden mayor a 1 se encadenan etapas iguales (sinc^orden), que atenuan mas el ruido entre los ceros. filter procesa una muestra y filter_block un bloque, y ambos comparten el estado, como en IIR_filtter. Acepta muestras complejas.
+
+        ```python
+        promediador = PromediadorSincrono(fr=13, orden=1, fs=1300, periodos=2)
+        y = promediador.filter_block(x)
+        ```
+    """
+    def __init__(self, fr, orden, fs, periodos=1):
+        """__init__
+
+        Args:
+            fr (float): frecuencia de referencia
+            orden (int): cantidad de etapas de promedio encadenadas
+            fs (float): frecuencia de muestreo
+            periodos (int): periodos de la referencia que abarca cada promedio
+        """
+        if not isinstance(orden, int) or not isinstance(periodos, int):
+            raise TypeError("El orden y la cantidad de periodos deben ser enteros")
+        if orden < 1 or periodos < 1:
+            raise ValueError("El orden y la cantidad de periodos deben ser positivos")
+        if fr <= 0 or fs <= 0:
+            raise ValueError("Las frecuencias deben ser positivas")
+
+        self.fr = fr
+        self.orden = orden
+        self.fs = fs
+        self.periodos = periodos
+        self._calcular_ventana()
+        self.reset()
+
+    def _calcular_ventana(self):
+        # Muestras de cada promedio
+        self.M = max(1, round(self.periodos * self.fs / self.fr))
+
+    def reset(self):
+        """reset
+            Reinicia el estado del filtro (salida nula sin entradas previas)
+        """
+        # ultimas M entradas de cada etapa (buffer circular, la mas vieja en la posicion self._i) y su suma
+        self._ventanas = [[0.0] * self.M for _ in range(self.orden)]
+        self._sumas = [0.0] * self.orden
+        self._i = 0
+
+    def set_fr(self, fr):
+        """set_fr
+            Cambia la frecuencia de referencia. Si cambia el largo del promedio se reinicia el estado.
+        Args:
+            fr (float): frecuencia de referencia
+        """
+        if fr <= 0:
+            raise ValueError("La frecuencia de referencia debe ser positiva")
+        self.fr = fr
+        self._redimensionar()
+
+    def set_fs(self, fs):
+        """set_fs
+            Cambia la frecuencia de muestreo. Si cambia el largo del promedio se reinicia el estado.
+        Args:
+            fs (float): frecuencia de muestreo
+        """
+        if fs <= 0:
+            raise ValueError("La frecuencia de muestreo debe ser positiva")
+        self.fs = fs
+        self._redimensionar()
+
+    def _redimensionar(self):
+        M = self.M
+        self._calcular_ventana()
+        if self.M != M:
+            self.reset()
+
+    def set_order(self, orden):
+        """set_order
+            Cambia la cantidad de etapas y reinicia el estado
+        Args:
+            orden (int): cantidad de etapas
+        """
+        if not isinstance(orden, int):
+            raise TypeError("El orden del filtro debe ser un entero")
+        if orden < 1:
+            raise ValueError("El orden del filtro debe ser positivo")
+        self.orden = orden
+        self.reset()
+
+    def get_order(self):
+        return self.orden
+
+    def get_fs(self):
+        return self.fs
+
+    def get_tiempo_asentamiento(self, epsilon=1e-3):
+        """get_tiempo_asentamiento
+            Devuelve el tiempo que tarda la respuesta al escalon en llegar a su valor final. Es exacto (no depende de epsilon): cada etapa se asienta al llenar su ventana.
+        Args:
+            epsilon (float): se ignora, se mantiene por compatibilidad con IIR_filtter
+
+        Returns:
+            float: tiempo de asentamiento en segundos
+        """
+        return self.orden * (self.M - 1) / self.fs
+
+    def get_constante_tiempo(self):
+        """get_constante_tiempo
+            Devuelve la constante de tiempo de un filtro RC de primer orden con el mismo ancho de banda equivalente de ruido, 1/(4*ENBW)
+        Returns:
+            float: constante de tiempo en segundos
+        """
+        h = np.ones(1)
+        for _ in range(self.orden):
+            h = np.convolve(h, np.full(self.M, 1 / self.M))
+        enbw = self.fs / 2 * np.sum(h**2) / np.sum(h)**2
+        return 1 / (4 * enbw)
+
+    def filter(self, x):
+        """filter
+            Procesa una muestra, actualizando la suma de cada etapa con la muestra que entra y la que sale de la ventana.
+        Args:
+            x (float o complex): muestra a filtrar
+
+        Returns:
+            float o complex: muestra filtrada
+        """
+        if type(x) is not complex:
+            x = complex(x) if isinstance(x, np.complexfloating) else float(x)
+        i = self._i
+        sumas = self._sumas
+        for k, ventana in enumerate(self._ventanas):
+            sumas[k] += x - ventana[i]
+            ventana[i] = x
+            x = sumas[k] / self.M
+
+        i += 1
+        if i == self.M:
+            i = 0
+            # Una vez por ventana se recalculan las sumas, para que no se acumule el redondeo
+            self._sumas = [sum(ventana) for ventana in self._ventanas]
+        self._i = i
+        return x
+
+    def filter_block(self, x):
+        """filter_block
+            Procesa un bloque de muestras con sumas acumuladas, partiendo de la ventana guardada en el estado.
+        Args:
+            x (numpy array): bloque de muestras a filtrar, real o complejo
+
+        Returns:
+            numpy array: bloque de muestras filtradas
+        """
+        x = np.asarray(x)
+        if not np.iscomplexobj(x):
+            x = x.astype(float, copy=False)
+        if x.ndim != 1:
+            raise TypeError("El bloque a filtrar debe ser un vector")
+        if len(x) == 0:
+            return np.zeros(0)
+
+        M, i = self.M, self._i
+        for k, ventana in enumerate(self._ventanas):
+            # ventana en orden cronologico seguida del bloque
+            ext = np.concatenate((np.array(ventana[i:] + ventana[:i]), x))
+            acumulada = np.concatenate(([0], np.cumsum(ext)))
+            x = (acumulada[M + 1:] - acumulada[1:len(x) + 1]) / M
+            ventana = ext[-M:]
+            self._ventanas[k] = ventana.tolist()
+            self._sumas[k] = ventana.sum().item()
+        self._i = 0
+        return x
@@ -0,0 +1,113 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ..LockIn import LockIn, LOCKIN_DTYPE
+from ..ADC.ADC_Captura import ADC_Captura
+from ..captura.captura import Captura
+
+
+def _crear_lock_in(path: str, parametros: dict) -> LockIn:
+    # Cada proceso abre la captura por su cuenta: el mapa de memoria no se copia entre procesos
+    adc = ADC_Captura(path)
+    adc.connect()
+    return LockIn(fs=adc.fs, adc_ref=adc, **parametros)
+
+
+def calentamiento(path: str, parametros: dict, epsilon: float = 1e-12) -> int:
+    """
+    Muestras que hay que procesar antes de un segmento para que el desfasador y los filtros lleguen al régimen permanente, de forma que el resultado del segmento difiera del de un procesamiento serie en menos de epsilon (relativo).
+
+    Args:
+        path (str): Archivo de la captura.
+        parametros (dict): Argumentos del LockIn (fr, orden_filtter, decimacion_entrada, ...), salvo fs y los ADC.
+        epsilon (float): Error relativo admitido.
+
+    Returns:
+        int: Muestras de calentamiento, multiplo del factor de decimación.
+    """
+    lock_in = _crear_lock_in(path, parametros)
+    R = lock_in.factor_decimacion()
+    n = math.ceil(lock_in.tiempo_asentamiento(epsilon) * lock_in.fs)
+    return R * math.ceil(n / R)
+
+
+def _procesar_segmento(args) -> np.ndarray:
+    path, parametros, inicio_calentamiento, inicio, fin, block_size = args
+    lock_in = _crear_lock_in(path, parametros)
+    lock_in.adc_ref.start_stream(lock_in.fs)
+    lock_in.adc_ref.ir_a(inicio_calentamiento)
+    lock_in.t = inicio_calentamiento / lock_in.fs
+
+    R = lock_in.factor_decimacion()
+    out = np.empty((fin - inicio_calentamiento) // R, dtype=LOCKIN_DTYPE)
+    i = 0
+    restantes = fin - inicio_calentamiento
+    while restantes > 0:
+        ref, med = lock_in.medir_bloque(min(block_size, restantes))
+        n = lock_in.n_salida(len(ref))
+        lock_in.process_block(ref, med, out=out[i:i + n])
+        i += n
+        restantes -= len(ref)
+
+    # Se descartan las filas del calentamiento
+    return out[(inicio - inicio_calentamiento) // R:]
+
+
+def reprocesar(path: str, parametros: dict, sink=None, procesos: int = None, segmento: int = None,
+               epsilon: float = 1e-12, block_size: int = 65536):
+    """
+    Procesa una captura con un LockIn dividiéndola en segmentos que se demodulan en paralelo en un pool de procesos.
+
+    Cada segmento se procesa desde calentamiento(path, parametros, epsilon) muestras antes de su comienzo, y esas filas se descartan, por lo que al unir los segmentos el resultado coincide con procesar la captura entera en serie salvo errores de redondeo. Solo admite referencia='shift': el PLL depende de toda la historia de la referencia.
+
+    Ejemplo de utilizacion
+    ```python
+    out = reprocesar("medicion.cap", {'fr': 13, 'orden_filtter': 4})
+    with SinkBinario("reproceso.bin") as sink:
+        reprocesar("medicion.cap", {'fr': 13, 'orden_filtter': 4}, sink=sink, procesos=8)
+    ```
+
+    Args:
+        path (str): Archivo de la captura (ver captura.grabar), con la referencia en la primera columna y la señal a medir en la segunda.
+        parametros (dict): Argumentos del LockIn (fr, orden_filtter, decimacion_entrada, ...), salvo fs y los ADC.
+        sink (opcional): Objeto con un método write(out) al que se envían los segmentos en orden. Si es None se devuelve todo el resultado en un arreglo.
+        procesos (int, opcional): Procesos del pool. Por defecto la cantidad de CPUs.
+        segmento (int, opcional): Muestras por segmento. Por defecto se reparte la captura en 4 segmentos por proceso, de al menos 10 veces el calentamiento.
+        epsilon (float): Error relativo admitido por el calentamiento.
+        block_size (int): Muestras por bloque dentro de cada segmento. Se redondea a un multiplo del factor de decimación.
+
+    Returns:
+        numpy array: Arreglo LOCKIN_DTYPE con el resultado, o None si se pasó un sink.
+    """
+    if parametros.get('referencia', 'shift') != 'shift':
+        raise ValueError("El reprocesamiento en paralelo requiere referencia='shift'")
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+
+    n_muestras = len(Captura(path))
+    lock_in = _crear_lock_in(path, parametros)
+    R = lock_in.factor_decimacion()
+    block_size = R * max(1, block_size // R)
+    # Solo se usan las muestras que completan una fila de salida
+    n_muestras -= n_muestras % R
+
+    w = calentamiento(path, parametros, epsilon)
+    if segmento is None:
+        segmento = max(math.ceil(n_muestras / (4*procesos)), 10*w, block_size)
+    # Los segmentos empiezan en multiplos del factor de decimación para que las etapas queden en fase
+    segmento = R * math.ceil(segmento / R)
+
+    tareas = [(path, parametros, max(0, inicio - w), inicio, min(inicio + segmento, n_muestras), block_size)
+              for inicio in range(0, n_muestras, segmento)]
+
+    out = None if sink is not None else np.empty(n_muestras // R, dtype=LOCKIN_DTYPE)
+    i = 0
+    with ProcessPoolExecutor(procesos) as pool:
+        for bloque in pool.map(_procesar_segmento, tareas):
+            if sink is not None:
+                sink.write(bloque)
+            else:
+                out[i:i + len(bloque)] = bloque
+            i += len(bloque)
+    return out
@@ -0,0 +1,175 @@
+import json
+import os
+import time
+import numpy as np
+from ..LockIn import LOCKIN_DTYPE
+
+
+# Formato del archivo de resultados: cabecera de TAMANO_CABECERA bytes (MAGIC seguido de un JSON con el dtype) y
+# luego los registros uno detras de otro, como en memoria.
+MAGIC = b'LKINRES1'
+TAMANO_CABECERA = 4096
+
+
+class SinkBinario():
+    """
+    Sink que guarda los resultados del lock-in en un archivo binario de registros.
+
+    Las filas se copian a un bloque preasignado y se escriben al archivo cuando se llena (filas) o cuando pasó más de periodo segundos desde la última escritura, en lugar de formatear texto por muestra. Con fsync=True cada escritura además se fuerza al disco. El archivo se abre con cargar_resultados.
+
+    Se puede usar directamente o como sink de un Pipeline.
+
+    Ejemplo de utilizacion
+    ```python
+    sink = SinkBinario("mediciones.bin")
+    pipeline = Pipeline(lock_in, sink, block_size=500)
+    ```
+    """
+
+    def __init__(self, path: str, dtype=LOCKIN_DTYPE, filas: int = 65536, periodo: float = 1.0, fsync: bool = False) -> None:
+        """
+        Args:
+            path (str): Archivo de resultados. Si existe se reemplaza.
+            dtype (numpy dtype): Dtype de los resultados, por ejemplo LOCKIN_DTYPE o bank_dtype(n).
+            filas (int): Filas del bloque preasignado; al llenarse se escribe al archivo.
+            periodo (float): Tiempo máximo en segundos entre escrituras al archivo. Se controla en cada write.
+            fsync (bool): Si es True, cada escritura se fuerza al disco con os.fsync.
+        """
+        if filas < 1:
+            raise ValueError("El bloque debe tener al menos una fila")
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.periodo = periodo
+        self.fsync = fsync
+        self.n_filas = 0
+        self._bloque = np.empty(filas, dtype=self.dtype)
+        self._n = 0
+
+        cabecera = {'version': 1, 'dtype': np.lib.format.dtype_to_descr(self.dtype), 't_inicio': time.time()}
+        datos = MAGIC + json.dumps(cabecera).encode()
+        if len(datos) > TAMANO_CABECERA:
+            raise ValueError("La cabecera de resultados es demasiado grande")
+        self._archivo = open(path, 'wb')
+        self._archivo.write(datos.ljust(TAMANO_CABECERA, b' '))
+        self._ultima = time.perf_counter()
+
+    def write(self, out: np.ndarray) -> None:
+        """
+        Agrega un bloque de resultados. Los datos se copian, por lo que out se puede reutilizar.
+
+        Args:
+            out (numpy array): Arreglo estructurado con el dtype del sink.
+        """
+        if out.dtype != self.dtype:
+            raise ValueError("El bloque no tiene el dtype del sink")
+        i = 0
+        while i < len(out):
+            n = min(len(out) - i, len(self._bloque) - self._n)
+            self._bloque[self._n:self._n + n] = out[i:i + n]
+            self._n += n
+            i += n
+            if self._n == len(self._bloque):
+                self.flush()
+        self.n_filas += len(out)
+        if time.perf_counter() - self._ultima >= self.periodo:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Escribe al archivo las filas pendientes.
+        """
+        if self._n > 0:
+            self._archivo.write(self._bloque[:self._n].data)
+            self._n = 0
+        self._archivo.flush()
+        if self.fsync:
+            os.fsync(self._archivo.fileno())
+        self._ultima = time.perf_counter()
+
+    def close(self) -> None:
+        if self._archivo.closed:
+            return
+        self.flush()
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class SinkCSV():
+    """
+    Sink que guarda algunos campos de los resultados en un archivo de texto separado por comas, como lo hacía main.py.
+
+    Cada bloque se escribe con una sola llamada a np.savetxt. Es más lento y ocupa más que SinkBinario; para convertir un archivo binario ya grabado usar exportar_csv.
+    """
+
+    def __init__(self, path: str, campos: tuple = ('r', 'theta'), modo: str = 'a', delimiter: str = ', ') -> None:
+        """
+        Args:
+            path (str): Archivo CSV.
+            campos (tuple): Campos de los resultados que se guardan, en orden.
+            modo (str): 'a' para agregar al archivo o 'w' para reemplazarlo.
+            delimiter (str): Separador de columnas.
+        """
+        if modo not in ('a', 'w'):
+            raise ValueError("El modo debe ser 'a' o 'w'")
+        self.campos = list(campos)
+        self.delimiter = delimiter
+        self._archivo = open(path, modo)
+
+    def write(self, out: np.ndarray) -> None:
+        np.savetxt(self._archivo, np.column_stack([out[c] for c in self.campos]), delimiter=self.delimiter)
+
+    def close(self) -> None:
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def cargar_resultados(path: str) -> np.ndarray:
+    """
+    Abre un archivo de SinkBinario como un mapa de memoria de solo lectura, sin leerlo: abrir resultados de varios GB es inmediato.
+
+    Args:
+        path (str): Archivo de resultados.
+
+    Returns:
+        numpy array: Arreglo estructurado con las filas completas del archivo.
+    """
+    with open(path, 'rb') as f:
+        datos = f.read(TAMANO_CABECERA)
+    if len(datos) < TAMANO_CABECERA or not datos.startswith(MAGIC):
+        raise ValueError(f"{path} no es un archivo de resultados")
+    cabecera = json.loads(datos[len(MAGIC):].decode())
+    dtype = np.lib.format.descr_to_dtype(cabecera['dtype'])
+
+    n = (os.path.getsize(path) - TAMANO_CABECERA) // dtype.itemsize
+    if n == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=TAMANO_CABECERA, shape=(n,))
+
+
+def exportar_csv(path: str, path_csv: str, campos: tuple = None, filas: int = 65536, delimiter: str = ', ') -> None:
+    """
+    Convierte un archivo de resultados binario a CSV, por tramos para no cargarlo entero en memoria.
+
+    Args:
+        path (str): Archivo de resultados de SinkBinario.
+        path_csv (str): Archivo CSV a crear.
+        campos (tuple, opcional): Campos a exportar. Por defecto todos.
+        filas (int): Filas convertidas por tramo.
+        delimiter (str): Separador de columnas.
+    """
+    resultados = cargar_resultados(path)
+    if campos is None:
+        campos = resultados.dtype.names
+    with SinkCSV(path_csv, campos, modo='w', delimiter=delimiter) as sink:
+        for i in range(0, len(resultados), filas):
+            sink.write(resultados[i:i + filas])
@@ -0,0 +1,157 @@
+import math
+import time
+import numpy as np
+from ..instrumentacion.instrumentacion import Histograma
+
+
+def estadisticas_jitter(t: np.ndarray, fs: float = None) -> dict:
+    """
+    Estadísticas de los intervalos entre marcas de tiempo de muestras adquiridas por software.
+
+    Args:
+        t (numpy array): Marcas de tiempo monotónicas en segundos.
+        fs (float, opcional): Frecuencia de muestreo pedida. Si se pasa, también se informa el desvío respecto de la grilla ideal k/fs.
+
+    Returns:
+        dict: n, fs_real (inversa del intervalo medio), jitter_rms (desvío estándar de los intervalos), jitter_p99 y dt_max en segundos, y con fs el error de tasa relativo y el desvío rms y máximo respecto de la grilla ideal.
+    """
+    t = np.asarray(t, dtype=float)
+    if len(t) < 2:
+        raise ValueError("Se necesitan al menos dos marcas de tiempo")
+    dt = np.diff(t)
+    media = dt.mean()
+    estadisticas = {
+        'n': len(t),
+        'fs_real': 1/media,
+        'jitter_rms': float(dt.std()),
+        'jitter_p99': float(np.percentile(np.abs(dt - media), 99)),
+        'dt_max': float(dt.max()),
+    }
+    if fs is not None:
+        desvio = t - t[0] - np.arange(len(t))/fs
+        desvio -= desvio.mean()
+        estadisticas['error_tasa'] = media*fs - 1
+        estadisticas['desvio_grilla_rms'] = float(np.sqrt(np.mean(desvio**2)))
+        estadisticas['desvio_grilla_max'] = float(np.abs(desvio).max())
+    return estadisticas
+
+
+def estadisticas_skew(t_ref: np.ndarray, t_med: np.ndarray) -> dict:
+    """
+    Estadísticas de la diferencia entre las marcas de tiempo de la medición y de la referencia de cada muestra.
+
+    Args:
+        t_ref (numpy array): Marcas de tiempo de la referencia.
+        t_med (numpy array): Marcas de tiempo de la medición.
+
+    Returns:
+        dict: Media, desvío estándar y máximo absoluto de t_med - t_ref en segundos.
+    """
+    skew = np.asarray(t_med, dtype=float) - np.asarray(t_ref, dtype=float)
+    return {'skew_medio': float(skew.mean()), 'skew_std': float(skew.std()), 'skew_max': float(np.abs(skew).max())}
+
+
+def ajustar_fase(t: np.ndarray, ref: np.ndarray, fr: float) -> tuple:
+    """
+    Ajusta por cuadrados mínimos ref = A*cos(2*pi*fr*t + fase) a muestras con tiempos no uniformes.
+
+    Args:
+        t (numpy array): Tiempos de las muestras en segundos.
+        ref (numpy array): Muestras de la referencia.
+        fr (float): Frecuencia de la referencia.
+
+    Returns:
+        tuple: Amplitud y fase en radianes.
+    """
+    w = 2*np.pi*fr*np.asarray(t, dtype=float)
+    # ref = a*cos(w) + b*sin(w), con a = A*cos(fase) y b = -A*sin(fase)
+    (a, b), *_ = np.linalg.lstsq(np.column_stack((np.cos(w), np.sin(w))), np.asarray(ref, dtype=float), rcond=None)
+    return float(np.hypot(a, b)), float(np.arctan2(-b, a))
+
+
+class Planificador():
+    """
+    Planificador de la adquisición por software contra instantes absolutos t0 + k/fs medidos con time.perf_counter.
+
+    A diferencia de un sleep fijo después de cada lectura, el período no depende de lo que tarden la lectura y el procesamiento. Hasta margen_spin segundos antes del instante se duerme, y desde ahí se espera activamente, para no depender de la resolución de time.sleep. Si una iteración se atrasa más de un período, los instantes que ya pasaron se cuentan como perdidos y se espera al siguiente instante de la grilla, sin acumular atraso ni leer en ráfagas ni fuera de la grilla.
+
+    Ejemplo de utilizacion
+    ```python
+    planificador = Planificador(fs=200)
+    while midiendo:
+        planificador.esperar()
+        ref, med = adc.read()
+    print(planificador.resumen())
+    ```
+    """
+
+    def __init__(self, fs: float, margen_spin: float = 1e-3) -> None:
+        """
+        Args:
+            fs (float): Frecuencia de muestreo pedida.
+            margen_spin (float): Tiempo en segundos antes de cada instante en que se deja de dormir y se espera activamente.
+        """
+        if fs <= 0:
+            raise ValueError("La frecuencia de muestreo debe ser positiva")
+        self.fs = fs
+        self.margen_spin = margen_spin
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Descarta los instantes y las estadísticas: el próximo esperar() define un nuevo t0.
+        """
+        self.t0 = None
+        self.k = 0
+        self.n = 0
+        self.perdidos = 0
+        self.atraso = Histograma()
+        self._t_primero = self._t_ultimo = None
+
+    def esperar(self) -> float:
+        """
+        Espera hasta el próximo instante de muestreo.
+
+        Returns:
+            float: Instante (time.perf_counter) en que terminó la espera.
+        """
+        ahora = time.perf_counter()
+        if self.t0 is None:
+            self.t0 = ahora
+        objetivo = self.t0 + self.k/self.fs
+        if ahora - objetivo > 1/self.fs:
+            # Instantes que ya pasaron: se pierden y se espera al proximo de la grilla
+            saltados = math.ceil((ahora - objetivo) * self.fs)
+            self.perdidos += saltados
+            self.k += saltados
+            objetivo = self.t0 + self.k/self.fs
+        dormir = objetivo - ahora - self.margen_spin
+        if dormir > 0:
+            time.sleep(dormir)
+        while time.perf_counter() < objetivo:
+            pass
+
+        t = time.perf_counter()
+        self.atraso.registrar(max(t - objetivo, 0.0))
+        if self._t_primero is None:
+            self._t_primero = t
+        self._t_ultimo = t
+        self.n += 1
+        self.k += 1
+        return t
+
+    def fs_real(self) -> float:
+        """
+        Returns:
+            float: Frecuencia lograda desde el primer instante, contando los instantes perdidos como no muestreados. Antes de dos esperas devuelve fs.
+        """
+        if self.n < 2 or self._t_ultimo <= self._t_primero:
+            return self.fs
+        return (self.n - 1) / (self._t_ultimo - self._t_primero)
+
+    def resumen(self) -> dict:
+        """
+        Returns:
+            dict: fs pedida y lograda, esperas, instantes perdidos y estadísticas del atraso respecto de cada instante (ver Histograma.resumen).
+        """
+        return {'fs': self.fs, 'fs_real': self.fs_real(), 'n': self.n, 'perdidos': self.perdidos, 'atraso': self.atraso.resumen()}
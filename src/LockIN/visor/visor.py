@@ -0,0 +1,317 @@
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from ..LockIn import LOCKIN_DTYPE
+
+
+class AnilloCompartido():
+    """
+    Buffer circular de resultados en memoria compartida, con un solo proceso escritor y lectores en otros procesos.
+
+    El escritor nunca espera: si un lector se atrasa más que la capacidad del anillo, las filas más viejas se pisan y el lector las pierde (y las cuenta). Al comienzo de la memoria hay dos contadores del total de filas, como en un seqlock: el de filas reservadas se publica antes de copiar cada bloque y el de filas escritas después. El lector toma las filas hasta el contador de escritas y, después de copiarlas, vuelve a leer el de reservadas y descarta las filas que el escritor pudo estar pisando mientras copiaba, aunque ese bloque todavía no haya terminado de escribirse.
+    """
+
+    # bytes reservados al comienzo para los contadores
+    cabecera = 64
+
+    def __init__(self, capacidad: int = None, dtype=LOCKIN_DTYPE, nombre: str = None) -> None:
+        """
+        Args:
+            capacidad (int, opcional): Filas del anillo. Necesaria para crearlo.
+            dtype (numpy dtype): Dtype de las filas.
+            nombre (str, opcional): Nombre de un anillo ya creado en otro proceso al que conectarse. Si es None se crea uno nuevo.
+        """
+        self.dtype = np.dtype(dtype)
+        self.propietario = nombre is None
+        if self.propietario:
+            if capacidad is None or capacidad < 1:
+                raise ValueError("La capacidad del anillo debe ser al menos 1")
+            self.shm = shared_memory.SharedMemory(create=True, size=self.cabecera + capacidad*self.dtype.itemsize)
+        else:
+            self.shm = shared_memory.SharedMemory(name=nombre)
+            capacidad = (self.shm.size - self.cabecera) // self.dtype.itemsize
+        self.capacidad = capacidad
+        self.nombre = self.shm.name
+        # contadores: filas escritas, anillo cerrado por el escritor y filas reservadas (escritas o en escritura)
+        self._contadores = np.ndarray(3, dtype=np.int64, buffer=self.shm.buf)
+        self._datos = np.ndarray(capacidad, dtype=self.dtype, buffer=self.shm.buf, offset=self.cabecera)
+        if self.propietario:
+            self._contadores[:] = 0
+        self.perdidas = 0
+
+    def escritos(self) -> int:
+        return int(self._contadores[0])
+
+    def cerrado(self) -> bool:
+        return bool(self._contadores[1])
+
+    def write(self, out: np.ndarray) -> None:
+        """
+        Copia un bloque al anillo. No espera a los lectores.
+
+        Args:
+            out (numpy array): Bloque de filas con el dtype del anillo.
+        """
+        n = len(out)
+        escritos = int(self._contadores[0])
+        if n > self.capacidad:
+            # Solo entran las ultimas filas
+            escritos += n - self.capacidad
+            out = out[n - self.capacidad:]
+            n = self.capacidad
+        # Se publican las filas reservadas antes de pisar las viejas, y las escritas al terminar
+        self._contadores[2] = escritos + n
+        i = escritos % self.capacidad
+        m = min(n, self.capacidad - i)
+        self._datos[i:i + m] = out[:m]
+        self._datos[:n - m] = out[m:]
+        self._contadores[0] = escritos + n
+
+    def leer(self, desde: int) -> tuple:
+        """
+        Copia las filas escritas desde la fila desde.
+
+        Args:
+            desde (int): Índice (en el total de filas escritas) de la primera fila a leer.
+
+        Returns:
+            tuple: Filas leídas y el índice de la próxima fila a leer.
+        """
+        escritos = int(self._contadores[0])
+        inicio = max(desde, escritos - self.capacidad)
+        idx = np.arange(inicio, escritos) % self.capacidad
+        filas = self._datos[idx]
+        # Filas que el escritor pudo pisar durante la copia, incluido un bloque que todavia esta escribiendo
+        pisadas = int(self._contadores[2]) - self.capacidad - inicio
+        if pisadas > 0:
+            filas = filas[pisadas:]
+            inicio += pisadas
+        self.perdidas += inicio - desde
+        return filas, escritos
+
+    def terminar(self) -> None:
+        """
+        Marca el anillo como cerrado para los lectores, sin liberarlo: no se van a escribir más filas.
+        """
+        self._contadores[1] = 1
+
+    def close(self) -> None:
+        """
+        Cierra el anillo. En el escritor además marca el anillo como cerrado para los lectores y lo elimina: los lectores ya conectados lo siguen viendo hasta cerrarlo.
+        """
+        if self.propietario:
+            self.terminar()
+        del self._contadores, self._datos
+        self.shm.close()
+        if self.propietario:
+            self.shm.unlink()
+
+
+class HistorialMinMax():
+    """
+    Historial de una señal reducido a pares mínimo/máximo por columna de píxeles.
+
+    Se guardan a lo sumo 2*columnas intervalos; cuando se llenan, se unen de a pares y el ancho de cada intervalo se duplica. Así el costo de agregar muestras y de dibujar no crece con la duración de la medición, y los picos no desaparecen al reducir.
+    """
+
+    def __init__(self, columnas: int) -> None:
+        """
+        Args:
+            columnas (int): Columnas de píxeles del gráfico.
+        """
+        self.columnas = columnas
+        self.ancho = 1
+        self.t = np.empty(0)
+        self.min = np.empty(0)
+        self.max = np.empty(0)
+        self._pendientes_t = np.empty(0)
+        self._pendientes_v = np.empty(0)
+
+    def agregar(self, t: np.ndarray, v: np.ndarray) -> None:
+        """
+        Agrega muestras al historial.
+
+        Args:
+            t (numpy array): Tiempos de las muestras.
+            v (numpy array): Valores de las muestras.
+        """
+        t = np.concatenate((self._pendientes_t, t))
+        v = np.concatenate((self._pendientes_v, v))
+        while len(v) >= self.ancho:
+            # Intervalos completos que entran antes de llegar a 2*columnas
+            n = min(len(v) // self.ancho, 2*self.columnas - len(self.t)) * self.ancho
+            bloques = v[:n].reshape(-1, self.ancho)
+            self.t = np.concatenate((self.t, t[:n:self.ancho]))
+            self.min = np.concatenate((self.min, bloques.min(axis=1)))
+            self.max = np.concatenate((self.max, bloques.max(axis=1)))
+            t, v = t[n:], v[n:]
+            if len(self.t) == 2*self.columnas:
+                # Se unen los intervalos de a pares
+                self.t = self.t[::2]
+                self.min = self.min.reshape(-1, 2).min(axis=1)
+                self.max = self.max.reshape(-1, 2).max(axis=1)
+                self.ancho *= 2
+        self._pendientes_t, self._pendientes_v = t, v
+
+    def curva(self) -> tuple:
+        """
+        Returns:
+            tuple: Tiempos y valores para dibujar la envolvente, alternando mínimo y máximo de cada intervalo.
+        """
+        return np.repeat(self.t, 2), np.column_stack((self.min, self.max)).ravel()
+
+
+def _correr_visor(nombre: str, descr, campos: tuple, columnas: int, fps: float, cerrar_al_terminar: bool, conectado, terminado_evento) -> None:
+    # Proceso del visor: lee el anillo y dibuja con blitting, sin comunicarse con el proceso de adquisicion
+    anillo = AnilloCompartido(nombre=nombre, dtype=np.lib.format.descr_to_dtype(descr))
+    conectado.set()
+    import matplotlib.pyplot as plt
+
+    historiales = [HistorialMinMax(columnas) for _ in campos]
+
+    fig, ejes = plt.subplots(len(campos), 1, sharex=True, squeeze=False)
+    ejes = ejes[:, 0]
+    lineas = [eje.plot([], [], lw=1, animated=True)[0] for eje in ejes]
+    for eje, campo in zip(ejes, campos):
+        eje.set_ylabel(campo)
+        eje.grid(True)
+        eje.set_xlim(0, 1)
+        eje.set_ylim(-1, 1)
+    ejes[-1].set_xlabel('t [s]')
+
+    fondo = [None]
+    def guardar_fondo(evento=None):
+        fondo[0] = fig.canvas.copy_from_bbox(fig.bbox)
+    fig.canvas.mpl_connect('draw_event', guardar_fondo)
+    plt.show(block=False)
+    fig.canvas.draw()
+
+    desde = 0
+    terminado = False
+    while plt.fignum_exists(fig.number):
+        inicio = time.perf_counter()
+        if not terminado:
+            terminado = anillo.cerrado()
+            filas, desde = anillo.leer(desde)
+            for historial, campo in zip(historiales, campos):
+                historial.agregar(filas['t'], filas[campo])
+            if terminado:
+                # Ya se leyeron las ultimas filas: el escritor puede liberar el anillo
+                anillo.close()
+                terminado_evento.set()
+
+        # Los limites solo se amplian (duplicando), por lo que el redibujado completo es poco frecuente
+        redibujar = False
+        for eje, linea, historial in zip(ejes, lineas, historiales):
+            x, y = historial.curva()
+            linea.set_data(x, y)
+            if len(x) == 0:
+                continue
+            x0, x1 = eje.get_xlim()
+            if x[-1] > x1:
+                eje.set_xlim(x0, max(2*x1, x[-1]))
+                redibujar = True
+            y0, y1 = eje.get_ylim()
+            if y.min() < y0 or y.max() > y1:
+                margen = 0.1*(y.max() - y.min() or 1)
+                eje.set_ylim(min(y0, y.min() - margen), max(y1, y.max() + margen))
+                redibujar = True
+        ejes[0].set_title(f"filas perdidas por el visor: {anillo.perdidas}")
+
+        if redibujar:
+            fig.canvas.draw()
+        fig.canvas.restore_region(fondo[0])
+        for eje, linea in zip(ejes, lineas):
+            eje.draw_artist(linea)
+        fig.canvas.blit(fig.bbox)
+        fig.canvas.flush_events()
+
+        if terminado and cerrar_al_terminar:
+            break
+        time.sleep(max(0.0, 1/fps - (time.perf_counter() - inicio)))
+
+    if not terminado:
+        anillo.close()
+        terminado_evento.set()
+    plt.close(fig)
+
+
+class VisorEnVivo():
+    """
+    Gráfico en vivo de los resultados del lock-in en un proceso separado.
+
+    write(out) solo copia el bloque a un AnilloCompartido, sin esperar al visor, por lo que se puede llamar desde el lazo de adquisición o usar como sink de un Pipeline: una ventana lenta o congelada pierde filas (y las muestra en el título) pero no agrega latencia a la adquisición. El visor reduce cada campo a mínimo/máximo por columna de píxeles, de forma que el costo de cada cuadro no crece con la duración de la medición.
+
+    Ejemplo de utilizacion
+    ```python
+    visor = VisorEnVivo(campos=('r', 'theta'))
+    visor.start()
+    for i in range(n_bloques):
+        out = lock_in.process_block(*lock_in.medir_bloque(500))
+        visor.write(out)
+    visor.close(esperar=True)
+    ```
+    """
+
+    def __init__(self, capacidad: int = 1 << 20, campos: tuple = ('r', 'theta'), dtype=LOCKIN_DTYPE, columnas: int = 1000, fps: float = 20, cerrar_al_terminar: bool = False) -> None:
+        """
+        Args:
+            capacidad (int): Filas del anillo compartido. Es el atraso máximo del visor antes de perder filas.
+            campos (tuple): Campos de los resultados a graficar, uno por eje. Deben ser escalares.
+            dtype (numpy dtype): Dtype de los resultados, con un campo t.
+            columnas (int): Columnas de píxeles aproximadas del gráfico.
+            fps (float): Cuadros por segundo.
+            cerrar_al_terminar (bool): Si es True, la ventana se cierra sola después de close(); si no, queda abierta hasta que se cierre.
+        """
+        self.capacidad = capacidad
+        self.campos = tuple(campos)
+        self.dtype = np.dtype(dtype)
+        self.columnas = columnas
+        self.fps = fps
+        self.cerrar_al_terminar = cerrar_al_terminar
+        self.anillo = None
+        self.proceso = None
+
+    def start(self, timeout: float = 30) -> None:
+        """
+        Crea el anillo compartido, inicia el proceso del visor y espera a que se conecte al anillo.
+
+        Args:
+            timeout (float): Espera máxima en segundos.
+        """
+        if self.proceso is not None:
+            raise RuntimeError("El visor ya fue iniciado")
+        self.anillo = AnilloCompartido(self.capacidad, self.dtype)
+        contexto = mp.get_context('spawn')
+        conectado = contexto.Event()
+        self._terminado = contexto.Event()
+        self.proceso = contexto.Process(target=_correr_visor, name="lockin-visor",
+                                        args=(self.anillo.nombre, np.lib.format.dtype_to_descr(self.dtype), self.campos, self.columnas, self.fps, self.cerrar_al_terminar, conectado, self._terminado))
+        self.proceso.start()
+        if not conectado.wait(timeout):
+            self.proceso.terminate()
+            self.anillo.close()
+            self.anillo = None
+            raise RuntimeError("El visor no se conectó al anillo compartido")
+
+    def write(self, out: np.ndarray) -> None:
+        self.anillo.write(out)
+
+    def close(self, esperar: bool = False, timeout: float = 1.0) -> None:
+        """
+        Indica al visor que no hay más datos y libera el anillo. El visor conserva lo que ya leyó.
+
+        Args:
+            esperar (bool): Si es True, espera a que se cierre la ventana del visor.
+            timeout (float): Espera máxima en segundos a que el visor lea las últimas filas.
+        """
+        if self.anillo is None:
+            return
+        # Se avisa que no hay mas filas y se espera a que el visor lea las ultimas antes de liberar el anillo
+        self.anillo.terminar()
+        self._terminado.wait(timeout)
+        self.anillo.close()
+        self.anillo = None
+        if esperar:
+            self.proceso.join()
@@ -0,0 +1,310 @@
+"""
+Benchmarks de los caminos criticos del DSP y del driver, sin hardware.
+
+Mide muestras por segundo y latencia por muestra de:
+- IIR_filtter.filter para ordenes 1 a 8
+- IIRFilterBank (filter y filter_block) frente a los mismos filtros como IIR_filtter separados
+- desfasador_shift.desfasing para distintas relaciones fs/fr
+- LockIn.lock_in (muestra a muestra) y LockIn.process_block
+- la adquisicion y el lock-in completos con ADC_Sintetico
+- la decodificacion de reportes de usb_1408FS (AIn y AInScan) y ADC_USB1408FS.read_block, alimentados con paquetes grabados
+
+Cada benchmark se mide intercalado con un kernel de referencia que no usa codigo del repositorio (un biquad en Python puro para los caminos muestra a muestra, operaciones de NumPy para los caminos por bloques), tomando el mejor tiempo de varias repeticiones de cada uno. Los resultados se guardan en JSON y se comparan con una baseline por la relacion con la referencia, no por las muestras/s absolutas, que dependen de la maquina y de su carga: si algun benchmark es mas lento que la baseline por mas de la tolerancia, el script termina con error.
+
+La baseline sigue siendo propia de una version de Python y NumPy; hay que regenerarla con --guardar-baseline al cambiar de entorno y en cada cambio que modifique a proposito un camino medido.
+
+Uso (desde src/, como main.py):
+    python benchmark.py                       # compara con benchmark_baseline.json
+    python benchmark.py --guardar-baseline    # reemplaza la baseline
+    python benchmark.py --salida res.json --tolerancia 0.5
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import struct
+import sys
+import time
+
+import numpy as np
+
+from LockIN.LockIn import LockIn
+from LockIN.ADC.Driver.Driver import Driver
+from LockIN.ADC.ADC_Sintetico import ADC_Sintetico
+from LockIN.desfasador_shift.desfasador_shift import desfasador_shift
+from LockIN.filtro_butter.filtro_butter import IIR_filtter, IIRFilterBank
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+class DriverNulo(Driver):
+    """Driver sin hardware, solo para construir un LockIn."""
+
+    def connect(self):
+        pass
+
+    def read(self):
+        return 0.0
+
+    def identify(self):
+        return "nulo"
+
+
+class UdevGrabado():
+    """
+    Reemplazo del handle de libusb que devuelve reportes grabados, para medir la decodificacion de usb_1408FS sin la placa.
+    """
+
+    def __init__(self):
+        # Reporte de AIn: id del reporte y lectura de 16 bits
+        self.reporte_ain = bytes([0x10]) + struct.pack('<h', 0x1234)
+        # Paquete de AInScan: 31 muestras (14 bits desplazados 2) y contador de paquetes
+        muestras = (np.round(8000 * np.sin(np.arange(31) / 5)).astype(np.int16) << 2)
+        self.paquete_scan = muestras.astype('<i2').tobytes() + struct.pack('<H', 0)
+
+    def controlWrite(self, *args, **kwargs):
+        return 0
+
+    def interruptRead(self, endpoint, largo, timeout=0):
+        if largo == 3:
+            return self.reporte_ain
+        return self.paquete_scan
+
+
+def referencia_python(x):
+    """
+    Kernel de referencia para los benchmarks muestra a muestra: un biquad en Python puro, sin codigo del repositorio.
+    """
+    z1 = z2 = 0.0
+    for v in x:
+        y = 0.2 * v + z1
+        z1 = 0.3 * v - 0.4 * y + z2
+        z2 = 0.1 * v - 0.05 * y
+    return z1
+
+
+def referencia_numpy(x):
+    """
+    Kernel de referencia para los benchmarks por bloques: operaciones vectorizadas de NumPy, sin codigo del repositorio.
+    """
+    return np.cumsum(np.abs(x * np.exp(1j * x))).sum()
+
+
+def medir(funcion, muestras, referencia, x_referencia, repeticiones=9):
+    """
+    Ejecuta funcion varias veces, intercalada con un kernel de referencia, y devuelve el mejor tiempo de cada uno.
+
+    Las muestras por segundo absolutas dependen de la maquina y de su carga en el momento; la relacion con el kernel de referencia, medido en la misma corrida y en las mismas repeticiones, es la que se compara con la baseline.
+
+    Args:
+        funcion (callable): Funcion que procesa `muestras` muestras.
+        muestras (int): Muestras procesadas por llamada.
+        referencia (callable): Kernel de referencia (referencia_python o referencia_numpy).
+        x_referencia (numpy array): Entrada del kernel de referencia.
+        repeticiones (int): Cantidad de repeticiones.
+
+    Returns:
+        dict: Muestras por segundo, latencia por muestra en segundos y relacion de muestras por segundo con la referencia.
+    """
+    mejor = mejor_referencia = np.inf
+    # Como timeit, sin el recolector de basura durante las mediciones
+    recolector = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            referencia(x_referencia)
+            t1 = time.perf_counter()
+            funcion()
+            t2 = time.perf_counter()
+            mejor_referencia = min(mejor_referencia, t1 - t0)
+            mejor = min(mejor, t2 - t1)
+    finally:
+        if recolector:
+            gc.enable()
+    muestras_por_segundo = muestras / mejor
+    return {'muestras_por_segundo': muestras_por_segundo, 'latencia_por_muestra': mejor / muestras,
+            'relativo': muestras_por_segundo / (len(x_referencia) / mejor_referencia)}
+
+
+def bench_filtro(n):
+    resultados = {}
+    x = np.random.default_rng(0).standard_normal(n)
+    for orden in range(1, 9):
+        filtro = IIR_filtter(10, orden, 1000)
+        def correr():
+            for v in x:
+                filtro.filter(float(v))
+        resultados[f'IIR_filtter.filter[orden={orden}]'] = medir(correr, n, referencia_python, x)
+    return resultados
+
+
+def bench_banco(n):
+    # Banco de filtros distintos contra los mismos filtros separados, en muestras por filtro: muestras/s comparables
+    resultados = {}
+    fcs = np.linspace(1, 40, 100)
+    x = np.random.default_rng(0).standard_normal(20 * n)
+    banco = IIRFilterBank(fcs, 4, 1000)
+    filtros = [IIR_filtter(float(fc), 4, 1000) for fc in fcs]
+    resultados['IIRFilterBank.filter_block[N=100]'] = medir(lambda: banco.filter_block(x), len(x) * len(fcs),
+                                                            referencia_numpy, x)
+    resultados['IIR_filtter.filter_block[x100]'] = medir(lambda: [f.filter_block(x) for f in filtros],
+                                                         len(x) * len(fcs), referencia_numpy, x)
+
+    x = x[:n // 10]
+    def correr_banco():
+        for v in x:
+            banco.filter(v)
+    def correr_separados():
+        for v in x:
+            for f in filtros:
+                f.filter(v)
+    resultados['IIRFilterBank.filter[N=100]'] = medir(correr_banco, len(x) * len(fcs), referencia_python, x)
+    resultados['IIR_filtter.filter[x100]'] = medir(correr_separados, len(x) * len(fcs), referencia_python, x)
+    return resultados
+
+
+def bench_desfasador(n):
+    resultados = {}
+    x = np.random.default_rng(0).standard_normal(n)
+    for relacion in (8, 35, 100, 1000):
+        desf = desfasador_shift(relacion * 10, 10)
+        def correr():
+            for v in x:
+                desf.desfasing(v)
+        resultados[f'desfasador_shift.desfasing[fs/fr={relacion}]'] = medir(correr, n, referencia_python, x)
+    return resultados
+
+
+def bench_lock_in(n):
+    resultados = {}
+    t = np.arange(n) / 1000
+    ref = np.sin(2 * np.pi * 13 * t)
+    med = 0.5 * np.sin(2 * np.pi * 13 * t + 0.3)
+    lock_in = LockIn(13, 1000, DriverNulo(), DriverNulo())
+    def correr():
+        for r, m in zip(ref, med):
+            lock_in.lock_in(float(r), float(m))
+    resultados['LockIn.lock_in'] = medir(correr, n, referencia_python, ref)
+
+    n_bloque = 100 * n
+    ref = np.resize(ref, n_bloque)
+    med = np.resize(med, n_bloque)
+    resultados['LockIn.process_block'] = medir(lambda: lock_in.process_block(ref, med), n_bloque, referencia_numpy, ref)
+
+    sintetico = LockIn(13, 1000, ADC_Sintetico(13, amplitud=0.5, fase=0.3, ruido_blanco=0.01))
+    sintetico.start_stream(1000)
+    resultados['LockIn+ADC_Sintetico'] = medir(lambda: sintetico.process_block(*sintetico.medir_bloque(n_bloque)), n_bloque,
+                                           referencia_numpy, ref)
+    sintetico.stop_stream()
+    return resultados
+
+
+def bench_usb(n):
+    try:
+        from LockIN.ADC.usb_1408FS.usb_1408FS import usb_1408FS, table
+        from LockIN.ADC.ADC_USB1408FS import ADC_USB1408FS
+    except (ImportError, OSError) as e:
+        print(f"Se omiten los benchmarks de usb_1408FS: {e}")
+        return {}
+
+    # Placa sin abrir: solo el handle grabado y tablas de calibracion
+    placa = usb_1408FS.__new__(usb_1408FS)
+    placa.udev = UdevGrabado()
+    placa.CalDF = [[table() for _ in range(8)] for _ in range(4)]
+    for fila in placa.CalDF:
+        for cal in fila:
+            cal.slope, cal.intercept = 1.0, 0.0
+
+    resultados = {}
+    x = np.random.default_rng(0).standard_normal(n)
+    def correr_ain():
+        for _ in range(n):
+            placa.AIn(1, usb_1408FS.BP_10_00V)
+    resultados['usb_1408FS.AIn'] = medir(correr_ain, n, referencia_python, x)
+
+    n_scan = 31 * (n // 31 + 1)
+    resultados['usb_1408FS.AInScan'] = medir(lambda: placa.AInScan(1, 1, [usb_1408FS.BP_10_00V], n_scan, 1000, 1), n_scan,
+                                         referencia_python, x)
+
+    adc = ADC_USB1408FS("grabado", 10, 1)
+    adc.adc = placa
+    adc.start_stream(1000)
+    n_bloque = 100 * n_scan
+    resultados['ADC_USB1408FS.read_block'] = medir(lambda: adc.read_block(n_bloque), n_bloque, referencia_numpy,
+                                               np.resize(x, n_bloque))
+    return resultados
+
+
+def comparar(resultados, baseline, tolerancia):
+    """
+    Compara los resultados con la baseline, por la relacion de cada benchmark con el kernel de referencia medido en la misma corrida.
+
+    Returns:
+        list: Descripcion de cada regresion encontrada.
+    """
+    regresiones = []
+    for nombre, base in baseline['resultados'].items():
+        if nombre not in resultados or 'relativo' not in base:
+            continue
+        actual = resultados[nombre]['relativo']
+        esperado = base['relativo']
+        relacion = actual / esperado
+        estado = 'OK'
+        if relacion < 1 - tolerancia:
+            estado = 'REGRESION'
+            regresiones.append(f"{nombre}: {actual:.3g}x la referencia, baseline {esperado:.3g}x")
+        print(f"{estado:10s} {nombre:45s} {resultados[nombre]['muestras_por_segundo']:12.4g} muestras/s  "
+              f"({relacion:6.2f}x baseline)")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del DSP y del driver del Lock-In, sin hardware")
+    parser.add_argument('--muestras', type=int, default=5000, help="muestras por benchmark muestra a muestra")
+    parser.add_argument('--salida', default=None, help="archivo JSON donde guardar los resultados")
+    parser.add_argument('--baseline', default=BASELINE, help="archivo JSON de la baseline")
+    parser.add_argument('--guardar-baseline', action='store_true', help="guarda los resultados como nueva baseline")
+    parser.add_argument('--tolerancia', type=float, default=0.5, help="caida relativa de muestras/s admitida frente a la baseline")
+    args = parser.parse_args()
+
+    resultados = {}
+    for bench in (bench_filtro, bench_banco, bench_desfasador, bench_lock_in, bench_usb):
+        resultados.update(bench(args.muestras))
+
+    datos = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'muestras': args.muestras,
+        'resultados': resultados,
+    }
+    if args.salida is not None:
+        with open(args.salida, 'w') as f:
+            json.dump(datos, f, indent=2)
+
+    if args.guardar_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(datos, f, indent=2)
+        for nombre, r in resultados.items():
+            print(f"{nombre:45s} {r['muestras_por_segundo']:12.4g} muestras/s")
+        print(f"Baseline guardada en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No existe la baseline {args.baseline}, usar --guardar-baseline")
+        return 1
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regresiones = comparar(resultados, baseline, args.tolerancia)
+    if regresiones:
+        print("\nRegresiones de rendimiento:")
+        for r in regresiones:
+            print("  " + r)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,8 @@
 from LockIN.LockIn import LockIn
 from LockIN.ADC.ADC_USB1408FS import ADC_USB1408FS
-import numpy as np
+from LockIN.sinks.sinks import SinkBinario, cargar_resultados
+from LockIN.visor.visor import VisorEnVivo
 import matplotlib.pyplot as plt
-import pandas as pd
 
 
 def main():
@@ -11,30 +11,43 @@ def main():
     adc_2 = ADC_USB1408FS("014447AC", 10, 3)
     
     # ~ Configuracion del lock-in
-    fs = 140
+    fs = 1000
     fr = 4
     lock_in = LockIn(fs=fs, fr=fr, adc_ref=adc_1, adc_med=adc_2)
 
     #conectamos el lock-in
     lock_in.connect()
 
-    # Apertura del archivo donde se guardan las mediciones
-    file = open("mediciones.csv", "a")
-
-    for i in range(3000):
-        v1, v2 = lock_in.medir()
-        out = lock_in.lock_in(v1, v2)
-        file.write(f"{out[0]}, {out[1]}\n")
-    
-    file.close()
-
-    datos = pd.read_csv("mediciones.csv", header=None, names=['r', 'f'])
+    # Archivo binario donde se guardan las mediciones (exportar_csv lo convierte a CSV)
+    sink = SinkBinario("mediciones.bin")
+
+    # Grafico en vivo en otro proceso: no demora la adquisicion
+    visor = VisorEnVivo(campos=('r', 'theta'))
+    visor.start()
+
+    # Adquisicion continua temporizada por el reloj de los ADC
+    fs = lock_in.start_stream(fs)
+    bloque = 500
+    try:
+        for i in range(60):
+            ref, med = lock_in.medir_bloque(bloque)
+            out = lock_in.process_block(ref, med)
+            sink.write(out)
+            visor.write(out)
+    finally:
+        lock_in.stop_stream()
+        sink.close()
+        visor.close()
+
+    datos = cargar_resultados("mediciones.bin")
 
     # ~ Graficar los resultados
-    plt.plot(datos['r'], label='r')
-    plt.plot(datos['f'], label='f')
+    plt.plot(datos['t'], datos['r'], label='r')
+    plt.plot(datos['t'], datos['theta'], label='f')
     plt.grid()
     plt.legend()
     plt.show()
-        
 
+
+if __name__ == "__main__":
+    main()